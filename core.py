@@ -1,4 +1,16 @@
 import os
+import re
+import copy
+import json
+import hashlib
+import datetime
+import time
+import uuid
+import select
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
@@ -58,7 +70,12 @@ DB_CONFIG = {
 
 
 def get_db_connection():
-    """Return a psycopg2 connection. Prefers DATABASE_URL if set."""
+    """
+    Return a DB-API connection for DB_BACKEND: psycopg2 (prefers DATABASE_URL
+    if set), or the embedded database.
+    """
+    if DB_BACKEND == "duckdb":
+        return _EmbeddedConnection()
     if DATABASE_URL:
         return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
     return psycopg2.connect(
@@ -71,15 +88,248 @@ def get_db_connection():
     )
 
 
+# ----------------------------------------------------------------
+# Storage backends — DB_BACKEND=postgres (default) or duckdb, an embedded
+# single-file database (EMBEDDED_DB_PATH) for offline / single-user use.
+# The embedded connection mimics the slice of psycopg2 this module uses
+# and translates the few Postgres-only spellings; features it lacks are
+# switched off through backend_supports().
+# ----------------------------------------------------------------
+DB_BACKEND = os.environ.get("DB_BACKEND", "postgres").strip().lower()
+EMBEDDED_DB_PATH = os.environ.get("EMBEDDED_DB_PATH", "avacrm.duckdb")
+
+BACKEND_CAPABILITIES = {
+    "postgres": {"notify", "matviews", "copy", "server_cursors", "advisory_locks", "trigram", "index_migrations",
+                 "alter_indexed_tables", "table_stats"},
+    "duckdb":   set(),
+}
+
+# Columns of properties when the embedded backend creates it
+EMBEDDED_PROPERTIES_COLUMNS = """
+    street_address TEXT, city TEXT, state TEXT, property_state TEXT, zip_code TEXT, county TEXT,
+    owner_name TEXT, apn TEXT, phone_numbers TEXT, property_type TEXT, property_use TEXT,
+    land_use TEXT, subdivision TEXT, legal_description TEXT, living_sqft INTEGER,
+    lot_acres DOUBLE PRECISION, lot_sqft INTEGER, year_built INTEGER, stories INTEGER,
+    units_count INTEGER, fireplaces INTEGER, garage_type TEXT, garage_sqft INTEGER, carport TEXT,
+    carport_area INTEGER, ac_type TEXT, heating_type TEXT, ownership_length_months INTEGER,
+    owner_type TEXT, owner_occupied BOOLEAN, vacant BOOLEAN, occupancy_status TEXT, beds INTEGER,
+    baths DOUBLE PRECISION, est_value NUMERIC(14, 2), last_sale_price NUMERIC(14, 2),
+    last_sale_date DATE, est_equity_amt NUMERIC(14, 2), est_equity_pct NUMERIC(6, 2),
+    mailing_address TEXT, mailing_city TEXT, mailing_state TEXT, mailing_zip TEXT,
+    motivation_score INTEGER, last_list_source TEXT, stage VARCHAR(50), tags TEXT, notes TEXT,
+    is_absentee BOOLEAN, years_owned INTEGER, tax_delinquent_year INTEGER,
+    has_private_loan BOOLEAN, is_cash_buyer BOOLEAN
+"""
+
+# information_schema type names, embedded -> Postgres spelling
+_EMBEDDED_TYPE_NAMES = {
+    "VARCHAR": "text", "INTEGER": "integer", "BIGINT": "bigint", "SMALLINT": "smallint",
+    "DOUBLE": "double precision", "FLOAT": "real", "BOOLEAN": "boolean", "DATE": "date",
+    "TIMESTAMP": "timestamp without time zone", "TIMESTAMP WITH TIME ZONE": "timestamp with time zone",
+}
+_SERIAL_TABLE = re.compile(r"CREATE TABLE IF NOT EXISTS (\w+) \(\s*id SERIAL PRIMARY KEY", re.IGNORECASE)
+
+_embedded_db = None
+_embedded_lock = threading.Lock()
+
+
+def backend_supports(feature) -> bool:
+    """Whether DB_BACKEND has feature (see BACKEND_CAPABILITIES)."""
+    return feature in BACKEND_CAPABILITIES.get(DB_BACKEND, set())
+
+
+def _embedded_database():
+    """The process's embedded database, created with the properties table on first use."""
+    global _embedded_db
+    with _embedded_lock:
+        if _embedded_db is None:
+            import duckdb
+            db = duckdb.connect(EMBEDDED_DB_PATH)
+            db.execute("CREATE SEQUENCE IF NOT EXISTS properties_id_seq")
+            db.execute(f"""
+                CREATE TABLE IF NOT EXISTS properties (
+                    id INTEGER PRIMARY KEY DEFAULT nextval('properties_id_seq'),
+                    {EMBEDDED_PROPERTIES_COLUMNS}
+                )
+            """)
+            _embedded_db = db
+        return _embedded_db
+
+
+def _embedded_sql(query) -> list:
+    """Postgres-only spellings this module uses, rewritten as embedded-database statements."""
+    m = _SERIAL_TABLE.search(query)
+    if not m:
+        return [_duckdb_sql(query)]
+    table = m.group(1)
+    query = _SERIAL_TABLE.sub(
+        f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY DEFAULT nextval('{table}_id_seq')", query)
+    return [f"CREATE SEQUENCE IF NOT EXISTS {table}_id_seq", _duckdb_sql(query)]
+
+
+class _EmbeddedCursor:
+    """psycopg2-style cursor over an embedded connection: %s params, dict rows, statusmessage/rowcount."""
+
+    def __init__(self, conn, dict_rows):
+        self._conn, self._dict_rows = conn, dict_rows
+        self._rows, self._names = None, []
+        self.description, self.statusmessage, self.rowcount, self.itersize = None, None, -1, 2000
+
+    def execute(self, query, params=None):
+        con = self._conn._begin()
+        verb = (query.lstrip().split(None, 1) or [""])[0].upper()
+        statements = _embedded_sql(query)
+        for q in statements[:-1]:
+            con.execute(q)
+        con.execute(statements[-1], list(params or []))
+        self.description = con.description
+        self._names = [d[0] for d in con.description or []]
+        self._rows = None
+        self.rowcount = -1
+        if verb in ("INSERT", "UPDATE", "DELETE"):
+            rows = con.fetchall()
+            if "RETURNING" in query.upper():
+                self._rows, self.rowcount = list(rows), len(rows)
+            else:
+                self._rows, self.rowcount = [], int(rows[0][0]) if rows else 0
+        self.statusmessage = f"{verb} {self.rowcount}" if self.rowcount >= 0 else verb
+        if "information_schema.columns" in query and "data_type" in self._names:
+            self._rows = self._fetch(None)
+            i = self._names.index("data_type")
+            for n, r in enumerate(self._rows):
+                t = r[i].upper()
+                name = _EMBEDDED_TYPE_NAMES.get(t, "numeric" if t.startswith("DECIMAL") else t.lower())
+                self._rows[n] = r[:i] + (name,) + r[i + 1:]
+
+    def _fetch(self, size):
+        if self._rows is not None:
+            rows = self._rows if size is None else self._rows[:size]
+            self._rows = [] if size is None else self._rows[size:]
+            return rows
+        con = self._conn._con
+        return con.fetchall() if size is None else con.fetchmany(size)
+
+    def _shape(self, rows):
+        return [dict(zip(self._names, r)) for r in rows] if self._dict_rows else [tuple(r) for r in rows]
+
+    def fetchall(self):
+        return self._shape(self._fetch(None))
+
+    def fetchmany(self, size=None):
+        return self._shape(self._fetch(size or self.itersize))
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _EmbeddedConnection:
+    """
+    psycopg2-style connection: a transaction opens on first execute; `with conn`
+    commits or rolls back. Cursors return tuples unless opened with
+    cursor_factory=RealDictCursor, as on a psycopg2 connection made from DB_CONFIG.
+    """
+
+    def __init__(self):
+        self._con = _embedded_database().cursor()
+        self._in_tx = False
+
+    def _begin(self):
+        if not self._in_tx:
+            self._con.execute("BEGIN TRANSACTION")
+            self._in_tx = True
+        return self._con
+
+    def cursor(self, name=None, cursor_factory=None):
+        return _EmbeddedCursor(self, dict_rows=cursor_factory is RealDictCursor)
+
+    def commit(self):
+        if self._in_tx:
+            self._con.execute("COMMIT")
+            self._in_tx = False
+
+    def rollback(self):
+        if self._in_tx:
+            self._con.execute("ROLLBACK")
+            self._in_tx = False
+
+    def close(self):
+        self.rollback()
+        self._con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+# Commands whose success means cached reads may be stale
+_WRITE_COMMANDS = ("INSERT", "UPDATE", "DELETE", "TRUNCATE", "MERGE", "COPY", "ALTER", "DROP")
+
+# Tables named after these keywords are what a statement reads or writes
+_TABLE_REF = re.compile(
+    r"\b(?:FROM|JOIN|INTO|UPDATE|TRUNCATE\s+TABLE|TRUNCATE|TABLE|COPY)\s+(?:ONLY\s+)?(?:IF\s+(?:NOT\s+)?EXISTS\s+)?"
+    r"([A-Za-z_\"][\w.\"]*)",
+    re.IGNORECASE,
+)
+
+
+def query_tables(query):
+    """Lower-cased table names a statement touches, or None if none could be found."""
+    names = {m.split(".")[-1].strip('"').lower() for m in _TABLE_REF.findall(query or "")}
+    return frozenset(names) or None
+
+
 def execute_query(query, params=None, fetch=False):
+    return execute_transaction([(query, params, fetch)])[0]
+
+
+def execute_transaction(statements):
+    """
+    Run [(query, params, fetch)] in one transaction. Returns each statement's
+    result as execute_query would; cache invalidation and change notification
+    cover every table written.
+    """
+    results, tables, wrote = [], set(), False
+    query = params = None
+    everything = False   # a write whose tables couldn't be named
     try:
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(query, params)
-                if fetch:
-                    return cur.fetchall()
+                for query, params, fetch in statements:
+                    start = time.perf_counter()
+                    cur.execute(query, params)
+                    _log_query(query, time.perf_counter() - start)
+                    status = (cur.statusmessage or "").upper()
+                    if status.startswith(_WRITE_COMMANDS) and cur.rowcount != 0:
+                        touched = query_tables(query)
+                        everything = everything or touched is None
+                        tables |= touched or set()
+                        wrote = True
+                    results.append(cur.fetchall() if fetch else True)
+                tables = None if everything else tables
+                if wrote and backend_supports("notify"):
+                    # Delivered to other processes only if the write commits
+                    _notify_change(cur, tables)
                 conn.commit()
-                return True
+        if wrote:
+            bump_data_version(tables)
+            if tables is None or "properties" in tables:
+                request_rollup_refresh()
+        return results
     except Exception as e:
         print(f"Database error: {str(e)}")
         print(f"Query: {query}")
@@ -87,14 +337,255 @@ def execute_query(query, params=None, fetch=False):
         raise e
 
 
+# Slow-query log — the index advisor's fallback when pg_stat_statements
+# isn't installed. Statements slower than SLOW_QUERY_MS are aggregated by
+# text (whitespace collapsed) in memory and flushed every
+# SLOW_QUERY_FLUSH_SECS by a background thread into slow_query_log, which
+# every process (and python manage.py advise) shares. The table keeps the
+# SLOW_QUERY_LOG_MAX most recently seen statements.
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_MAX = 200
+SLOW_QUERY_FLUSH_SECS = int(os.environ.get("SLOW_QUERY_FLUSH_SECS", "30"))
+
+_slow_queries = OrderedDict()   # query -> {"calls", "total_ms", "max_ms"} not yet flushed
+_slow_queries_lock = threading.Lock()
+_slow_flush_pending = threading.Event()
+_slow_flush_thread = None
+
+
+def _log_query(query, seconds):
+    global _slow_flush_thread
+    ms = seconds * 1000
+    if ms < SLOW_QUERY_MS or "slow_query_log" in query:
+        return
+    key = " ".join(query.split())
+    with _slow_queries_lock:
+        q = _slow_queries.pop(key, None) or {"calls": 0, "total_ms": 0.0, "max_ms": 0.0}
+        q["calls"] += 1
+        q["total_ms"] += ms
+        q["max_ms"] = max(q["max_ms"], ms)
+        _slow_queries[key] = q
+        while len(_slow_queries) > SLOW_QUERY_LOG_MAX:
+            _slow_queries.popitem(last=False)
+        if _slow_flush_thread is None or not _slow_flush_thread.is_alive():
+            _slow_flush_thread = threading.Thread(
+                target=_flush_slow_queries_forever, name="avacrm-slow-query-log", daemon=True
+            )
+            _slow_flush_thread.start()
+    _slow_flush_pending.set()
+
+
+def flush_slow_queries() -> int:
+    """Merge this process's unflushed slow queries into slow_query_log. Returns statements written."""
+    with _slow_queries_lock:
+        pending = list(_slow_queries.items())
+        _slow_queries.clear()
+    if not pending:
+        return 0
+    statements = [("""
+        INSERT INTO slow_query_log (query_id, query, calls, total_ms, max_ms, last_seen)
+        VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (query_id) DO UPDATE SET
+            calls = slow_query_log.calls + EXCLUDED.calls,
+            total_ms = slow_query_log.total_ms + EXCLUDED.total_ms,
+            max_ms = GREATEST(slow_query_log.max_ms, EXCLUDED.max_ms),
+            last_seen = EXCLUDED.last_seen
+    """, (hashlib.md5(k.encode()).hexdigest(), k, v["calls"], v["total_ms"], v["max_ms"]), False)
+        for k, v in pending]
+    statements.append(("""
+        DELETE FROM slow_query_log WHERE query_id NOT IN (
+            SELECT query_id FROM slow_query_log ORDER BY last_seen DESC LIMIT %s)
+    """, (SLOW_QUERY_LOG_MAX,), False))
+    execute_transaction(statements)
+    return len(pending)
+
+
+def _flush_slow_queries_forever():
+    while True:
+        _slow_flush_pending.wait()
+        time.sleep(SLOW_QUERY_FLUSH_SECS)   # batch what arrives meanwhile
+        _slow_flush_pending.clear()
+        try:
+            flush_slow_queries()
+        except Exception as e:
+            print(f"slow query log error: {e}")
+
+
+def slow_queries(limit=SLOW_QUERY_LOG_MAX) -> list:
+    """[{"query", "calls", "total_ms", "mean_ms", "max_ms"}] logged by every process, slowest total first."""
+    rows = execute_query("""
+        SELECT query, calls, total_ms, total_ms / calls AS mean_ms, max_ms
+        FROM slow_query_log ORDER BY total_ms DESC LIMIT %s
+    """, (int(limit),), fetch=True) or []
+    return [dict(r) for r in rows]
+
+
+# ----------------------------------------------------------------
+# Shared result cache — process-wide, so every Streamlit session
+# reuses hot reads. Entries are scoped to the tables they read and
+# tagged with those tables' versions; a committed write bumps the
+# versions of the tables it touched.
+# ----------------------------------------------------------------
+RESULT_CACHE_MAX = 512
+
+_ANY_TABLE = "*"
+_data_version = 0
+_table_versions = {}
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+
+def data_version() -> int:
+    """Counter bumped by every invalidation, whatever its scope."""
+    return _data_version
+
+
+def _scope_snapshot(scope):
+    if scope is None:
+        return _data_version
+    return (_table_versions.get(_ANY_TABLE, 0),) + tuple(_table_versions.get(t, 0) for t in sorted(scope))
+
+
+def bump_data_version(tables=None):
+    """Invalidate cached reads of tables (every cached read if tables is None)."""
+    global _data_version
+    tables = frozenset(tables) if tables else None
+    with _result_cache_lock:
+        _data_version += 1
+        for t in tables or (_ANY_TABLE,):
+            _table_versions[t] = _table_versions.get(t, 0) + 1
+        stale = [k for k, (scope, _, _) in _result_cache.items()
+                 if tables is None or scope is None or scope & tables]
+        for k in stale:
+            del _result_cache[k]
+
+
+def cached_call(key, loader, scope=None):
+    """
+    Return loader() for key, served from the shared cache until a write touches
+    one of the tables in scope. scope=None means any write invalidates it.
+    """
+    scope = frozenset(scope) if scope else None
+    with _result_cache_lock:
+        snapshot = _scope_snapshot(scope)
+        hit = _result_cache.get(key)
+        if hit is not None and hit[1] == snapshot:
+            _result_cache.move_to_end(key)
+            return copy.deepcopy(hit[2])
+    value = loader()
+    with _result_cache_lock:
+        # Don't store a result that raced with a write
+        if _scope_snapshot(scope) == snapshot:
+            _result_cache[key] = (scope, snapshot, value)
+            _result_cache.move_to_end(key)
+            while len(_result_cache) > RESULT_CACHE_MAX:
+                _result_cache.popitem(last=False)
+    return copy.deepcopy(value)
+
+
+def cached_query(query, params=None, scope=None):
+    """
+    execute_query(..., fetch=True) through the shared result cache. Rows are plain dicts.
+    scope defaults to the tables named in the query.
+    """
+    def load():
+        rows = execute_query(query, params, fetch=True)
+        return [dict(r) for r in rows] if rows else []
+    return cached_call(("query", query, repr(params)), load, scope or query_tables(query))
+
+
+# ----------------------------------------------------------------
+# Cross-process invalidation — writes NOTIFY the tables they touched
+# and every process runs one listener that bumps its local versions,
+# so replicas sharing a database never serve each other stale reads.
+# LISTEN needs a session-level connection: point DATABASE_LISTEN_URL
+# at a direct (non-pooled) endpoint if DATABASE_URL goes through
+# PgBouncer in transaction mode.
+# ----------------------------------------------------------------
+CHANGE_CHANNEL = "avacrm_changes"
+LISTEN_KEEPALIVE_SECS = 60
+LISTEN_RETRY_SECS = 5
+
+_process_token = uuid.uuid4().hex
+_listener_thread = None
+_listener_lock = threading.Lock()
+
+
+def _notify_change(cur, tables):
+    payload = json.dumps({"origin": _process_token, "tables": sorted(tables) if tables else None})
+    cur.execute("SELECT pg_notify(%s, %s)", (CHANGE_CHANNEL, payload))
+
+
+def _apply_change(payload):
+    try:
+        msg = json.loads(payload)
+    except ValueError:
+        msg = {}
+    if msg.get("origin") == _process_token:
+        return  # already applied when our own write committed
+    bump_data_version(msg.get("tables"))
+
+
+def _listener_connection():
+    listen_url = os.environ.get("DATABASE_LISTEN_URL", "")
+    conn = psycopg2.connect(listen_url) if listen_url else get_db_connection()
+    conn.autocommit = True
+    return conn
+
+
+def _listen_for_changes():
+    connected_before = False
+    while True:
+        conn = None
+        try:
+            conn = _listener_connection()
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANGE_CHANNEL}")
+            if connected_before:
+                # Notifications sent while we were disconnected are lost
+                bump_data_version()
+            connected_before = True
+            while True:
+                if select.select([conn], [], [], LISTEN_KEEPALIVE_SECS) == ([], [], []):
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    _apply_change(conn.notifies.pop(0).payload)
+        except Exception as e:
+            print(f"change listener error: {e}")
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        time.sleep(LISTEN_RETRY_SECS)
+
+
+def start_change_listener():
+    """Start this process's change listener thread. Safe to call on every rerun."""
+    global _listener_thread
+    if not backend_supports("notify"):
+        return  # the embedded backend serves a single process
+    with _listener_lock:
+        if _listener_thread is not None and _listener_thread.is_alive():
+            return
+        _listener_thread = threading.Thread(
+            target=_listen_for_changes, name="avacrm-change-listener", daemon=True
+        )
+        _listener_thread.start()
+
+
 def get_table_schema():
     query = """
-    SELECT column_name, data_type, is_nullable
+    SELECT column_name, data_type, is_nullable, numeric_precision, numeric_scale
     FROM information_schema.columns
     WHERE table_name = 'properties'
     ORDER BY ordinal_position;
     """
-    return execute_query(query, fetch=True)
+    return cached_query(query, scope=("properties",))
 
 
 def _properties_columns():
@@ -102,6 +593,140 @@ def _properties_columns():
     return {r["column_name"] for r in schema} if schema else set()
 
 
+def get_app_bootstrap():
+    """
+    What the app shell needs on every rerun: {"schema", "cols", "state_col", "all_states"}.
+    Built once per process and kept until properties changes.
+    """
+    def load():
+        schema = get_table_schema()
+        cols = [r["column_name"] for r in schema] if schema else []
+        states = set()
+        for col in ("state", "property_state"):
+            if col not in cols:
+                continue
+            try:
+                rows = execute_query(
+                    f"SELECT DISTINCT TRIM({col}) AS v FROM properties "
+                    f"WHERE {col} IS NOT NULL AND TRIM({col}) != '' ORDER BY v",
+                    fetch=True,
+                )
+                states.update(r["v"].strip() for r in rows or [] if r.get("v"))
+            except Exception:
+                pass
+        return {
+            "schema": schema,
+            "cols": cols,
+            "state_col": "state" if "state" in cols else "property_state",
+            "all_states": sorted(states),
+        }
+    return cached_call(("app_bootstrap",), load, scope=("properties",))
+
+
+# ---------- Column projection ----------
+# Wide free-text columns are never part of list views — fetch them per lead
+# with get_lead_details().
+LAZY_COLUMNS = ("legal_description", "notes")
+
+LEAD_ENGINE_COLUMNS = (
+    "id", "street_address", "city", "state", "property_state", "zip_code", "county",
+    "owner_name", "owner_type", "phone_numbers", "apn", "property_type", "beds", "baths",
+    "living_sqft", "year_built", "occupancy_status", "est_value", "est_equity_amt",
+    "est_equity_pct", "last_sale_price", "mailing_state", "motivation_score", "stage",
+    "tags", "last_list_source",
+)
+PIPELINE_COLUMNS = ("id", "street_address", "city", "state", "owner_name", "stage", "motivation_score", "tags")
+TAG_VIEW_COLUMNS = ("id", "street_address", "city", "state", "owner_name", "phone_numbers",
+                    "stage", "motivation_score", "tags")
+
+
+def project_columns(fields=None, available=None, prefix=""):
+    """
+    SELECT list for `fields`, restricted to columns that exist on properties.
+    fields=None selects every column except LAZY_COLUMNS. id is always included.
+    """
+    if available is None:
+        available = [r["column_name"] for r in (get_table_schema() or [])]
+    ordered = list(available)
+    available = set(ordered)
+    if fields is None:
+        fields = [c for c in ordered if c not in LAZY_COLUMNS]
+    picked = ["id"] + [f for f in fields if f in available and f != "id"]
+    return ", ".join(f"{prefix}{c}" for c in dict.fromkeys(picked))
+
+
+def get_lead_details(lead_id, fields=LAZY_COLUMNS) -> dict:
+    """Fetch the wide/lazy columns of one lead on demand."""
+    rows = execute_query(
+        f"SELECT {project_columns(fields)} FROM properties WHERE id = %s",
+        (int(lead_id),), fetch=True
+    )
+    return dict(rows[0]) if rows else {}
+
+
+# ---------- Lead search ----------
+# Type-ahead lookup by address, owner name or APN (or id, for a numeric
+# term). With pg_trgm the trigram indexes from PROPERTY_INDEXES find the
+# matches, and only the first LEAD_SEARCH_CANDIDATES of them are ranked by
+# similarity, so a common term never sorts every match; elsewhere it falls
+# back to a plain ILIKE that returns the first matches it finds. Terms
+# shorter than LEAD_SEARCH_MIN_CHARS (bar an id) match too much to be useful.
+LEAD_SEARCH_FIELDS = ("street_address", "owner_name", "apn")
+LEAD_SEARCH_COLUMNS = ("id", "street_address", "city", "state", "property_state",
+                       "owner_name", "apn", "phone_numbers")
+LEAD_SEARCH_MIN_CHARS = 3
+LEAD_SEARCH_CANDIDATES = 200
+
+
+def _trigram_search_enabled() -> bool:
+    """Whether pg_trgm is installed; checked once per process."""
+    if not backend_supports("trigram"):
+        return False
+    def load():
+        return bool(execute_query("SELECT 1 AS ok FROM pg_extension WHERE extname = 'pg_trgm'", fetch=True))
+    return cached_call(("pg_trgm",), load, scope=("pg_extension",))
+
+
+def search_leads(term, limit=10, fields=LEAD_SEARCH_COLUMNS) -> list:
+    """
+    Up to `limit` leads matching term, best match first, as dicts of `fields`.
+    Not cached — each keystroke is a new term and would only churn the cache.
+    """
+    term = (term or "").strip()
+    if len(term) < LEAD_SEARCH_MIN_CHARS and not term.isdigit():
+        return []
+    cols = _properties_columns()
+    searched = [c for c in LEAD_SEARCH_FIELDS if c in cols]
+    select = project_columns(fields, prefix="p.")
+    parts, params = [], []
+    if term.isdigit():
+        parts.append(f"SELECT {select}, 2.0 AS match_rank FROM properties p WHERE p.id = %s")
+        params.append(int(term))
+    if searched:
+        like = " OR ".join(f"p.{c} ILIKE %s" for c in searched)
+        like_params = [f"%{term}%"] * len(searched)
+        if _trigram_search_enabled():
+            rank = "GREATEST(" + ", ".join(f"word_similarity(%s, p.{c})" for c in searched) + ")"
+            fuzzy = " OR ".join(f"%s <%% p.{c}" for c in searched)
+            parts.append(f"(SELECT {select}, {rank} AS match_rank "
+                         f"FROM (SELECT p.id FROM properties p WHERE {like} OR {fuzzy} LIMIT %s) m "
+                         f"JOIN properties p ON p.id = m.id ORDER BY match_rank DESC, p.id LIMIT %s)")
+            params += [term] * len(searched) + like_params + [term] * len(searched) + [LEAD_SEARCH_CANDIDATES]
+        else:
+            parts.append(f"(SELECT {select}, 0.0 AS match_rank FROM properties p WHERE {like} LIMIT %s)")
+            params += like_params
+        params.append(int(limit))
+    if not parts:
+        return []
+    rows = execute_query(" UNION ALL ".join(parts), params, fetch=True) or []
+    seen, out = set(), []
+    for r in sorted(rows, key=lambda r: float(r["match_rank"] or 0), reverse=True):
+        if r["id"] not in seen:
+            seen.add(r["id"])
+            out.append({k: v for k, v in dict(r).items() if k != "match_rank"})
+    return out[:limit]
+
+
 def stack_lead(payload):
     try:
         cols = _properties_columns()
@@ -343,40 +968,56 @@ def bulk_insert_leads(payloads):
     return len(rows)
 
 
-def get_pipeline_counts():
-    q = """
+PIPELINE_COUNTS_QUERY = """
     SELECT COALESCE(NULLIF(TRIM(stage), ''), 'Unset') AS stage, COUNT(*) AS cnt
     FROM properties
     GROUP BY COALESCE(NULLIF(TRIM(stage), ''), 'Unset')
     ORDER BY cnt DESC
-    """
-    return execute_query(q, fetch=True)
+"""
+
+
+def get_pipeline_counts():
+    return cached_query(PIPELINE_COUNTS_QUERY)
 
 
-def get_leads_by_stage(stage_filter=None):
+def get_leads_by_stage(stage_filter=None, fields=None):
+    """Leads in a pipeline stage ("All", "Unset" or a stage name); fields=None is every non-lazy column."""
+    select = project_columns(fields)
     if stage_filter is None or stage_filter == "All":
-        return execute_query("SELECT * FROM properties ORDER BY id", fetch=True)
+        return execute_query(f"SELECT {select} FROM properties ORDER BY id", fetch=True)
     if stage_filter == "Unset":
         return execute_query(
-            "SELECT * FROM properties WHERE (stage IS NULL OR TRIM(stage) = '') ORDER BY id",
+            f"SELECT {select} FROM properties WHERE (stage IS NULL OR TRIM(stage) = '') ORDER BY id",
             fetch=True
         )
     return execute_query(
-        "SELECT * FROM properties WHERE TRIM(stage) = %s ORDER BY id",
+        f"SELECT {select} FROM properties WHERE TRIM(stage) = %s ORDER BY id",
         (stage_filter,), fetch=True
     )
 
 
 def update_stage(lead_ids, new_stage):
+    """Move leads to new_stage, logging a status_change activity for each lead that moved."""
     if not lead_ids:
         return 0
-    placeholders = ",".join(["%s"] * len(lead_ids))
-    q = f"UPDATE properties SET stage = %s WHERE id IN ({placeholders})"
-    execute_query(q, [new_stage] + list(lead_ids))
+    ids = [int(i) for i in lead_ids]
+    execute_transaction([
+        ("""
+            INSERT INTO lead_activities (property_id, activity_type, content)
+            SELECT id, 'status_change', CONCAT(COALESCE(NULLIF(TRIM(stage), ''), 'Unset'), ' → ', %s)
+            FROM properties
+            WHERE id = ANY(%s::bigint[]) AND COALESCE(TRIM(stage), '') <> %s
+        """, (new_stage, ids, new_stage), False),
+        ("UPDATE properties SET stage = %s WHERE id = ANY(%s::bigint[])", (new_stage, ids), False),
+    ])
     return len(lead_ids)
 
 
 def get_all_tags_with_counts():
+    return cached_call(("tags_with_counts",), _load_tags_with_counts, scope=("properties",))
+
+
+def _load_tags_with_counts():
     rows = execute_query(
         "SELECT id, tags FROM properties WHERE tags IS NOT NULL AND TRIM(tags) != ''",
         fetch=True
@@ -396,24 +1037,26 @@ def rename_tag(old_name, new_name):
         "SELECT id, tags FROM properties WHERE tags IS NOT NULL AND TRIM(tags) != ''",
         fetch=True
     )
-    updated = 0
+    updated = []
     for r in rows:
         tags = [t.strip() for t in (r["tags"] or "").split(",") if t.strip()]
         new_tags = [new_name if t.lower() == old_name.lower() else t for t in tags]
         if new_tags != tags:
             execute_query("UPDATE properties SET tags = %s WHERE id = %s", (", ".join(new_tags), r["id"]))
-            updated += 1
-    return updated
+            updated.append(r["id"])
+    record_audit("tag_change", updated, f"Renamed tag: {old_name} → {new_name}", {"rename": [old_name, new_name]})
+    return len(updated)
 
 
-def get_leads_by_tag(tag_name):
+def get_leads_by_tag(tag_name, fields=None):
+    """Leads carrying tag_name (case-insensitive); fields=None is every non-lazy column."""
     if not tag_name or not str(tag_name).strip():
         return []
-    q = """
-        SELECT * FROM properties
+    q = f"""
+        SELECT {project_columns(fields)} FROM properties
         WHERE LOWER(TRIM(%s)) IN (
             SELECT LOWER(TRIM(t))
-            FROM unnest(string_to_array(COALESCE(tags, ''), ',')) AS t
+            FROM unnest(string_to_array(COALESCE(tags, ''), ',')) AS tag_items(t)
             WHERE TRIM(t) != ''
         )
         ORDER BY street_address
@@ -426,7 +1069,7 @@ def remove_tag_from_all(tag_name):
         "SELECT id, tags FROM properties WHERE tags IS NOT NULL AND TRIM(tags) != ''",
         fetch=True
     )
-    updated = 0
+    updated = []
     for r in rows:
         tags = [t.strip() for t in (r["tags"] or "").split(",") if t.strip()]
         new_tags = [t for t in tags if t.lower() != tag_name.lower()]
@@ -435,24 +1078,13 @@ def remove_tag_from_all(tag_name):
                 "UPDATE properties SET tags = %s WHERE id = %s",
                 (", ".join(new_tags) if new_tags else None, r["id"])
             )
-            updated += 1
-    return updated
+            updated.append(r["id"])
+    record_audit("tag_change", updated, f"Removed tags: {tag_name}", {"remove": [tag_name]})
+    return len(updated)
 
 
 # ---------- Saved Searches ----------
-def _ensure_saved_searches_table():
-    execute_query("""
-        CREATE TABLE IF NOT EXISTS saved_searches (
-            id SERIAL PRIMARY KEY,
-            name VARCHAR(255) NOT NULL,
-            filters_json TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-
 def save_saved_search(name, filters_json):
-    _ensure_saved_searches_table()
     execute_query(
         "INSERT INTO saved_searches (name, filters_json) VALUES (%s, %s)",
         (name.strip(), filters_json)
@@ -460,12 +1092,13 @@ def save_saved_search(name, filters_json):
 
 
 def list_saved_searches():
-    _ensure_saved_searches_table()
-    rows = execute_query(
-        "SELECT id, name, created_at FROM saved_searches ORDER BY created_at DESC",
-        fetch=True
-    )
-    return rows or []
+    def load():
+        rows = execute_query(
+            "SELECT id, name, created_at FROM saved_searches ORDER BY created_at DESC",
+            fetch=True
+        )
+        return [dict(r) for r in rows] if rows else []
+    return cached_call(("saved_searches",), load, scope=("saved_searches",))
 
 
 def get_saved_search(search_id):
@@ -481,44 +1114,113 @@ def delete_saved_search(search_id):
 
 
 # ---------- Lead Activities ----------
-def _ensure_lead_activities_table():
-    execute_query("""
-        CREATE TABLE IF NOT EXISTS lead_activities (
-            id SERIAL PRIMARY KEY,
-            property_id INTEGER NOT NULL,
-            activity_type VARCHAR(50) NOT NULL DEFAULT 'note',
-            content TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    try:
-        execute_query("""
-            CREATE INDEX IF NOT EXISTS idx_lead_activities_property_id
-            ON lead_activities (property_id)
-        """)
-    except Exception:
-        pass
+# A lead's timeline is read newest first through the
+# (property_id, created_at DESC, id DESC) index, one keyset page at a time,
+# so busy leads cost the same as quiet ones.
+ACTIVITY_TYPES = ("note", "call", "email", "meeting", "status_change")
+TIMELINE_PAGE_SIZE = 20
+
+# ---------- Audit ----------
+# Batch actions log one audit_batches row holding the change (a summary
+# and a compact JSON payload) plus one slim lead_activities row per lead
+# pointing at it, written by a single INSERT ... SELECT over the batch's
+# leads. The action's own UPDATE / DELETE then targets exactly the leads
+# that were logged, all in one transaction.
+AUDIT_ACTIVITY_TYPES = ("batch_update", "tag_change", "skip_trace", "deleted", "archived", "restored")
+
+# Leads logged by the audit batch just inserted in this transaction
+AUDITED_IDS = "SELECT property_id FROM lead_activities WHERE batch_id = currval('audit_batches_id_seq')"
+
+
+def audit_statements(action, summary, change, target_query, target_params) -> list:
+    """
+    execute_transaction statements that record an audit batch for the leads
+    `target_query` selects (a query with an id column). Follow them with the
+    action's write, restricted to `id IN (AUDITED_IDS)`.
+    """
+    return [
+        ("INSERT INTO audit_batches (action, summary, payload) VALUES (%s, %s, %s)",
+         (action, summary, json.dumps(change, separators=(",", ":"), default=str)), False),
+        (f"""
+            INSERT INTO lead_activities (property_id, activity_type, batch_id)
+            SELECT target.id, %s, currval('audit_batches_id_seq') FROM ({target_query}) AS target
+        """, [action] + list(target_params), False),
+    ]
+
+
+def record_audit(action, property_ids, summary, change=None) -> int:
+    """Log an audit batch for leads already changed (e.g. one at a time). Returns the number logged."""
+    ids = [int(i) for i in property_ids]
+    if not ids:
+        return 0
+    execute_transaction(audit_statements(
+        action, summary, change or {}, "SELECT unnest(%s::bigint[]) AS id", [ids]))
+    return len(ids)
 
 
 def add_lead_activity(property_id, activity_type="note", content=None):
-    _ensure_lead_activities_table()
     execute_query(
         "INSERT INTO lead_activities (property_id, activity_type, content) VALUES (%s, %s, %s)",
         (int(property_id), (activity_type or "note").strip()[:50], (content or "").strip() or None)
     )
 
 
-def get_lead_activities(property_id):
-    _ensure_lead_activities_table()
-    rows = execute_query(
-        "SELECT id, property_id, activity_type, content, created_at FROM lead_activities WHERE property_id = %s ORDER BY created_at DESC",
-        (int(property_id),), fetch=True
-    )
-    return rows or []
+def get_lead_timeline(property_id, types=None, after=None, limit: int = TIMELINE_PAGE_SIZE) -> tuple:
+    """
+    One page of a lead's activities, newest first, optionally only `types`.
+    `after` is the cursor returned for the previous page (None for the first).
+    Returns (rows, next_cursor) — next_cursor is None on the last page.
+    """
+    where, params = ["a.property_id = %s"], [int(property_id)]
+    if types:
+        where.append("a.activity_type = ANY(%s::text[])")
+        params.append(list(types))
+    if after:
+        where.append("(a.created_at, a.id) < (%s, %s)")
+        params += [after[0], after[1]]
+    rows = execute_query(f"""
+        SELECT a.id, a.property_id, a.activity_type, COALESCE(a.content, b.summary) AS content, a.created_at
+        FROM lead_activities a
+        LEFT JOIN audit_batches b ON b.id = a.batch_id
+        WHERE {' AND '.join(where)}
+        ORDER BY a.created_at DESC, a.id DESC
+        LIMIT %s
+    """, params + [int(limit) + 1], fetch=True) or []
+    rows = [dict(r) for r in rows]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
 
 
 # ---------- Dashboard ----------
 def get_dashboard_stats():
+    """
+    Everything the Dashboard shows: {"total", "by_state", "by_stage", "score_dist", "stacked",
+    "as_of"}. Read from the analytics snapshot or the rollup views, whose build time is
+    "as_of"; falls back to scanning properties (as_of None) if neither can be read.
+    """
+    def load():
+        if analytics_enabled():
+            stats = _load_analytics_dashboard()
+            if stats is not None:
+                return stats
+        if backend_supports("matviews"):
+            try:
+                return _load_dashboard_rollup()
+            except Exception as e:
+                print(f"dashboard rollup error: {e}")
+        stats = _load_dashboard_stats()
+        stats["score_dist"] = get_score_distribution()
+        stats["stacked"] = sum(r["lead_count"] for r in get_list_stack_summary())
+        stats["as_of"] = None
+        return stats
+    return cached_call(("dashboard_stats", analytics_snapshot_id()), load,
+                       scope=("properties", "rollup_refreshes"))
+
+
+def _load_dashboard_stats():
     total = execute_query("SELECT COUNT(*) AS c FROM properties", fetch=True)
     total = total[0]["c"] if total else 0
     by_state = []
@@ -539,24 +1241,184 @@ def get_dashboard_stats():
     return {"total": total, "by_state": by_state, "by_stage": by_stage}
 
 
-# ---------- Uploaded Lists ----------
-UPLOAD_STATUSES = ("new", "closed", "negotiating", "contacted", "lost", "interesting")
+def _load_analytics_dashboard():
+    """Dashboard stats from the analytics snapshot; None if any part can't be read there."""
+    cols = _properties_columns()
+    state_col = "state" if "state" in cols else "property_state"
+    parts = {
+        "total": analytics_cached_query("SELECT COUNT(*) AS c FROM properties"),
+        "by_state": analytics_cached_query(f"""
+            SELECT {state_col} AS state, COUNT(*) AS cnt FROM properties
+            WHERE {state_col} IS NOT NULL AND TRIM({state_col}) != ''
+            GROUP BY {state_col} ORDER BY cnt DESC
+        """),
+        "by_stage": analytics_cached_query(PIPELINE_COUNTS_QUERY),
+        "score_dist": analytics_cached_query(SCORE_DISTRIBUTION_QUERY),
+        "stacked": analytics_cached_query(LIST_STACK_SUMMARY_QUERY),
+    }
+    if any(v is None for v in parts.values()):
+        return None
+    return {
+        "total": int(parts["total"][0]["c"]) if parts["total"] else 0,
+        "by_state": parts["by_state"],
+        "by_stage": parts["by_stage"],
+        "score_dist": parts["score_dist"],
+        "stacked": sum(int(r["lead_count"]) for r in parts["stacked"]),
+        "as_of": datetime.datetime.fromtimestamp(analytics_snapshot()["built"]),
+    }
+
+
+# ---------- Dashboard rollups ----------
+# lead_rollup holds lead counts per state x stage x score x list source;
+# lead_stack_rollup holds the stacked-address counts. Both are tiny, so the
+# Dashboard renders from them instead of scanning properties, as they are —
+# reads never refresh them. A write to properties queues a refresh on a
+# background thread (bursts of writes share one, at most every
+# ROLLUP_REFRESH_SECS); python manage.py refresh-rollups does the same from
+# a scheduled job. Refreshes run concurrently, so readers never block, and
+# record their time in rollup_refreshes for the Dashboard's "as of" caption.
+# The views and that table are created by schema migrations.
+NO_SCORE = -1   # lead_rollup.score for leads without a motivation score
+ROLLUP_REFRESH_SECS = int(os.environ.get("ROLLUP_REFRESH_SECS", "10"))
+
+_ROLLUP_LOCK_KEY = 72_031_032
+_rollup_pending = threading.Event()
+_rollup_thread = None
+_rollup_lock = threading.Lock()
+
+
+def _create_dashboard_rollups(cur):
+    cols = _properties_columns()
+    state_col = "state" if "state" in cols else "property_state"
+    state = f"COALESCE(TRIM({state_col}), '')" if state_col in cols else "''"
+    stage = "COALESCE(NULLIF(TRIM(stage), ''), 'Unset')" if "stage" in cols else "'Unset'"
+    score = f"COALESCE(motivation_score, {NO_SCORE})" if "motivation_score" in cols else str(NO_SCORE)
+    source = "COALESCE(TRIM(last_list_source), '')" if "last_list_source" in cols else "''"
+    cur.execute(f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS lead_rollup AS
+        SELECT {state} AS state, {stage} AS stage, {score} AS score,
+               {source} AS list_source, COUNT(*) AS lead_count
+        FROM properties
+        GROUP BY 1, 2, 3, 4
+    """)
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS lead_rollup_key
+        ON lead_rollup (state, stage, score, list_source)
+    """)
+    stack_source = "last_list_source" if "last_list_source" in cols else "NULL::text"
+    cur.execute(f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS lead_stack_rollup AS
+        SELECT list_count, COUNT(*) AS lead_count
+        FROM (
+            SELECT COUNT(DISTINCT {stack_source}) AS list_count
+            FROM properties
+            WHERE {stack_source} IS NOT NULL AND TRIM({stack_source}) != ''
+            GROUP BY LOWER(TRIM(street_address)), LOWER(TRIM(city))
+            HAVING COUNT(DISTINCT {stack_source}) >= 2
+        ) sub
+        GROUP BY list_count
+    """)
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS lead_stack_rollup_key
+        ON lead_stack_rollup (list_count)
+    """)
 
 
-def _ensure_uploaded_lists_table():
-    execute_query("""
-        CREATE TABLE IF NOT EXISTS uploaded_lists (
-            id SERIAL PRIMARY KEY,
-            name VARCHAR(255) NOT NULL,
-            filename VARCHAR(255) NOT NULL,
-            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            status VARCHAR(50) DEFAULT 'new'
-        )
-    """)
+def refresh_dashboard_rollups():
+    """Rebuild the rollup views without blocking readers. Replicas take turns."""
+    execute_transaction([
+        ("SELECT pg_advisory_xact_lock(%s)", (_ROLLUP_LOCK_KEY,), False),
+        ("REFRESH MATERIALIZED VIEW CONCURRENTLY lead_rollup", None, False),
+        ("REFRESH MATERIALIZED VIEW CONCURRENTLY lead_stack_rollup", None, False),
+        # Tells every process's cache the rollups changed
+        ("""
+            INSERT INTO rollup_refreshes (name, refreshed_at) VALUES ('dashboard', CURRENT_TIMESTAMP)
+            ON CONFLICT (name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+        """, None, False),
+    ])
+
+
+def _refresh_rollups_forever():
+    while True:
+        _rollup_pending.wait()
+        _rollup_pending.clear()
+        try:
+            refresh_dashboard_rollups()
+        except Exception as e:
+            print(f"dashboard rollup refresh error: {e}")
+        time.sleep(ROLLUP_REFRESH_SECS)
+
+
+def request_rollup_refresh():
+    """Queue a background refresh of the rollup views; returns at once."""
+    global _rollup_thread
+    if not backend_supports("matviews"):
+        return
+    with _rollup_lock:
+        if _rollup_thread is None or not _rollup_thread.is_alive():
+            _rollup_thread = threading.Thread(
+                target=_refresh_rollups_forever, name="avacrm-rollup-refresh", daemon=True
+            )
+            _rollup_thread.start()
+    _rollup_pending.set()
+
+
+def rollups_refreshed_at():
+    """When the rollup views were last refreshed, or None if not since they were created."""
+    rows = execute_query("SELECT refreshed_at FROM rollup_refreshes WHERE name = 'dashboard'", fetch=True)
+    return rows[0]["refreshed_at"] if rows else None
+
+
+def get_rollup_counts():
+    """
+    Lead counts from lead_rollup: {"total", "by_state", "by_stage", "by_score", "by_list"},
+    as of the views' last refresh.
+    """
+    rows = execute_query("""
+        SELECT GROUPING(state) AS g_state, GROUPING(stage) AS g_stage,
+               GROUPING(score) AS g_score, GROUPING(list_source) AS g_list,
+               state, stage, score, list_source, SUM(lead_count)::bigint AS cnt
+        FROM lead_rollup
+        GROUP BY GROUPING SETS ((), (state), (stage), (score), (list_source))
+        ORDER BY cnt DESC
+    """, fetch=True) or []
+    out = {"total": 0, "by_state": [], "by_stage": [], "by_score": [], "by_list": {}}
+    for r in rows:
+        cnt = int(r["cnt"])
+        if r["g_state"] and r["g_stage"] and r["g_score"] and r["g_list"]:
+            out["total"] = cnt
+        elif not r["g_state"]:
+            if r["state"]:
+                out["by_state"].append({"state": r["state"], "cnt": cnt})
+        elif not r["g_stage"]:
+            out["by_stage"].append({"stage": r["stage"], "cnt": cnt})
+        elif not r["g_score"]:
+            if r["score"] != NO_SCORE:
+                out["by_score"].append({"score": r["score"], "count": cnt})
+        elif r["list_source"]:
+            out["by_list"][r["list_source"]] = cnt
+    out["by_score"].sort(key=lambda r: r["score"], reverse=True)
+    return out
+
+
+def _load_dashboard_rollup():
+    counts = get_rollup_counts()
+    stacked = execute_query("SELECT COALESCE(SUM(lead_count), 0)::bigint AS c FROM lead_stack_rollup", fetch=True)
+    return {
+        "total": counts["total"],
+        "by_state": counts["by_state"],
+        "by_stage": counts["by_stage"],
+        "score_dist": counts["by_score"],
+        "stacked": int(stacked[0]["c"]) if stacked else 0,
+        "as_of": rollups_refreshed_at(),
+    }
+
+
+# ---------- Uploaded Lists ----------
+UPLOAD_STATUSES = ("new", "closed", "negotiating", "contacted", "lost", "interesting")
 
 
 def add_uploaded_list(name, filename):
-    _ensure_uploaded_lists_table()
     execute_query(
         "INSERT INTO uploaded_lists (name, filename, status) VALUES (%s, %s, 'new')",
         (name.strip() or filename, filename)
@@ -564,25 +1426,32 @@ def add_uploaded_list(name, filename):
 
 
 def list_uploaded_lists():
-    _ensure_uploaded_lists_table()
-    rows = execute_query(
-        "SELECT id, name, filename, uploaded_at, status FROM uploaded_lists ORDER BY uploaded_at DESC",
-        fetch=True
-    )
-    if not rows:
-        return []
-    for r in rows:
-        r["lead_count"] = 0
-        try:
-            cnt = execute_query(
-                "SELECT COUNT(*) AS c FROM properties WHERE last_list_source = %s",
-                (r["name"],), fetch=True
-            )
-            if cnt:
-                r["lead_count"] = cnt[0]["c"]
-        except Exception:
-            pass
-    return rows
+    return cached_call(("uploaded_lists",), _load_uploaded_lists, scope=("uploaded_lists", "properties"))
+
+
+def _load_uploaded_lists():
+    try:
+        # One grouped count for every list instead of a COUNT per list
+        rows = execute_query("""
+            SELECT u.id, u.name, u.filename, u.uploaded_at, u.status,
+                   COALESCE(c.lead_count, 0) AS lead_count
+            FROM uploaded_lists u
+            LEFT JOIN (
+                SELECT last_list_source, COUNT(*) AS lead_count
+                FROM properties
+                WHERE last_list_source IN (SELECT name FROM uploaded_lists)
+                GROUP BY last_list_source
+            ) c ON c.last_list_source = u.name
+            ORDER BY u.uploaded_at DESC
+        """, fetch=True)
+    except Exception:
+        # properties has no last_list_source column
+        rows = execute_query(
+            "SELECT id, name, filename, uploaded_at, status, 0 AS lead_count "
+            "FROM uploaded_lists ORDER BY uploaded_at DESC",
+            fetch=True
+        )
+    return [dict(r) for r in rows] if rows else []
 
 
 def update_uploaded_list_status(list_id, status):
@@ -602,13 +1471,13 @@ def delete_uploaded_lists(ids):
 def count_properties(state_filter=None):
     if state_filter is None or state_filter in ("All", ""):
         try:
-            r = execute_query("SELECT COUNT(*) AS c FROM properties", fetch=True)
+            r = cached_query("SELECT COUNT(*) AS c FROM properties")
             return r[0]["c"] if r else 0
         except Exception:
             return 0
     for col in ("state", "property_state"):
         try:
-            r = execute_query(f"SELECT COUNT(*) AS c FROM properties WHERE {col} = %s", (state_filter,), fetch=True)
+            r = cached_query(f"SELECT COUNT(*) AS c FROM properties WHERE {col} = %s", (state_filter,))
             if r:
                 return r[0]["c"]
         except Exception:
@@ -616,73 +1485,161 @@ def count_properties(state_filter=None):
     return 0
 
 
-def delete_properties(state_filter=None):
+# Clearing runs as a background job in chunks of DELETE_CHUNK_ROWS leads,
+# each its own short transaction that also removes the leads' activity
+# rows, so other sessions never wait on one huge DELETE. Archived leads in
+# scope are cleared too. Clearing every state TRUNCATEs instead. List
+# membership and tags live on the lead row and go with it.
+DELETE_CHUNK_ROWS = int(os.environ.get("DELETE_CHUNK_ROWS", "5000"))
+CLEAR_TABLES = ("lead_activities", "audit_batches", "properties", "properties_archive")
+
+_jobs = {}   # job id -> {"id", "label", "state", "done", "total", "error", "cancel"}
+_jobs_lock = threading.Lock()
+
+
+def _state_column():
+    return "state" if "state" in _properties_columns() else "property_state"
+
+
+def _delete_chunk(where, params, limit, table="properties") -> int:
+    """Delete up to limit leads in table matching where (and their activities) in one transaction."""
+    ids = [r["id"] for r in execute_query(
+        f"SELECT id FROM {table} WHERE {where} ORDER BY id LIMIT %s", list(params) + [int(limit)], fetch=True
+    ) or []]
+    if not ids:
+        return 0
+    rows = execute_transaction([
+        ("DELETE FROM lead_activities WHERE property_id = ANY(%s::bigint[])", (ids,), False),
+        (f"DELETE FROM {table} WHERE id = ANY(%s::bigint[]) RETURNING id", (ids,), True),
+    ])[-1]
+    return len(rows or [])
+
+
+def delete_properties(state_filter=None, progress=None, cancelled=None) -> int:
+    """
+    Delete every lead (state_filter None) or one state's leads, archived ones
+    included, with their activities. progress(done, total) is called after each
+    chunk; deleting stops between chunks once cancelled() is true. Returns
+    leads deleted.
+    """
     if state_filter is None or state_filter in ("All", ""):
-        execute_query("DELETE FROM properties")
-        return
-    for col in ("state", "property_state"):
+        total = count_properties() + sum(count_archived().values())
+        execute_transaction([(f"TRUNCATE TABLE {t}", None, False) for t in CLEAR_TABLES])
+        if progress:
+            progress(total, total)
+        return total
+    where, params = f"{_state_column()} = %s", (state_filter,)
+    total, done = count_properties(state_filter), 0
+    for table in ("properties", "properties_archive"):
+        while not (cancelled and cancelled()):
+            n = _delete_chunk(where, params, DELETE_CHUNK_ROWS, table)
+            if not n:
+                break
+            done += n
+            if progress:
+                progress(done, max(total, done))
+    return done
+
+
+def start_delete_job(state_filter=None) -> str:
+    """Run delete_properties in a background thread. Returns a job id for delete_job_status."""
+    job = {"id": uuid.uuid4().hex[:12], "label": state_filter or "all states", "state": "running",
+           "done": 0, "total": None, "error": None, "cancel": False}
+    with _jobs_lock:
+        _jobs[job["id"]] = job
+
+    def progress(done, total):
+        job["done"], job["total"] = done, total
+
+    def run():
         try:
-            execute_query(f"DELETE FROM properties WHERE {col} = %s", (state_filter,))
-            return
-        except Exception:
-            continue
+            delete_properties(state_filter, progress=progress, cancelled=lambda: job["cancel"])
+            job["state"] = "cancelled" if job["cancel"] else "done"
+        except Exception as e:
+            job["state"], job["error"] = "failed", str(e)
+
+    threading.Thread(target=run, name=f"avacrm-delete-{job['id']}", daemon=True).start()
+    return job["id"]
+
+
+def delete_job_status(job_id) -> dict:
+    """{"id", "label", "state", "done", "total", "error"}; state is running, done, cancelled or failed. {} if unknown."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return {k: v for k, v in job.items() if k != "cancel"} if job else {}
+
+
+def cancel_delete_job(job_id):
+    """Stop a running delete job after its current chunk."""
+    with _jobs_lock:
+        if job_id in _jobs:
+            _jobs[job_id]["cancel"] = True
 
 
 # ================================================================
 # UPGRADE 1: LIST STACKING — find leads on multiple imported lists
 # ================================================================
 
+# Leads on 2+ imported lists; %s = minimum list count
+STACKED_LEADS_QUERY = """
+    SELECT
+        p.id,
+        p.street_address,
+        p.city,
+        p.state,
+        p.owner_name,
+        p.phone_numbers,
+        p.est_value,
+        p.est_equity_pct,
+        p.motivation_score,
+        p.stage,
+        p.tags,
+        COUNT(DISTINCT p.last_list_source) AS list_count,
+        STRING_AGG(DISTINCT p.last_list_source, ' | ') AS list_names
+    FROM properties p
+    WHERE p.last_list_source IS NOT NULL AND TRIM(p.last_list_source) != ''
+    GROUP BY
+        p.id, p.street_address, p.city, p.state, p.owner_name,
+        p.phone_numbers, p.est_value, p.est_equity_pct,
+        p.motivation_score, p.stage, p.tags
+    HAVING COUNT(DISTINCT p.last_list_source) >= %s
+    ORDER BY list_count DESC, p.motivation_score DESC NULLS LAST
+"""
+
+
 def get_stacked_leads(min_lists=2):
     """
     Returns leads that appear on more than min_lists imported lists.
     These are 'High Priority' stacked leads.
     """
     try:
-        rows = execute_query("""
-            SELECT
-                p.id,
-                p.street_address,
-                p.city,
-                p.state,
-                p.owner_name,
-                p.phone_numbers,
-                p.est_value,
-                p.est_equity_pct,
-                p.motivation_score,
-                p.stage,
-                p.tags,
-                COUNT(DISTINCT p.last_list_source) AS list_count,
-                STRING_AGG(DISTINCT p.last_list_source, ' | ') AS list_names
-            FROM properties p
-            WHERE p.last_list_source IS NOT NULL AND TRIM(p.last_list_source) != ''
-            GROUP BY
-                p.id, p.street_address, p.city, p.state, p.owner_name,
-                p.phone_numbers, p.est_value, p.est_equity_pct,
-                p.motivation_score, p.stage, p.tags
-            HAVING COUNT(DISTINCT p.last_list_source) >= %s
-            ORDER BY list_count DESC, p.motivation_score DESC NULLS LAST
-        """, (min_lists,), fetch=True)
+        rows = cached_query(STACKED_LEADS_QUERY, (min_lists,))
         return rows or []
     except Exception as e:
         print(f"get_stacked_leads error: {e}")
         return []
 
 
+LIST_STACK_SUMMARY_QUERY = """
+    SELECT list_count, COUNT(*) AS lead_count
+    FROM (
+        SELECT COUNT(DISTINCT last_list_source) AS list_count
+        FROM properties
+        WHERE last_list_source IS NOT NULL AND TRIM(last_list_source) != ''
+        GROUP BY LOWER(TRIM(street_address)), LOWER(TRIM(city))
+        HAVING COUNT(DISTINCT last_list_source) >= 2
+    ) sub
+    GROUP BY list_count
+    ORDER BY list_count DESC
+"""
+
+
 def get_list_stack_summary():
     """Returns count of stacked leads by overlap count."""
     try:
-        rows = execute_query("""
-            SELECT list_count, COUNT(*) AS lead_count
-            FROM (
-                SELECT COUNT(DISTINCT last_list_source) AS list_count
-                FROM properties
-                WHERE last_list_source IS NOT NULL AND TRIM(last_list_source) != ''
-                GROUP BY LOWER(TRIM(street_address)), LOWER(TRIM(city))
-                HAVING COUNT(DISTINCT last_list_source) >= 2
-            ) sub
-            GROUP BY list_count
-            ORDER BY list_count DESC
-        """, fetch=True)
+        rows = analytics_cached_query(LIST_STACK_SUMMARY_QUERY)
+        if rows is None:
+            rows = cached_query(LIST_STACK_SUMMARY_QUERY)
         return rows or []
     except Exception as e:
         print(f"get_list_stack_summary error: {e}")
@@ -790,18 +1747,23 @@ def batch_update_distress_scores(state_filter=None):
         return 0
 
 
+SCORE_DISTRIBUTION_QUERY = """
+    SELECT
+        motivation_score AS score,
+        COUNT(*) AS count
+    FROM properties
+    WHERE motivation_score IS NOT NULL
+    GROUP BY motivation_score
+    ORDER BY motivation_score DESC
+"""
+
+
 def get_score_distribution():
     """Returns motivation score distribution for charts."""
     try:
-        rows = execute_query("""
-            SELECT
-                motivation_score AS score,
-                COUNT(*) AS count
-            FROM properties
-            WHERE motivation_score IS NOT NULL
-            GROUP BY motivation_score
-            ORDER BY motivation_score DESC
-        """, fetch=True)
+        rows = analytics_cached_query(SCORE_DISTRIBUTION_QUERY)
+        if rows is None:
+            rows = cached_query(SCORE_DISTRIBUTION_QUERY)
         return rows or []
     except Exception as e:
         return []
@@ -982,17 +1944,6 @@ def get_leads_with_coords(filters: dict = None) -> list:
         return []
 
 
-def ensure_lat_lon_columns():
-    """Add lat/lon columns to properties table if missing."""
-    try:
-        execute_query("ALTER TABLE properties ADD COLUMN IF NOT EXISTS lat DOUBLE PRECISION")
-        execute_query("ALTER TABLE properties ADD COLUMN IF NOT EXISTS lon DOUBLE PRECISION")
-        return True
-    except Exception as e:
-        print(f"ensure_lat_lon_columns error: {e}")
-        return False
-
-
 def geocode_lead(lead_id: int) -> bool:
     """
     Geocode a single lead using Nominatim (OpenStreetMap, free).
@@ -1026,7 +1977,6 @@ def geocode_lead(lead_id: int) -> bool:
 def batch_geocode(limit: int = 100, state_filter: str = None) -> int:
     """Geocode up to `limit` leads that have no lat/lon yet."""
     try:
-        ensure_lat_lon_columns()
         query = "SELECT id FROM properties WHERE (lat IS NULL OR lon IS NULL)"
         params = []
         if state_filter:
@@ -1046,6 +1996,53 @@ def batch_geocode(limit: int = 100, state_filter: str = None) -> int:
         return 0
 
 
+# ----------------------------------------------------------------
+# Map clustering — leads are aggregated into grid cells server-side
+# so the browser only receives one marker per cell at low zoom.
+# ----------------------------------------------------------------
+MAP_POINT_ZOOM = 12       # at or above this zoom, individual pins are shown
+MAP_POINT_LIMIT = 5000
+
+
+def map_cell_size(zoom: int) -> float:
+    """Grid cell edge in degrees — roughly 32px of a 256px web-map tile."""
+    return 360.0 / (2 ** int(zoom)) / 8
+
+
+def get_map_clusters(base_query: str, params=None, zoom: int = 10) -> list:
+    """
+    Aggregate the leads returned by base_query into grid cells for a zoom level.
+    Each cell carries its lead count, centroid, average motivation score and max equity.
+    Results come from the shared cache until the next committed write.
+    """
+    cell = map_cell_size(zoom)
+    query = f"""
+        SELECT
+            FLOOR(sub.lat / %s)::BIGINT       AS cell_y,
+            FLOOR(sub.lon / %s)::BIGINT       AS cell_x,
+            COUNT(*)                          AS lead_count,
+            AVG(sub.lat)                      AS lat,
+            AVG(sub.lon)                      AS lon,
+            ROUND(AVG(sub.motivation_score)::NUMERIC, 1) AS avg_score,
+            MAX(sub.est_equity_amt)           AS max_equity
+        FROM ({base_query}) sub
+        WHERE sub.lat IS NOT NULL AND sub.lon IS NOT NULL
+        GROUP BY 1, 2
+    """
+    return cached_query(query, [cell, cell] + list(params or []))
+
+
+def get_map_points(base_query: str, params=None, limit: int = MAP_POINT_LIMIT) -> list:
+    """Individual geocoded leads from base_query, for high zoom levels."""
+    query = f"""
+        SELECT sub.id, sub.street_address, sub.motivation_score, sub.lat, sub.lon
+        FROM ({base_query}) sub
+        WHERE sub.lat IS NOT NULL AND sub.lon IS NOT NULL
+        LIMIT {int(limit)}
+    """
+    return cached_query(query, list(params or []) or None)
+
+
 # ================================================================
 # UPGRADE 5: VIEW-LEVEL KPI AGGREGATES
 # ================================================================
@@ -1058,28 +2055,1357 @@ def get_view_kpis(lead_ids: list) -> dict:
     if not lead_ids:
         return {"total_equity": 0, "avg_score": 0, "avg_value": 0, "vacant_count": 0, "absentee_count": 0}
     try:
-        placeholders = ",".join(["%s"] * len(lead_ids))
-        rows = execute_query(f"""
-            SELECT
-                COALESCE(SUM(est_equity_amt), 0)          AS total_equity,
-                COALESCE(AVG(motivation_score), 0)        AS avg_score,
-                COALESCE(AVG(est_value), 0)               AS avg_value,
-                COUNT(*) FILTER (WHERE vacant = TRUE OR occupancy_status ILIKE '%vacant%') AS vacant_count,
-                COUNT(*) FILTER (WHERE is_absentee = TRUE OR
-                    (mailing_state IS NOT NULL AND mailing_state != state
-                     AND mailing_state != property_state)) AS absentee_count
-            FROM properties
-            WHERE id IN ({placeholders})
-        """, lead_ids, fetch=True)
+        query = f"SELECT {_kpi_select(_properties_columns(), prefix='')} FROM properties WHERE id = ANY(%s::bigint[])"
+        params = [[int(i) for i in lead_ids]]
+        rows = analytics_cached_query(query, params)
+        if rows is None:
+            rows = execute_query(query, params, fetch=True)
         if rows:
-            r = dict(rows[0])
-            return {
-                "total_equity":   float(r.get("total_equity") or 0),
-                "avg_score":      round(float(r.get("avg_score") or 0), 1),
-                "avg_value":      float(r.get("avg_value") or 0),
-                "vacant_count":   int(r.get("vacant_count") or 0),
-                "absentee_count": int(r.get("absentee_count") or 0),
-            }
+            return _kpi_row(rows[0])
     except Exception as e:
         print(f"get_view_kpis error: {e}")
     return {"total_equity": 0, "avg_score": 0, "avg_value": 0, "vacant_count": 0, "absentee_count": 0}
+
+
+# ================================================================
+# UPGRADE 6: LEAD SEARCH QUERY BUILDER
+# ================================================================
+
+# Filter spec = the dict stored by "Save search". Missing keys fall back to these.
+DEFAULT_SEARCH_SPEC = {
+    "selected_state": "All States",
+    "prop_types": [],
+    "bed_value": 0,
+    "bath_value": 0,
+    "occupancy_list": [],
+    "apn_search": "",
+    "owner_name_contains": "",
+    "owner_types": [],
+    "is_absentee": False,
+    "years_owned_min": 0,
+    "tax_year_max": None,          # None = current year (no filter)
+    "est_value_min": 0,
+    "est_value_max": 0,
+    "est_equity_min": 0,
+    "est_equity_max": 0,
+    "est_equity_pct_min": 0,
+    "est_equity_pct_max": 100,
+    "assessed_min": 0,
+    "assessed_max": 0,
+    "last_sale_min": 0,
+    "last_sale_max": 0,
+    "filter_by_sale_date": False,
+    "last_sale_date": None,
+    "private_loan": False,
+    "cash_buyer": False,
+    "filter_by_distress": False,
+    "min_distress": 1,
+    "show_only_multi": False,
+    "min_appearances": 2,
+}
+
+
+def normalize_search_spec(spec: dict) -> dict:
+    """Fill a (possibly older) saved spec with defaults."""
+    out = dict(DEFAULT_SEARCH_SPEC)
+    out.update(spec or {})
+    return out
+
+
+def _search_sort_keys(spec: dict) -> list:
+    """
+    (sql expression, row key) pairs that order search results, all ascending.
+    The first key is negated so the highest score (or appearance count)
+    sorts first without a DESC that would break a single row comparison.
+    The last two keys are always street_address then id, so the tuple is
+    unique and can be used as a keyset pagination cursor.
+    """
+    if spec.get("show_only_multi"):
+        first = ("-addr.appearance_count", "appearance_count")
+    else:
+        first = ("-COALESCE(p.motivation_score, -1)", "motivation_score")
+    return [first,
+            ("COALESCE(p.street_address, '')", "street_address"),
+            ("p.id", "id")]
+
+
+def lead_search_parts(spec: dict, columns=None) -> dict:
+    """
+    Compile a filter spec into SQL fragments over `properties p`.
+
+    Returns {"from", "where", "params", "order"}: FROM clause (with the
+    address-appearance join when show_only_multi is set), a list of WHERE
+    predicates, the bind params for both in order, and the ORDER BY list.
+    Predicates are emitted in a fixed order and compare bare columns to
+    bind params, so one filter shape always yields the same SQL text.
+    """
+    import datetime
+    spec = normalize_search_spec(spec)
+    cols = set(columns) if columns is not None else _properties_columns()
+    params, where = [], []
+
+    if spec["show_only_multi"]:
+        from_sql = """properties p
+            INNER JOIN (
+                SELECT LOWER(TRIM(street_address)) AS normalized_addr, COUNT(*) AS appearance_count
+                FROM properties
+                WHERE street_address IS NOT NULL AND TRIM(street_address) != ''
+                GROUP BY LOWER(TRIM(street_address))
+                HAVING COUNT(*) >= %s
+            ) addr ON LOWER(TRIM(p.street_address)) = addr.normalized_addr"""
+        params.append(int(spec["min_appearances"]))
+    else:
+        from_sql = "properties p"
+    order = [expr for expr, _ in _search_sort_keys(spec)]
+
+    def add(pred, *vals):
+        where.append(pred)
+        params.extend(vals)
+
+    state = spec["selected_state"]
+    if state and state != "All States":
+        if "state" in cols and "property_state" in cols:
+            add("(p.state = %s OR p.property_state = %s)", state, state)
+        else:
+            add(f"p.{'state' if 'state' in cols else 'property_state'} = %s", state)
+    if spec["prop_types"]:          add("p.property_type = ANY(%s)", list(spec["prop_types"]))
+    if spec["bed_value"]:           add("p.beds >= %s", spec["bed_value"])
+    if spec["bath_value"]:          add("p.baths >= %s", spec["bath_value"])
+    if spec["occupancy_list"]:      add("p.occupancy_status = ANY(%s)", list(spec["occupancy_list"]))
+    if spec["apn_search"]:          add("p.apn ILIKE %s", f"%{spec['apn_search']}%")
+    if spec["owner_name_contains"]: add("p.owner_name ILIKE %s", f"%{spec['owner_name_contains']}%")
+    if spec["owner_types"]:         add("p.owner_type = ANY(%s)", list(spec["owner_types"]))
+    if spec["is_absentee"]:         add("p.is_absentee = TRUE")
+    if spec["years_owned_min"] > 0: add("p.years_owned >= %s", spec["years_owned_min"])
+    tax_year_max = spec["tax_year_max"]
+    if tax_year_max and int(tax_year_max) < datetime.datetime.now().year:
+        add("p.tax_delinquent_year <= %s", int(tax_year_max))
+    if spec["est_value_min"] > 0:       add("p.est_value >= %s", spec["est_value_min"])
+    if spec["est_value_max"] > 0:       add("p.est_value <= %s", spec["est_value_max"])
+    if spec["est_equity_min"] > 0:      add("p.est_equity_amt >= %s", spec["est_equity_min"])
+    if spec["est_equity_max"] > 0:      add("p.est_equity_amt <= %s", spec["est_equity_max"])
+    if spec["est_equity_pct_min"] > 0:  add("p.est_equity_pct >= %s", spec["est_equity_pct_min"])
+    if spec["est_equity_pct_max"] < 100: add("p.est_equity_pct <= %s", spec["est_equity_pct_max"])
+    if spec["last_sale_min"] > 0:       add("p.last_sale_price >= %s", spec["last_sale_min"])
+    if spec["last_sale_max"] > 0:       add("p.last_sale_price <= %s", spec["last_sale_max"])
+    if spec["filter_by_sale_date"] and spec["last_sale_date"]:
+        sale_date = spec["last_sale_date"]
+        if isinstance(sale_date, str):
+            sale_date = datetime.date.fromisoformat(sale_date[:10])
+        add("p.last_sale_date <= %s", sale_date)
+    if spec["private_loan"]:        add("p.has_private_loan = TRUE")
+    if spec["cash_buyer"]:          add("p.is_cash_buyer = TRUE")
+    if spec["filter_by_distress"] and spec["min_distress"] > 1:
+        add("p.motivation_score >= %s", spec["min_distress"])
+
+    return {"from": from_sql, "where": where, "params": params, "order": order}
+
+
+def build_lead_search(spec: dict, columns=None) -> tuple:
+    """Return (query, params) selecting every lead that matches the filter spec."""
+    parts = lead_search_parts(spec, columns)
+    select = "p.*, addr.appearance_count" if normalize_search_spec(spec)["show_only_multi"] else "p.*"
+    query = f"SELECT {select} FROM {parts['from']}"
+    if parts["where"]:
+        query += " WHERE " + " AND ".join(parts["where"])
+    query += " ORDER BY " + ", ".join(parts["order"])
+    return query, parts["params"]
+
+
+# ---------- Paginated search ----------
+SEARCH_PAGE_SIZE = 250
+
+
+def _kpi_select(cols, prefix="p."):
+    """Aggregate columns shared by the view KPI queries."""
+    state_cols = [c for c in ("state", "property_state") if c in cols]
+    absentee = " AND ".join(f"{prefix}mailing_state != {prefix}{c}" for c in state_cols) or "FALSE"
+    return f"""
+        COALESCE(SUM({prefix}est_equity_amt), 0)   AS total_equity,
+        COALESCE(AVG({prefix}motivation_score), 0) AS avg_score,
+        COALESCE(AVG({prefix}est_value), 0)        AS avg_value,
+        COUNT(*) FILTER (WHERE {prefix}vacant = TRUE OR {prefix}occupancy_status ILIKE '%%vacant%%') AS vacant_count,
+        COUNT(*) FILTER (WHERE {prefix}is_absentee = TRUE OR
+            ({prefix}mailing_state IS NOT NULL AND {absentee})) AS absentee_count
+    """
+
+
+def _kpi_row(r) -> dict:
+    r = dict(r or {})
+    return {
+        "total_equity":   float(r.get("total_equity") or 0),
+        "avg_score":      round(float(r.get("avg_score") or 0), 1),
+        "avg_value":      float(r.get("avg_value") or 0),
+        "vacant_count":   int(r.get("vacant_count") or 0),
+        "absentee_count": int(r.get("absentee_count") or 0),
+    }
+
+
+def get_search_summary(spec: dict, columns=None) -> dict:
+    """
+    Total match count plus view KPIs for a filter spec, in one aggregate query.
+    Returns {"total", "total_equity", "avg_score", "avg_value", "vacant_count", "absentee_count"}.
+    """
+    cols = set(columns) if columns is not None else _properties_columns()
+    return cached_call(("search_summary", repr(sorted(normalize_search_spec(spec).items())), repr(sorted(cols)),
+                        analytics_snapshot_id()),
+                       lambda: _load_search_summary(spec, cols), scope=("properties",))
+
+
+def _load_search_summary(spec, cols):
+    parts = lead_search_parts(spec, cols)
+    query = f"SELECT COUNT(*) AS total, {_kpi_select(cols)} FROM {parts['from']}"
+    if parts["where"]:
+        query += " WHERE " + " AND ".join(parts["where"])
+    try:
+        rows = analytics_cached_query(query, parts["params"])
+        if rows is None:
+            rows = execute_query(query, parts["params"], fetch=True)
+        row = rows[0] if rows else {}
+        out = _kpi_row(row)
+    except Exception as e:
+        # KPI columns are optional — fall back to a bare count
+        print(f"get_search_summary KPI error: {e}")
+        query = f"SELECT COUNT(*) AS total FROM {parts['from']}"
+        if parts["where"]:
+            query += " WHERE " + " AND ".join(parts["where"])
+        rows = execute_query(query, parts["params"], fetch=True)
+        row = rows[0] if rows else {}
+        out = _kpi_row({})
+    out["total"] = int(row.get("total") or 0)
+    return out
+
+
+def search_cursor(spec: dict, row: dict) -> list:
+    """Keyset cursor (sort key values, first one negated) for a result row."""
+    keys = _search_sort_keys(normalize_search_spec(spec))
+    cursor = []
+    for _, key in keys:
+        v = row.get(key)
+        if key == "motivation_score" and v is None:
+            v = -1
+        elif key == "street_address" and v is None:
+            v = ""
+        cursor.append(v)
+    cursor[0] = -cursor[0]
+    return cursor
+
+
+def fetch_lead_page(spec: dict, after=None, limit: int = SEARCH_PAGE_SIZE, columns=None, fields=None) -> tuple:
+    """
+    Fetch one page of search results using keyset pagination.
+
+    `after` is the cursor returned for the previous page (None for the first page).
+    `fields` limits the columns fetched (None = every non-lazy column); the
+    sort-key columns are always included so the next cursor can be built.
+    Returns (rows, next_cursor) — next_cursor is None on the last page.
+    """
+    spec = normalize_search_spec(spec)
+    cols = set(columns) if columns is not None else _properties_columns()
+    parts = lead_search_parts(spec, cols)
+    where, params = list(parts["where"]), list(parts["params"])
+    if after:
+        keys = ", ".join(expr for expr, _ in _search_sort_keys(spec))
+        where.append(f"({keys}) > (%s, %s, %s)")
+        params += list(after)
+    if fields is not None:
+        fields = list(fields) + ["motivation_score", "street_address"]
+    select = project_columns(fields, columns, prefix="p.")
+    if spec["show_only_multi"]:
+        select += ", addr.appearance_count"
+    query = f"SELECT {select} FROM {parts['from']}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY " + ", ".join(parts["order"]) + f" LIMIT {int(limit) + 1}"
+    rows = execute_query(query, params, fetch=True) or []
+    rows = [dict(r) for r in rows]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = search_cursor(spec, rows[-1])
+    return rows, next_cursor
+
+
+# ---------- Result-set column profile ----------
+# Placeholder strings imports leave behind; counted as empty
+EMPTY_TEXT_VALUES = ("", "none", "nan", "null", "<na>", "na")
+_TEXT_TYPES = ("text", "character varying", "character")
+_NO_DISTINCT_TYPES = ("json", "xml")
+
+
+def get_search_profile(spec: dict, columns=None, fields=None) -> dict:
+    """
+    Column profile of a search's whole result set, in one aggregate query:
+    {"rows": n, "columns": {col: {"dtype", "non_null", "ratio", "distinct"}}}.
+    Text columns don't count EMPTY_TEXT_VALUES as filled. Served from the
+    shared cache until properties changes.
+    """
+    spec = normalize_search_spec(spec)
+    schema = get_table_schema() or []
+    dtypes = {r["column_name"]: r["data_type"] for r in schema}
+    if columns is not None:
+        dtypes = {c: t for c, t in dtypes.items() if c in set(columns)}
+    wanted = [c for c in dtypes if c not in LAZY_COLUMNS] if fields is None else [c for c in fields if c in dtypes]
+    wanted = list(dict.fromkeys(wanted))
+
+    def load():
+        parts = lead_search_parts(spec, set(dtypes))
+        aggs = ["COUNT(*) AS n_rows"]
+        for i, c in enumerate(wanted):
+            if dtypes[c] in _TEXT_TYPES:
+                aggs.append(f"COUNT(*) FILTER (WHERE LOWER(TRIM(p.{c})) <> ALL(%s)) AS nn_{i}")
+            else:
+                aggs.append(f"COUNT(p.{c}) AS nn_{i}")
+            if dtypes[c] not in _NO_DISTINCT_TYPES:
+                aggs.append(f"COUNT(DISTINCT p.{c}) AS nd_{i}")
+        n_text = sum(1 for c in wanted if dtypes[c] in _TEXT_TYPES)
+        query = f"SELECT {', '.join(aggs)} FROM {parts['from']}"
+        if parts["where"]:
+            query += " WHERE " + " AND ".join(parts["where"])
+        params = [list(EMPTY_TEXT_VALUES)] * n_text + list(parts["params"])
+        row = (execute_query(query, params, fetch=True) or [{}])[0]
+        n_rows = int(row.get("n_rows") or 0)
+        profile = {}
+        for i, c in enumerate(wanted):
+            nn = int(row.get(f"nn_{i}") or 0)
+            nd = row.get(f"nd_{i}")
+            profile[c] = {
+                "dtype": dtypes[c],
+                "non_null": nn,
+                "ratio": nn / n_rows if n_rows else 0.0,
+                "distinct": int(nd) if nd is not None else None,
+            }
+        return {"rows": n_rows, "columns": profile}
+
+    key = ("search_profile", repr(sorted(spec.items())), repr(wanted))
+    return cached_call(key, load, scope=("properties",))
+
+
+# ---------- Lead selections ----------
+# A selection is {"spec", "all", "ids", "except"}: either the explicit ids,
+# or every lead matching spec except the excluded ids. Batch actions compile
+# it to one id subquery, so they are single statements at any size.
+
+def lead_selection(spec: dict, ids=(), all_matching: bool = False, excluded=()) -> dict:
+    return {
+        "spec": normalize_search_spec(spec),
+        "all": bool(all_matching),
+        "ids": sorted({int(i) for i in ids}),
+        "except": sorted({int(i) for i in excluded}),
+    }
+
+
+def selection_subquery(selection: dict, columns=None) -> tuple:
+    """(query, params) for `SELECT p.id` over the leads in a selection."""
+    if not selection.get("all"):
+        return "SELECT p.id FROM properties p WHERE p.id = ANY(%s::bigint[])", [list(selection.get("ids") or [])]
+    parts = lead_search_parts(selection["spec"], columns)
+    where, params = list(parts["where"]), list(parts["params"])
+    if selection.get("except"):
+        where.append("p.id <> ALL(%s::bigint[])")
+        params.append(list(selection["except"]))
+    query = f"SELECT p.id FROM {parts['from']}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    return query, params
+
+
+def count_selection(selection: dict, columns=None) -> int:
+    sub, params = selection_subquery(selection, columns)
+    rows = execute_query(f"SELECT COUNT(*) AS n FROM ({sub}) s", params, fetch=True)
+    return int(rows[0]["n"]) if rows else 0
+
+
+def selection_ids(selection: dict, columns=None) -> list:
+    sub, params = selection_subquery(selection, columns)
+    return [r["id"] for r in execute_query(f"{sub} ORDER BY p.id", params, fetch=True) or []]
+
+
+def selection_rows_query(selection: dict, columns=None, fields=None) -> tuple:
+    """(query, params) selecting every lead in a selection, in id order. `fields` as for project_columns."""
+    sub, params = selection_subquery(selection, columns)
+    select = project_columns(fields, columns) if fields else "*"
+    return f"SELECT {select} FROM properties WHERE id IN ({sub}) ORDER BY id", params
+
+
+def get_selection_tags(selection: dict, columns=None) -> list:
+    """Distinct tags carried by any lead in a selection, sorted."""
+    sub, params = selection_subquery(selection, columns)
+    rows = execute_query(f"""
+        SELECT DISTINCT TRIM(t) AS tag
+        FROM properties, unnest(string_to_array(tags, ',')) AS tag_items(t)
+        WHERE id IN ({sub}) AND TRIM(t) != ''
+        ORDER BY 1
+    """, params, fetch=True)
+    return [r["tag"] for r in rows or []]
+
+
+def update_selection(selection: dict, motivation_score=None, stage=None, append_notes=None, columns=None) -> int:
+    """Set score / stage and append notes on every lead in a selection. Returns the number updated."""
+    sets, params = [], []
+    if motivation_score is not None: sets.append("motivation_score = %s"); params.append(motivation_score)
+    if stage:                        sets.append("stage = %s");            params.append(stage)
+    if append_notes:                 sets.append("notes = CONCAT(COALESCE(notes,''), %s, '\n')"); params.append(append_notes)
+    if not sets:
+        return 0
+    change = {k: v for k, v in (("motivation_score", motivation_score), ("stage", stage),
+                                ("append_notes", append_notes)) if v not in (None, "")}
+    summary = ", ".join(f"{k.replace('_', ' ')}: {v}" for k, v in change.items())
+    sub, sub_params = selection_subquery(selection, columns)
+    rows = execute_transaction(audit_statements("batch_update", summary, change, sub, sub_params) + [
+        (f"UPDATE properties SET {', '.join(sets)} WHERE id IN ({AUDITED_IDS}) RETURNING id", params, True),
+    ])[-1]
+    return len(rows or [])
+
+
+def tag_selection(selection: dict, tags, remove: bool = False, columns=None) -> int:
+    """
+    Add (or remove) tags on every lead in a selection. Each tags value is
+    rebuilt as the trimmed, de-duplicated, sorted list; an empty list becomes NULL.
+    """
+    tags = [t.strip() for t in tags if t and t.strip()]
+    if not tags:
+        return 0
+    if remove:
+        merged = "string_to_array(COALESCE(tags, ''), ',')"
+        keep = "AND TRIM(t) <> ALL(%s::text[])"
+    else:
+        merged = "string_to_array(COALESCE(tags, ''), ',') || %s::text[]"
+        keep = ""
+    summary = ("Removed tags: " if remove else "Added tags: ") + ", ".join(tags)
+    sub, sub_params = selection_subquery(selection, columns)
+    rows = execute_transaction(audit_statements(
+        "tag_change", summary, {"remove" if remove else "add": tags}, sub, sub_params) + [
+        (f"""
+            UPDATE properties SET tags = NULLIF(array_to_string(ARRAY(
+                SELECT DISTINCT TRIM(t) COLLATE "C" AS tag FROM unnest({merged}) AS tag_items(t)
+                WHERE TRIM(t) != '' {keep}
+                ORDER BY tag
+            ), ', '), '')
+            WHERE id IN ({AUDITED_IDS})
+            RETURNING id
+        """, [tags], True),
+    ])[-1]
+    return len(rows or [])
+
+
+def delete_selection(selection: dict, columns=None) -> int:
+    """Soft-delete every lead in a selection: they move to the archive and can be restored."""
+    sub, params = selection_subquery(selection, columns)
+    rows = execute_transaction(audit_statements("deleted", "Lead deleted", {}, sub, params)
+                               + _archive_statements("deleted"))[-1]
+    return len(rows or [])
+
+
+# ---------- Archive ----------
+# Deleted leads, and leads sitting in ARCHIVE_STAGES with no activity for
+# ARCHIVE_AFTER_MONTHS, move out of properties into properties_archive with
+# their ids, so every scan of the hot table skips them. Their activity
+# history stays in lead_activities and comes back with them on restore.
+# archive_cold_leads() is meant to run periodically (python manage.py archive).
+# The archive's columns are kept in step with properties by schema
+# migrations; archiving and restoring only copy rows.
+ARCHIVE_AFTER_MONTHS = int(os.environ.get("ARCHIVE_AFTER_MONTHS", "6"))
+ARCHIVE_STAGES = tuple(s.strip() for s in os.environ.get("ARCHIVE_STAGES", "Lost").split(",") if s.strip())
+ARCHIVE_REASONS = ("deleted", "archived")
+ARCHIVE_LIST_COLUMNS = ("id", "street_address", "city", "state", "property_state", "owner_name", "stage",
+                        "archive_reason", "archived_at")
+
+
+def _archive_columns() -> list:
+    """properties columns that properties_archive also holds — the ones an archive or restore copies."""
+    archived = {r["column_name"] for r in cached_query(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = 'properties_archive'",
+        scope=("properties_archive",))}
+    return [r["column_name"] for r in get_table_schema() or [] if r["column_name"] in archived]
+
+
+def _archive_statements(reason) -> list:
+    """execute_transaction statements moving the AUDITED_IDS leads into the archive; the last returns their ids."""
+    cols = ", ".join(_archive_columns())
+    return [
+        (f"""
+            INSERT INTO properties_archive ({cols}, archived_at, archive_reason)
+            SELECT {cols}, CURRENT_TIMESTAMP, %s FROM properties WHERE id IN ({AUDITED_IDS})
+        """, (reason,), False),
+        (f"DELETE FROM properties WHERE id IN ({AUDITED_IDS}) RETURNING id", None, True),
+    ]
+
+
+def archive_cold_leads(months=None, stages=ARCHIVE_STAGES, chunk=None) -> int:
+    """
+    Archive leads in `stages` with no activity in the last `months` months,
+    DELETE_CHUNK_ROWS at a time. Returns the number archived.
+    """
+    months = ARCHIVE_AFTER_MONTHS if months is None else months
+    chunk = int(chunk or DELETE_CHUNK_ROWS)
+    if not stages:
+        return 0
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=round(months * 30.44))
+    target = """
+        SELECT p.id FROM properties p
+        WHERE TRIM(p.stage) = ANY(%s::text[])
+          AND NOT EXISTS (SELECT 1 FROM lead_activities a WHERE a.property_id = p.id AND a.created_at >= %s)
+        ORDER BY p.id LIMIT %s
+    """
+    params = [list(stages), cutoff, chunk]
+    summary = f"Archived: {', '.join(stages)} with no activity for {months} months"
+    total = 0
+    while True:
+        # Checked first so a sweep with nothing to do leaves no empty audit batch
+        if not execute_query(f"SELECT COUNT(*) AS n FROM ({target}) t", params, fetch=True)[0]["n"]:
+            break
+        rows = execute_transaction(
+            audit_statements("archived", summary, {"stages": list(stages), "months": months}, target, params)
+            + _archive_statements("archived"))[-1]
+        total += len(rows or [])
+        if len(rows or []) < chunk:
+            break
+    return total
+
+
+def restore_leads(ids) -> int:
+    """Move archived leads back into properties, ids unchanged. Returns the number restored."""
+    ids = [int(i) for i in ids]
+    if not ids:
+        return 0
+    cols = ", ".join(_archive_columns())
+    rows = execute_transaction(audit_statements(
+        "restored", "Restored from archive", {}, "SELECT id FROM properties_archive WHERE id = ANY(%s::bigint[])", [ids]
+    ) + [
+        (f"INSERT INTO properties ({cols}) SELECT {cols} FROM properties_archive WHERE id IN ({AUDITED_IDS})", None, False),
+        (f"DELETE FROM properties_archive WHERE id IN ({AUDITED_IDS}) RETURNING id", None, True),
+    ])[-1]
+    return len(rows or [])
+
+
+def list_archived(reason=None, limit=100) -> list:
+    """Most recently archived leads, optionally only one archive_reason."""
+    have = set(_archive_columns()) | {"archive_reason", "archived_at"}
+    select = ", ".join(c for c in ARCHIVE_LIST_COLUMNS if c in have)
+    query, params = f"SELECT {select} FROM properties_archive", []
+    if reason:
+        query += " WHERE archive_reason = %s"
+        params.append(reason)
+    query += " ORDER BY archived_at DESC, id DESC LIMIT %s"
+    return [dict(r) for r in execute_query(query, params + [int(limit)], fetch=True) or []]
+
+
+def count_archived() -> dict:
+    """{archive_reason: count} over the archive."""
+    rows = cached_query("SELECT archive_reason, COUNT(*) AS n FROM properties_archive GROUP BY archive_reason")
+    return {r["archive_reason"]: int(r["n"]) for r in rows}
+
+
+# ---------- CSV export ----------
+# Exports stream COPY ... TO STDOUT into a file in fixed-size chunks, so
+# building one never holds its rows in Python. EXPORT_DIR defaults to the
+# system temp directory. Offering a file for download in the app does read
+# it whole into Streamlit's memory for the session, so the app refuses
+# files over EXPORT_DOWNLOAD_MAX_MB.
+EXPORT_DIR = os.environ.get("EXPORT_DIR") or tempfile.gettempdir()
+EXPORT_DOWNLOAD_MAX_MB = int(os.environ.get("EXPORT_DOWNLOAD_MAX_MB", "200"))
+
+
+def copy_query_to_csv(query, params=None, path=None, compress=False) -> str:
+    """
+    Write a SELECT's rows as CSV with a header row (gzipped if compress)
+    via COPY (batched fetches where the backend has no COPY). Returns the
+    file path — a new temp file unless path is given; the caller removes it.
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="avacrm_export_", suffix=".csv.gz" if compress else ".csv",
+                                    dir=EXPORT_DIR)
+        os.close(fd)
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+            if compress:
+                import gzip
+                with gzip.open(path, "wb", compresslevel=6) as f:
+                    _copy_csv(cur, query, params, f)
+            else:
+                with open(path, "wb") as f:
+                    _copy_csv(cur, query, params, f)
+    except Exception:
+        os.remove(path)
+        raise
+    finally:
+        conn.close()
+    return path
+
+
+def _copy_csv(cur, query, params, f, batch_rows=5000):
+    if backend_supports("copy"):
+        select_sql = cur.mogrify(query, params).decode()
+        cur.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", f)
+        return
+    import csv
+    import io
+    text = io.TextIOWrapper(f, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    cur.execute(query, params)
+    writer.writerow([d[0] for d in cur.description])
+    while True:
+        rows = cur.fetchmany(batch_rows)
+        if not rows:
+            break
+        writer.writerows(rows)
+    text.detach()
+
+
+def export_selection_csv(selection: dict, columns=None, fields=None, compress=False) -> str:
+    query, params = selection_rows_query(selection, columns, fields)
+    return copy_query_to_csv(query, params, compress=compress)
+
+
+def export_search_csv(spec: dict, columns=None, fields=None, compress=False) -> str:
+    """Every lead matching a filter spec, in id order."""
+    return export_selection_csv(lead_selection(spec, all_matching=True), columns, fields, compress)
+
+
+def export_stacked_leads_csv(min_lists=2, compress=False) -> str:
+    return copy_query_to_csv(STACKED_LEADS_QUERY, (min_lists,), compress=compress)
+
+
+# ---------- Parquet export ----------
+# Columnar snapshots for analysts: rows stream from a server-side cursor
+# in record batches typed from the Postgres schema, and are written as a
+# hive-partitioned Parquet dataset (state=OH/part-0.parquet, ...).
+# Needs pyarrow, imported only when an export runs.
+PARQUET_BATCH_ROWS = 50_000
+PARQUET_PARTITIONS = {"state": ("state", "property_state"), "list": ("last_list_source",)}
+
+_ARROW_TYPES = {
+    "smallint": "int16", "integer": "int32", "bigint": "int64",
+    "real": "float32", "double precision": "float64", "numeric": "float64",
+    "boolean": "bool_", "date": "date32",
+}
+
+
+def _declared_type(column) -> str:
+    """A get_table_schema row's data_type, with a numeric's declared precision and scale: numeric(14,2)."""
+    if column["data_type"] == "numeric" and column.get("numeric_precision") is not None:
+        return f"numeric({column['numeric_precision']},{column.get('numeric_scale') or 0})"
+    return column["data_type"]
+
+
+def _arrow_type(pa, data_type):
+    # Money and other declared numerics keep exact decimals; only an
+    # unconstrained numeric (or one wider than decimal128) becomes float64
+    if data_type.startswith("numeric("):
+        precision, scale = (int(n) for n in data_type[len("numeric("):-1].split(","))
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.float64()
+    if data_type in _ARROW_TYPES:
+        return getattr(pa, _ARROW_TYPES[data_type])()
+    if data_type == "timestamp without time zone":
+        return pa.timestamp("us")
+    if data_type == "timestamp with time zone":
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+def _arrow_batches(pa, schema, query, params, batch_rows):
+    """Record batches for a SELECT, read through a named (server-side) cursor."""
+    numeric = {i for i, f in enumerate(schema) if pa.types.is_floating(f.type)}
+    conn = get_db_connection()
+    try:
+        with conn.cursor(name=f"avacrm_parquet_{uuid.uuid4().hex[:8]}",
+                         cursor_factory=psycopg2.extensions.cursor) as cur:
+            cur.itersize = batch_rows
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(batch_rows)
+                if not rows:
+                    break
+                cols = list(zip(*rows))
+                arrays = []
+                for i, f in enumerate(schema):
+                    vals = cols[i]
+                    if i in numeric:    # Decimal -> float
+                        vals = [None if v is None else float(v) for v in vals]
+                    elif pa.types.is_string(f.type):
+                        vals = [None if v is None else v if isinstance(v, str) else str(v) for v in vals]
+                    arrays.append(pa.array(vals, type=f.type))
+                yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+    finally:
+        conn.close()
+
+
+def export_parquet(out_dir, spec=None, selection=None, partition_by=None, fields=None, columns=None,
+                   batch_rows: int = PARQUET_BATCH_ROWS) -> dict:
+    """
+    Write leads to a Parquet dataset under out_dir: a batch selection, every
+    lead matching a filter spec, or (neither given) the whole properties table.
+    partition_by is None, "state" or "list" (PARQUET_PARTITIONS); fields limits
+    the columns written (default all, lazy ones included); columns are the
+    properties columns the filters compile against, as for the CSV exports.
+    Returns {"rows", "files", "path"}.
+    """
+    dtypes = {r["column_name"]: _declared_type(r) for r in get_table_schema() or []}
+    names = [c for c in (fields or dtypes) if c in dtypes]
+    names = list(dict.fromkeys(["id"] + names))
+    part_col = None
+    if partition_by:
+        part_col = next((c for c in PARQUET_PARTITIONS[partition_by] if c in dtypes), None)
+        if part_col is None:
+            raise ValueError(f"properties has no column to partition by {partition_by}")
+        if part_col not in names:
+            names.append(part_col)
+
+    if selection is None and spec is not None:
+        selection = lead_selection(spec, all_matching=True)
+    select = ", ".join(names)
+    if selection is None:
+        query, params = f"SELECT {select} FROM properties ORDER BY id", None
+    else:
+        query, params = selection_rows_query(selection, columns if columns is not None else list(dtypes), names)
+
+    return _write_parquet(out_dir, [(c, dtypes[c]) for c in names], query, params, part_col, batch_rows)
+
+
+def _write_parquet(out_dir, columns, query, params=None, part_col=None, batch_rows=PARQUET_BATCH_ROWS) -> dict:
+    """Stream a SELECT returning `columns` [(name, postgres type)] into a Parquet dataset."""
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+
+    schema = pa.schema([(c, _arrow_type(pa, t)) for c, t in columns])
+    written, counts = [], {"rows": 0}
+
+    def batches():
+        for b in _arrow_batches(pa, schema, query, params, batch_rows):
+            counts["rows"] += b.num_rows
+            yield b
+
+    os.makedirs(out_dir, exist_ok=True)
+    pads.write_dataset(
+        batches(), out_dir, schema=schema, format="parquet",
+        partitioning=pads.partitioning(pa.schema([schema.field(part_col)]), flavor="hive") if part_col else None,
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=batch_rows,
+        file_visitor=lambda f: written.append(f.path),
+    )
+    if not written:     # keep the schema readable even when nothing matched
+        import pyarrow.parquet as pq
+        path = os.path.join(out_dir, "part-0.parquet")
+        pq.write_table(schema.empty_table(), path)
+        written.append(path)
+    return {"rows": counts["rows"], "files": sorted(written), "path": out_dir}
+
+
+# ---------- Analytics engine ----------
+# Optional. With ANALYTICS_ENGINE=duckdb the Dashboard counts, search KPIs,
+# score distribution and stacking summary run on embedded DuckDB over a
+# Parquet snapshot of properties / lead_activities, keeping aggregate scans
+# off the primary. Snapshots are built out of band by a single writer — the
+# refresher thread (one per process, but a file lock in ANALYTICS_DIR lets
+# only one build at a time) or python manage.py analytics-snapshot — and
+# published to ANALYTICS_DIR, which every process shares. Readers only ever
+# open the latest published snapshot, so these numbers can trail writes by
+# about ANALYTICS_REFRESH_SECS. With no snapshot yet, or on any analytics
+# failure, reads fall back to Postgres.
+ANALYTICS_ENGINE = os.environ.get("ANALYTICS_ENGINE", "").strip().lower()
+ANALYTICS_DIR = os.environ.get("ANALYTICS_DIR") or os.path.join(tempfile.gettempdir(), "avacrm_analytics")
+ANALYTICS_REFRESH_SECS = int(os.environ.get("ANALYTICS_REFRESH_SECS", "60"))
+# Set to 0 when manage.py analytics-snapshot --every runs as the writer instead
+ANALYTICS_REFRESH_IN_APP = os.environ.get("ANALYTICS_REFRESH_IN_APP", "1") != "0"
+ANALYTICS_TABLES = ("properties", "lead_activities")
+_ANALYTICS_SCOPE = ("analytics_snapshot",)   # cache keys carry the snapshot id instead
+_SNAPSHOT_POINTER = "CURRENT"                # JSON naming the latest published snapshot
+_SNAPSHOT_LOCK = ".writer.lock"
+_SNAPSHOT_BUILDING = ".building_"
+
+_published = (None, None)   # (pointer mtime, snapshot) last read by this process
+_refresher_thread = None
+_refresher_lock = threading.Lock()
+
+
+def analytics_enabled() -> bool:
+    return ANALYTICS_ENGINE == "duckdb"
+
+
+def _table_columns(table):
+    rows = execute_query("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_name = %s ORDER BY ordinal_position
+    """, (table,), fetch=True) or []
+    return [(r["column_name"], r["data_type"]) for r in rows]
+
+
+def _analytics_change_marker() -> list:
+    """
+    A value that changes whenever ANALYTICS_TABLES are written. On Postgres it
+    comes from the table statistics, so writes from any process count; the
+    embedded backend has a single process and uses its own data versions.
+    """
+    if not backend_supports("table_stats"):
+        return [_process_token] + list(_scope_snapshot(ANALYTICS_TABLES))
+    rows = execute_query("""
+        SELECT relname, n_tup_ins, n_tup_upd, n_tup_del, n_live_tup
+        FROM pg_stat_user_tables WHERE relname IN %s ORDER BY relname
+    """, (ANALYTICS_TABLES,), fetch=True) or []
+    return [[r["relname"], r["n_tup_ins"], r["n_tup_upd"], r["n_tup_del"], r["n_live_tup"]] for r in rows]
+
+
+def _read_published():
+    try:
+        with open(os.path.join(ANALYTICS_DIR, _SNAPSHOT_POINTER)) as f:
+            snap = json.load(f)
+    except (OSError, ValueError):
+        return None
+    snap["path"] = os.path.join(ANALYTICS_DIR, snap["id"])
+    return snap
+
+
+def _sweep_snapshots(keep):
+    for name in os.listdir(ANALYTICS_DIR):
+        path = os.path.join(ANALYTICS_DIR, name)
+        if os.path.isdir(path) and name not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def refresh_analytics_snapshot(force=False):
+    """
+    Build a Parquet snapshot of ANALYTICS_TABLES and publish it as the latest.
+    Skipped (returns None) while another process is building, or — unless
+    force — when the published one is under ANALYTICS_REFRESH_SECS old or
+    nothing has changed since it was built.
+    """
+    import fcntl
+    os.makedirs(ANALYTICS_DIR, exist_ok=True)
+    with open(os.path.join(ANALYTICS_DIR, _SNAPSHOT_LOCK), "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+        current = _read_published()
+        marker = _analytics_change_marker()
+        if current is not None and not force and (
+                time.time() - current["built"] < ANALYTICS_REFRESH_SECS or current.get("marker") == marker):
+            return None
+        snap_id = f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        building = os.path.join(ANALYTICS_DIR, _SNAPSHOT_BUILDING + snap_id)
+        tables = []
+        try:
+            for table in ANALYTICS_TABLES:
+                cols = _table_columns(table)
+                if cols:
+                    _write_parquet(os.path.join(building, table), cols,
+                                   f"SELECT {', '.join(c for c, _ in cols)} FROM {table}")
+                    tables.append(table)
+            os.rename(building, os.path.join(ANALYTICS_DIR, snap_id))
+        except Exception:
+            shutil.rmtree(building, ignore_errors=True)
+            raise
+        snap = {"id": snap_id, "tables": tables, "built": time.time(), "marker": marker,
+                "prev": current["id"] if current else None}
+        pointer = os.path.join(ANALYTICS_DIR, _SNAPSHOT_POINTER)
+        with open(pointer + ".tmp", "w") as f:
+            json.dump(snap, f)
+        os.replace(pointer + ".tmp", pointer)
+        # The previous snapshot stays for readers that picked it up just before
+        _sweep_snapshots({snap_id, snap["prev"]})
+        return _read_published()
+
+
+def _refresh_analytics_forever():
+    while True:
+        try:
+            refresh_analytics_snapshot()
+        except Exception as e:
+            print(f"analytics snapshot error: {e}")
+        time.sleep(ANALYTICS_REFRESH_SECS)
+
+
+def start_analytics_refresher():
+    """Start this process's snapshot refresher thread. Safe to call on every rerun."""
+    global _refresher_thread
+    if not analytics_enabled() or not ANALYTICS_REFRESH_IN_APP:
+        return
+    with _refresher_lock:
+        if _refresher_thread is not None and _refresher_thread.is_alive():
+            return
+        _refresher_thread = threading.Thread(
+            target=_refresh_analytics_forever, name="avacrm-analytics-refresher", daemon=True
+        )
+        _refresher_thread.start()
+
+
+def analytics_snapshot():
+    """
+    The latest published snapshot; None when analytics is off or none has been
+    built yet. Never builds one.
+    """
+    global _published
+    if not analytics_enabled():
+        return None
+    try:
+        stamp = os.stat(os.path.join(ANALYTICS_DIR, _SNAPSHOT_POINTER)).st_mtime_ns
+    except OSError:
+        return None
+    if _published[0] != stamp:
+        _published = (stamp, _read_published())
+    return _published[1]
+
+
+def _duckdb_sql(query):
+    """psycopg2 placeholders (%s, %%) to DuckDB's (?, %)."""
+    return query.replace("%%", "\0").replace("%s", "?").replace("\0", "%")
+
+
+def analytics_query(query, params=None, snap=None) -> list:
+    """
+    Run a query written for Postgres (%s params) on DuckDB, with each snapshot
+    table as a view of the same name. Rows come back as dicts.
+    """
+    import duckdb
+    snap = snap or analytics_snapshot()
+    if snap is None:
+        raise RuntimeError("analytics engine is not enabled")
+    con = duckdb.connect()
+    try:
+        for table in snap["tables"]:
+            files = os.path.join(snap["path"], table, "**", "*.parquet").replace("'", "''")
+            con.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{files}')")
+        cur = con.execute(_duckdb_sql(query), list(params or []))
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, r)) for r in cur.fetchall()]
+    finally:
+        con.close()
+
+
+def analytics_cached_query(query, params=None):
+    """
+    query's rows from the analytics snapshot, cached per snapshot; None when
+    analytics is off or the query fails there, so callers fall back to Postgres.
+    """
+    snap = analytics_snapshot()
+    if snap is None:
+        return None
+    try:
+        return cached_call(("analytics", snap["id"], query, repr(params)),
+                           lambda: analytics_query(query, params, snap), scope=_ANALYTICS_SCOPE)
+    except Exception as e:
+        print(f"analytics query error: {e}")
+        return None
+
+
+def analytics_snapshot_id():
+    """Id of the snapshot analytics reads would use now (None if off), for cache keys."""
+    snap = analytics_snapshot()
+    return snap["id"] if snap else None
+
+
+# ---------- Schema migrations ----------
+# Versioned schema changes, applied in order and recorded in
+# schema_migrations so each runs once per database. ensure_schema() applies
+# whatever is pending when a process starts (python manage.py migrate does
+# the same at deploy time); the functions above assume the schema is there
+# and carry no DDL. Steps are SQL strings or callables taking a cursor,
+# which returns dict rows whatever the connection's default. A migration
+# needing a capability its backend lacks is skipped and left unrecorded.
+# Never edit an applied migration — add a new version.
+def _add_activity_batch_id(cur):
+    # The embedded backend can't alter a table with indexes; rebuild around it
+    rebuild = not backend_supports("alter_indexed_tables")
+    if rebuild:
+        cur.execute("DROP INDEX IF EXISTS idx_lead_activities_timeline")
+    cur.execute("ALTER TABLE lead_activities ADD COLUMN IF NOT EXISTS batch_id INTEGER")
+    if rebuild:
+        cur.execute("CREATE INDEX idx_lead_activities_timeline "
+                    "ON lead_activities (property_id, created_at DESC, id DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_lead_activities_batch ON lead_activities (batch_id)")
+
+
+def _sync_archive_columns(cur):
+    # Gives properties_archive every properties column it lacks, with the exact
+    # type. A migration that adds properties columns should run this again.
+    if backend_supports("alter_indexed_tables"):
+        cur.execute("""
+            SELECT a.attname AS name, format_type(a.atttypid, a.atttypmod) AS type
+            FROM pg_attribute a
+            WHERE a.attrelid = 'properties'::regclass AND a.attnum > 0 AND NOT a.attisdropped
+              AND a.attname NOT IN (SELECT column_name FROM information_schema.columns
+                                    WHERE table_name = 'properties_archive')
+            ORDER BY a.attnum
+        """)
+        for r in cur.fetchall():
+            cur.execute(f'ALTER TABLE properties_archive ADD COLUMN IF NOT EXISTS "{r["name"]}" {r["type"]}')
+        return
+    cur.execute("""
+        SELECT column_name AS name, data_type AS type FROM information_schema.columns
+        WHERE table_name = 'properties' AND column_name NOT IN (
+            SELECT column_name FROM information_schema.columns WHERE table_name = 'properties_archive')
+        ORDER BY ordinal_position
+    """)
+    missing = cur.fetchall()
+    if not missing:
+        return
+    # The embedded backend can't alter a table with indexes, nor re-create a
+    # dropped unique index in the same transaction; rebuild the table instead
+    added = ", ".join(f'CAST(NULL AS {r["type"]}) AS "{r["name"]}"' for r in missing)
+    cur.execute(f"CREATE TABLE properties_archive_sync AS SELECT *, {added} FROM properties_archive")
+    cur.execute("DROP TABLE properties_archive")
+    cur.execute("ALTER TABLE properties_archive_sync RENAME TO properties_archive")
+    cur.execute("CREATE UNIQUE INDEX idx_properties_archive_id ON properties_archive (id)")
+    cur.execute("CREATE INDEX idx_properties_archive_reason ON properties_archive (archive_reason, archived_at)")
+
+
+SCHEMA_MIGRATIONS = [
+    # version, name, steps, capability needed
+    (1, "create saved_searches", ["""
+        CREATE TABLE IF NOT EXISTS saved_searches (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            filters_json TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """], None),
+    (2, "create lead_activities", ["""
+        CREATE TABLE IF NOT EXISTS lead_activities (
+            id SERIAL PRIMARY KEY,
+            property_id INTEGER NOT NULL,
+            activity_type VARCHAR(50) NOT NULL DEFAULT 'note',
+            content TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """, "CREATE INDEX IF NOT EXISTS idx_lead_activities_property_id ON lead_activities (property_id)"], None),
+    (3, "create uploaded_lists", ["""
+        CREATE TABLE IF NOT EXISTS uploaded_lists (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            filename VARCHAR(255) NOT NULL,
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status VARCHAR(50) DEFAULT 'new'
+        )
+    """], None),
+    (4, "add properties lat/lon", [
+        "ALTER TABLE properties ADD COLUMN IF NOT EXISTS lat DOUBLE PRECISION",
+        "ALTER TABLE properties ADD COLUMN IF NOT EXISTS lon DOUBLE PRECISION",
+    ], None),
+    (5, "create dashboard rollups", [_create_dashboard_rollups], "matviews"),
+    (6, "index lead_activities timeline", [
+        "DROP INDEX IF EXISTS idx_lead_activities_property_id",   # a prefix of the new index
+        "UPDATE lead_activities SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL",
+        "ALTER TABLE lead_activities ALTER COLUMN created_at SET NOT NULL",
+        "CREATE INDEX IF NOT EXISTS idx_lead_activities_timeline "
+        "ON lead_activities (property_id, created_at DESC, id DESC)",
+    ], None),
+    (7, "create audit_batches", ["""
+        CREATE TABLE IF NOT EXISTS audit_batches (
+            id SERIAL PRIMARY KEY,
+            action VARCHAR(50) NOT NULL,
+            summary TEXT,
+            payload TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """, _add_activity_batch_id], None),
+    (8, "create properties_archive", [
+        "CREATE TABLE IF NOT EXISTS properties_archive AS SELECT * FROM properties WHERE 1 = 0",
+        "ALTER TABLE properties_archive ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP",
+        "ALTER TABLE properties_archive ADD COLUMN IF NOT EXISTS archive_reason VARCHAR(20)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_properties_archive_id ON properties_archive (id)",
+        "CREATE INDEX IF NOT EXISTS idx_properties_archive_reason ON properties_archive (archive_reason, archived_at)",
+    ], None),
+    (9, "create rollup_refreshes", ["""
+        CREATE TABLE IF NOT EXISTS rollup_refreshes (
+            name VARCHAR(50) PRIMARY KEY,
+            refreshed_at TIMESTAMP NOT NULL
+        )
+    """], "matviews"),
+    (10, "sync properties_archive columns", [_sync_archive_columns], None),
+    (11, "create slow_query_log", ["""
+        CREATE TABLE IF NOT EXISTS slow_query_log (
+            query_id VARCHAR(32) PRIMARY KEY,
+            query TEXT NOT NULL,
+            calls BIGINT NOT NULL,
+            total_ms DOUBLE PRECISION NOT NULL,
+            max_ms DOUBLE PRECISION NOT NULL,
+            last_seen TIMESTAMP NOT NULL
+        )
+    """], None),
+]
+
+_MIGRATION_LOCK_KEY = 72_031_044
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _applied_migrations(cur) -> set:
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {r["version"] for r in cur.fetchall()}
+
+
+def migration_status() -> list:
+    """[{"version", "name", "state"}] for SCHEMA_MIGRATIONS; state is applied, pending or skipped."""
+    conn = get_db_connection()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            applied = _applied_migrations(cur)
+    finally:
+        conn.close()
+    out = []
+    for version, name, _, needs in SCHEMA_MIGRATIONS:
+        if version in applied:
+            state = "applied"
+        elif needs and not backend_supports(needs):
+            state = f"skipped (no {needs} on {DB_BACKEND})"
+        else:
+            state = "pending"
+        out.append({"version": version, "name": name, "state": state})
+    return out
+
+
+def apply_migrations(log=print) -> list:
+    """
+    Apply pending migrations, each in its own transaction together with its
+    schema_migrations row. Replicas starting at once serialise on an
+    advisory lock, so each migration runs once. Returns the versions applied.
+    """
+    done = []
+    conn = get_db_connection()
+    try:
+        with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            if backend_supports("advisory_locks"):
+                cur.execute("SELECT pg_advisory_lock(%s)", (_MIGRATION_LOCK_KEY,))   # held until close
+            applied = _applied_migrations(cur)
+        for version, name, steps, needs in SCHEMA_MIGRATIONS:
+            if version in applied or (needs and not backend_supports(needs)):
+                continue
+            with conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+                for step in steps:
+                    if callable(step):
+                        step(cur)
+                    else:
+                        cur.execute(step)
+                cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+                if backend_supports("notify"):
+                    _notify_change(cur, None)
+            log(f"applied {version:04d} {name}")
+            done.append(version)
+    finally:
+        conn.close()
+    if done:
+        bump_data_version()   # table schemas are cached
+    return done
+
+
+def ensure_schema():
+    """Apply pending migrations once per process. Safe to call on every rerun."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            apply_migrations(log=lambda msg: print(f"schema migration: {msg}"))
+            _schema_ready = True
+
+
+# ---------- Index migrations ----------
+# Indexes for the Lead Engine's filter and sort patterns. Each is created
+# CONCURRENTLY (no write lock on properties) and only when the columns it
+# needs exist; trigram indexes also need the pg_trgm extension. The search
+# keyset order is (-COALESCE(motivation_score, -1), COALESCE(street_address, ''),
+# id), all ascending, so the order indexes use exactly those expressions and
+# the page predicate is a single row comparison the planner can seek.
+_SEARCH_ORDER = "((-COALESCE(motivation_score, -1)), COALESCE(street_address, ''), id)"
+
+# Indexes PROPERTY_INDEXES no longer defines, dropped by apply_index_migrations
+RETIRED_INDEXES = ("idx_properties_search_order", "idx_properties_absentee_order")
+
+PROPERTY_INDEXES = [
+    # name, columns needed, definition after ON properties, needs pg_trgm
+    ("idx_properties_search_keyset", ("motivation_score", "street_address"), _SEARCH_ORDER, False),
+    ("idx_properties_state", ("state",), "(state)", False),
+    ("idx_properties_property_state", ("property_state",), "(property_state)", False),
+    ("idx_properties_stage", ("stage",), "(COALESCE(NULLIF(TRIM(stage), ''), 'Unset'))", False),
+    ("idx_properties_stage_trim", ("stage",), "(TRIM(stage))", False),
+    ("idx_properties_score", ("motivation_score",), "(motivation_score) WHERE motivation_score IS NOT NULL", False),
+    ("idx_properties_property_type", ("property_type",), "(property_type)", False),
+    ("idx_properties_owner_type", ("owner_type",), "(owner_type)", False),
+    ("idx_properties_est_value", ("est_value",), "(est_value)", False),
+    ("idx_properties_est_equity_pct", ("est_equity_pct",), "(est_equity_pct)", False),
+    ("idx_properties_absentee_keyset", ("is_absentee", "motivation_score", "street_address"),
+     f"{_SEARCH_ORDER} WHERE is_absentee = TRUE", False),
+    ("idx_properties_address", ("street_address", "city"),
+     "(LOWER(TRIM(street_address)), LOWER(TRIM(city)))", False),
+    ("idx_properties_list_address", ("street_address", "city", "last_list_source"),
+     "(LOWER(TRIM(street_address)), LOWER(TRIM(city)), last_list_source) "
+     "WHERE last_list_source IS NOT NULL AND TRIM(last_list_source) != ''", False),
+    ("idx_properties_apn_trgm", ("apn",), "USING gin (apn gin_trgm_ops)", True),
+    ("idx_properties_owner_name_trgm", ("owner_name",), "USING gin (owner_name gin_trgm_ops)", True),
+    ("idx_properties_street_address_trgm", ("street_address",), "USING gin (street_address gin_trgm_ops)", True),
+]
+
+
+def _autocommit_connection():
+    conn = get_db_connection()
+    conn.autocommit = True   # CREATE INDEX CONCURRENTLY can't run in a transaction
+    return conn
+
+
+def _existing_indexes(cur, table="properties") -> dict:
+    """{index name: {"def", "valid"}} for table."""
+    cur.execute("""
+        SELECT c.relname AS name, pg_get_indexdef(i.indexrelid) AS def, i.indisvalid AS valid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE t.relname = %s
+    """, (table,))
+    return {r["name"]: {"def": r["def"], "valid": r["valid"]} for r in cur.fetchall()}
+
+
+def _has_trigram(cur, install=False) -> bool:
+    if install:
+        try:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except psycopg2.Error as e:
+            print(f"pg_trgm unavailable: {e}")
+    cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+    return cur.fetchone() is not None
+
+
+def index_status() -> list:
+    """[{"name", "sql", "state"}] for PROPERTY_INDEXES; state is present / missing / invalid / skipped."""
+    if not backend_supports("index_migrations"):
+        return []
+    cols = _properties_columns()
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            existing = _existing_indexes(cur)
+            trigram = _has_trigram(cur)
+    finally:
+        conn.close()
+    out = []
+    for name, needs, definition, needs_trgm in PROPERTY_INDEXES:
+        if not set(needs) <= cols:
+            state = "skipped: missing columns"
+        elif needs_trgm and not trigram and name not in existing:
+            state = "skipped: pg_trgm not installed"
+        elif name not in existing:
+            state = "missing"
+        else:
+            state = "present" if existing[name]["valid"] else "invalid"
+        out.append({"name": name, "sql": f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON properties {definition}",
+                    "state": state})
+    return out
+
+
+def apply_index_migrations(log=print) -> list:
+    """
+    Create the missing PROPERTY_INDEXES (rebuilding any left invalid by an
+    interrupted concurrent build) and drop RETIRED_INDEXES. Safe to re-run.
+    Returns the names created.
+    """
+    if not backend_supports("index_migrations"):
+        log(f"{DB_BACKEND}: index migrations are Postgres-only")
+        return []
+    cols = _properties_columns()
+    created = []
+    conn = _autocommit_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            trigram = _has_trigram(cur, install=any(t for *_, t in PROPERTY_INDEXES))
+            existing = _existing_indexes(cur)
+            for name in RETIRED_INDEXES:
+                if name in existing:
+                    log(f"dropping {name}")
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            for name, needs, definition, needs_trgm in PROPERTY_INDEXES:
+                if not set(needs) <= cols or (needs_trgm and not trigram):
+                    continue
+                if name in existing and existing[name]["valid"]:
+                    continue
+                if name in existing:
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                log(f"creating {name}")
+                start = time.perf_counter()
+                cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON properties {definition}")
+                log(f"  done in {time.perf_counter() - start:.1f}s")
+                created.append(name)
+            if created:
+                cur.execute("ANALYZE properties")
+    finally:
+        conn.close()
+    return created
+
+
+# ---------- Index advisor ----------
+_PREDICATE = re.compile(
+    r"(?:\b[a-z_]+\.)?\b([a-z_][a-z0-9_]*)\)*\s*(=\s*ANY|<>\s*ALL|NOT\s+ILIKE|ILIKE|LIKE|>=|<=|<>|!=|=|<|>|\bIN\b)",
+    re.IGNORECASE)
+_NOT_COLUMNS = {"and", "or", "not", "where", "select", "count", "coalesce", "trim", "lower", "nullif", "true", "false",
+                "null", "filter", "having", "on", "sum", "avg", "max", "min", "case", "when", "then", "else", "end"}
+
+
+def _query_stats(limit=100) -> tuple:
+    """(source, [{"query", "calls", "mean_ms", "total_ms"}]) — pg_stat_statements if installed, else slow_queries()."""
+    if backend_supports("index_migrations") and execute_query(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'", fetch=True):
+        try:
+            rows = execute_query("""
+                SELECT query, calls, mean_exec_time AS mean_ms, total_exec_time AS total_ms
+                FROM pg_stat_statements
+                WHERE query ILIKE '%%properties%%'
+                ORDER BY total_exec_time DESC
+                LIMIT %s
+            """, (limit,), fetch=True)
+            return "pg_stat_statements", [dict(r) for r in rows or []]
+        except Exception as e:
+            print(f"pg_stat_statements unavailable: {e}")
+    flush_slow_queries()
+    return "slow query log", [q for q in slow_queries() if "properties" in q["query"].lower()][:limit]
+
+
+def advise_indexes(limit=100) -> dict:
+    """
+    Suggest indexes for properties from observed queries: columns filtered on
+    in WHERE clauses that no index leads with (ILIKE ones get a trigram index;
+    boolean flags are left out), plus any managed index that is missing.
+    Returns {"source", "suggestions": [{"column", "kind", "calls", "total_ms", "sql"}], "missing": [...]}.
+    """
+    dtypes = {r["column_name"]: r["data_type"] for r in get_table_schema() or []}
+    cols = {c for c, t in dtypes.items() if t != "boolean"}   # flags want partial indexes, not a btree
+    source, stats = _query_stats(limit)
+    indexed, trigram_indexed = set(), set()
+    if backend_supports("index_migrations"):
+        for r in execute_query("SELECT indexdef FROM pg_indexes WHERE tablename = 'properties'", fetch=True) or []:
+            d = r["indexdef"]
+            body = d[d.index("(") + 1:]
+            first = re.findall(r"[a-z_][a-z0-9_]*", body.split(",")[0].lower())
+            target = next((w for w in first if w in cols), None)
+            if target:
+                (trigram_indexed if "gin_trgm_ops" in d else indexed).add(target)
+    found = {}
+    for q in stats:
+        text = q["query"]
+        # Predicates after a WHERE; aggregate FILTER (WHERE ...) clauses are skipped
+        where = re.split(r"(?<!\()\bWHERE\b", text, flags=re.IGNORECASE)
+        if len(where) < 2:
+            continue
+        for col, op in _PREDICATE.findall(" ".join(where[1:])):
+            col = col.lower()
+            if col in _NOT_COLUMNS or col not in cols:
+                continue
+            kind = "trigram" if "LIKE" in op.upper() else "btree"
+            if (kind == "btree" and col in indexed) or (kind == "trigram" and col in trigram_indexed):
+                continue
+            f = found.setdefault((col, kind), {"column": col, "kind": kind, "calls": 0, "total_ms": 0.0})
+            f["calls"] += int(q.get("calls") or 0)
+            f["total_ms"] += float(q.get("total_ms") or 0)
+    suggestions = sorted(found.values(), key=lambda f: f["total_ms"], reverse=True)
+    for f in suggestions:
+        using = f"USING gin ({f['column']} gin_trgm_ops)" if f["kind"] == "trigram" else f"({f['column']})"
+        suffix = "_trgm" if f["kind"] == "trigram" else ""
+        f["sql"] = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_properties_{f['column']}{suffix} ON properties {using}"
+    missing = [i for i in index_status() if i["state"] in ("missing", "invalid")]
+    return {"source": source, "suggestions": suggestions, "missing": missing}
@@ -0,0 +1,112 @@
+"""
+Maintenance commands, run from the repo root with the app's DB settings:
+
+    python manage.py migrate           # apply schema migrations, then indexes
+    python manage.py migrations        # schema migration status
+    python manage.py indexes           # managed index status
+    python manage.py migrate-indexes   # create missing indexes (CONCURRENTLY)
+    python manage.py advise            # suggest indexes from observed queries
+    python manage.py archive           # move cold leads to the archive (run periodically)
+    python manage.py analytics-snapshot  # build and publish a new analytics snapshot
+    python manage.py refresh-rollups   # refresh the Dashboard rollup views
+"""
+import argparse
+import sys
+import time
+
+import core
+
+
+def cmd_migrate(args):
+    applied = core.apply_migrations()
+    print(f"{len(applied)} migration(s) applied." if applied else "Schema up to date.")
+    if core.backend_supports("index_migrations"):
+        cmd_migrate_indexes(args)
+
+
+def cmd_migrations(args):
+    for m in core.migration_status():
+        print(f"{m['version']:04d} {m['state']:<32} {m['name']}")
+
+
+def cmd_indexes(args):
+    for i in core.index_status():
+        print(f"{i['state']:<32} {i['name']}")
+
+
+def cmd_migrate_indexes(args):
+    created = core.apply_index_migrations()
+    print(f"{len(created)} index(es) created." if created else "Indexes up to date.")
+
+
+def cmd_advise(args):
+    advice = core.advise_indexes(limit=args.limit)
+    print(f"Source: {advice['source']}")
+    if advice["missing"]:
+        print("\nManaged indexes not built yet (python manage.py migrate-indexes):")
+        for i in advice["missing"]:
+            print(f"  [{i['state']}] {i['sql']}")
+    if advice["suggestions"]:
+        print("\nFiltered columns with no leading index:")
+        for s in advice["suggestions"]:
+            print(f"  {s['column']:<24} {s['kind']:<8} calls={s['calls']:<8} total={s['total_ms']:.0f}ms")
+            print(f"    {s['sql']};")
+    if not advice["missing"] and not advice["suggestions"]:
+        print("No suggestions.")
+
+
+def cmd_archive(args):
+    n = core.archive_cold_leads(months=args.months)
+    if n and core.backend_supports("matviews"):
+        core.refresh_dashboard_rollups()   # the queued background refresh dies with this process
+    print(f"Archived {n:,} lead(s) in {', '.join(core.ARCHIVE_STAGES)} with no activity for {args.months} months.")
+
+
+def cmd_refresh_rollups(args):
+    if not core.backend_supports("matviews"):
+        sys.exit(f"The {core.DB_BACKEND} backend has no rollup views.")
+    core.refresh_dashboard_rollups()
+    print(f"Rollups refreshed at {core.rollups_refreshed_at():%Y-%m-%d %H:%M:%S}.")
+
+
+def cmd_analytics_snapshot(args):
+    if not core.analytics_enabled():
+        sys.exit("Analytics is off (set ANALYTICS_ENGINE=duckdb).")
+    while True:
+        snap = core.refresh_analytics_snapshot(force=not args.every)
+        if snap:
+            print(f"Published snapshot {snap['id']} ({', '.join(snap['tables'])}) in {core.ANALYTICS_DIR}.")
+        elif not args.every:
+            sys.exit("Another process is building a snapshot; try again shortly.")
+        if not args.every:
+            return
+        time.sleep(args.every)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="manage.py", description="avaCRM maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="apply schema migrations and indexes").set_defaults(func=cmd_migrate)
+    sub.add_parser("migrations", help="show schema migration status").set_defaults(func=cmd_migrations)
+    sub.add_parser("indexes", help="show managed index status").set_defaults(func=cmd_indexes)
+    sub.add_parser("migrate-indexes", help="create missing indexes").set_defaults(func=cmd_migrate_indexes)
+    advise = sub.add_parser("advise", help="suggest indexes from pg_stat_statements or the slow query log")
+    advise.add_argument("--limit", type=int, default=100, help="queries to examine (default 100)")
+    advise.set_defaults(func=cmd_advise)
+    archive = sub.add_parser("archive", help="archive leads in ARCHIVE_STAGES with no recent activity")
+    archive.add_argument("--months", type=int, default=core.ARCHIVE_AFTER_MONTHS,
+                         help=f"months without activity (default {core.ARCHIVE_AFTER_MONTHS})")
+    archive.set_defaults(func=cmd_archive)
+    sub.add_parser("refresh-rollups", help="refresh the Dashboard rollup views").set_defaults(
+        func=cmd_refresh_rollups)
+    snapshot = sub.add_parser("analytics-snapshot", help="build and publish a new analytics snapshot")
+    snapshot.add_argument("--every", type=int, default=0, metavar="SECS",
+                          help="keep running, publishing a new snapshot when the tables have changed "
+                               "(run with ANALYTICS_REFRESH_IN_APP=0 on the app)")
+    snapshot.set_defaults(func=cmd_analytics_snapshot)
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Shared fixtures. Tests taking the `leads` fixture run once per storage
+backend: the embedded DuckDB database, which needs no server, and Postgres
+when AVACRM_TEST_POSTGRES holds a libpq DSN ("host=... dbname=... user=...").
+The Postgres leg connects through DB_CONFIG, as an install configured with
+DB_HOST/DB_NAME or secrets does, and drops and recreates the app's tables
+in that database — point it at a throwaway one.
+
+The backend is read from the environment when core is first imported,
+which is why the embedded defaults are set here, before any test module loads.
+"""
+import os
+import sys
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="avacrm_tests_")
+os.environ["DB_BACKEND"] = "duckdb"
+os.environ["EMBEDDED_DB_PATH"] = os.path.join(_TMP, "avacrm.duckdb")
+os.environ.pop("ANALYTICS_ENGINE", None)
+os.environ.pop("DATABASE_URL", None)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pytest
+from psycopg2.extensions import parse_dsn
+
+import core
+
+SEEDED_LEADS = 300   # more than one SEARCH_PAGE_SIZE page
+POSTGRES_DSN = os.environ.get("AVACRM_TEST_POSTGRES", "")
+
+# Everything the app creates, dropped before the Postgres leg seeds its data
+_APP_TABLES = ("properties", "properties_archive", "lead_activities", "audit_batches", "saved_searches",
+               "uploaded_lists", "rollup_refreshes", "slow_query_log", "schema_migrations")
+
+
+def _use_postgres():
+    dsn = parse_dsn(POSTGRES_DSN)
+    core.DATABASE_URL = ""
+    core.DB_CONFIG.update({
+        "host": dsn.get("host", "localhost"), "port": dsn.get("port", "5432"),
+        "dbname": dsn.get("dbname", "postgres"), "user": dsn.get("user", "postgres"),
+        "password": dsn.get("password", ""), "sslmode": dsn.get("sslmode", "disable"),
+    })
+    core.DB_BACKEND = "postgres"
+    conn = core.get_db_connection()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("DROP MATERIALIZED VIEW IF EXISTS lead_rollup, lead_stack_rollup")
+            cur.execute(f"DROP TABLE IF EXISTS {', '.join(_APP_TABLES)} CASCADE")
+            cur.execute(f"CREATE TABLE properties (id SERIAL PRIMARY KEY, {core.EMBEDDED_PROPERTIES_COLUMNS})")
+    finally:
+        conn.close()
+
+
+@pytest.fixture(scope="session", params=["duckdb", "postgres"])
+def leads(request):
+    """Apply migrations and seed the backend's database once; returns the lead count."""
+    saved = core.DB_BACKEND, core.DATABASE_URL, dict(core.DB_CONFIG)
+    if request.param == "postgres":
+        if not POSTGRES_DSN:
+            pytest.skip("set AVACRM_TEST_POSTGRES to run the Postgres leg")
+        _use_postgres()
+    core._schema_ready = False
+    core.bump_data_version()
+    core.ensure_schema()
+    core.bulk_insert_leads([
+        {"address": f"{i} Main St", "city": "Columbus", "state": "OH" if i % 2 else "MI",
+         "apn": f"APN-{i:04d}", "owner_name": f"Owner {i}", "source": "Test list"}
+        for i in range(SEEDED_LEADS)
+    ])
+    core.execute_query("UPDATE properties SET motivation_score = id % 10")
+    yield SEEDED_LEADS
+    core.DB_BACKEND, core.DATABASE_URL = saved[:2]
+    core.DB_CONFIG.update(saved[2])
+    core._schema_ready = False
+    core.bump_data_version()
+
+
+@pytest.fixture
+def embedded(monkeypatch, tmp_path):
+    """A fresh, empty embedded database for tests that build their own schema."""
+    monkeypatch.setattr(core, "DB_BACKEND", "duckdb")
+    monkeypatch.setattr(core, "EMBEDDED_DB_PATH", str(tmp_path / "fresh.duckdb"))
+    monkeypatch.setattr(core, "_embedded_db", None)
+    monkeypatch.setattr(core, "_schema_ready", False)
+    core.bump_data_version()
+    yield
+    if core._embedded_db is not None:
+        core._embedded_db.close()
+    core.bump_data_version()
+
+
+@pytest.fixture
+def scratch_leads(leads):
+    """Ids of a few extra leads in state ZZ, deleted (archived copies too) after the test."""
+    core.bulk_insert_leads([
+        {"address": f"{i} Scratch Rd", "city": "Toledo", "state": "ZZ", "source": "Scratch list"}
+        for i in range(12)
+    ])
+    rows = core.execute_query("SELECT id FROM properties WHERE state = 'ZZ' ORDER BY id", fetch=True)
+    yield [r["id"] for r in rows]
+    core.delete_properties("ZZ")
@@ -0,0 +1,56 @@
+"""Lead timelines and the audit trail batch actions leave."""
+import core
+
+
+def test_timeline_pages_newest_first(scratch_leads):
+    lead = scratch_leads[0]
+    for i in range(3):
+        core.add_lead_activity(lead, "note", f"Note {i}")
+    core.update_selection(core.lead_selection({}, ids=[lead]), stage="ZZ Hot")
+
+    rows, cursor, pages = [], None, 0
+    while True:
+        page, cursor = core.get_lead_timeline(lead, after=cursor, limit=2)
+        rows += page
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 2
+    assert [r["content"] for r in rows] == ["stage: ZZ Hot", "Note 2", "Note 1", "Note 0"]
+    assert [r["activity_type"] for r in rows] == ["batch_update", "note", "note", "note"]
+
+    batches, _ = core.get_lead_timeline(lead, types=["batch_update"])
+    assert [r["content"] for r in batches] == ["stage: ZZ Hot"]
+    assert core.get_lead_timeline(scratch_leads[1]) == ([], None)
+
+
+def _batches_after(batch_id):
+    return core.execute_query("SELECT id, action FROM audit_batches WHERE id > %s ORDER BY id",
+                              (batch_id,), fetch=True)
+
+
+def test_batch_actions_log_one_batch_and_one_activity_per_lead(scratch_leads):
+    kept, targets = scratch_leads[0], scratch_leads[1:]
+    selection = core.lead_selection({"selected_state": "ZZ"}, all_matching=True, excluded=[kept])
+    actions = [
+        ("batch_update", lambda: core.update_selection(selection, stage="ZZ Hot")),
+        ("tag_change", lambda: core.tag_selection(selection, ["zz-tag"])),
+        ("deleted", lambda: core.delete_selection(selection)),
+    ]
+    for action, run in actions:
+        before = core.execute_query("SELECT COALESCE(MAX(id), 0) AS id FROM audit_batches", fetch=True)[0]["id"]
+        assert run() == len(targets)
+        [batch] = _batches_after(before)
+        assert batch["action"] == action
+        logged = core.execute_query("SELECT property_id, activity_type FROM lead_activities WHERE batch_id = %s",
+                                    (batch["id"],), fetch=True)
+        assert sorted(r["property_id"] for r in logged) == targets
+        assert {r["activity_type"] for r in logged} == {action}
+
+    # The writes hit exactly the logged leads
+    archived = core.execute_query("SELECT id, stage, tags FROM properties_archive WHERE id = ANY(%s::bigint[])",
+                                  (scratch_leads,), fetch=True)
+    assert sorted(r["id"] for r in archived) == targets
+    assert all(r["stage"] == "ZZ Hot" and r["tags"] == "zz-tag" for r in archived)
+    kept_row = core.execute_query("SELECT stage, tags FROM properties WHERE id = %s", (kept,), fetch=True)[0]
+    assert kept_row["stage"] is None and kept_row["tags"] is None
@@ -0,0 +1,16 @@
+"""Dashboard page, driven through Streamlit's AppTest."""
+import os
+
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def test_unknown_clear_job_is_dropped_quietly(leads):
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["current_page"] = "Dashboard"
+    at.session_state["clear_job"] = "expired-job"   # e.g. started before a server restart
+    at.run()
+    assert not at.exception
+    assert "clear_job" not in at.session_state
+    assert not any("Cleared" in s.value for s in at.success)
@@ -0,0 +1,63 @@
+"""Compact result frames and the server-wide result store."""
+from collections import OrderedDict
+from decimal import Decimal
+
+import pandas as pd
+
+from views import frames
+
+
+def test_compact_frame_narrows_dtypes_without_changing_values():
+    df = pd.DataFrame({
+        "state": ["OH", "MI", "OH"],
+        "motivation_score": [3, None, 9],
+        "baths": [1.5, 2.0, None],
+        "est_value": [Decimal("125000.50"), Decimal("99000.00"), None],
+        "is_absentee": [True, False, None],
+        "owner_name": ["Ann", None, "Bo"],
+        "apn": ["A-1", 2, "A-3"],
+    })
+    out = frames.compact_frame(df)
+    assert isinstance(out["state"].dtype, pd.CategoricalDtype)
+    assert str(out["motivation_score"].dtype) == "Int8"
+    assert out["baths"].dtype == "float32"
+    assert out["est_value"].dtype == "float64"
+    assert str(out["is_absentee"].dtype) == "boolean"
+    assert isinstance(out["owner_name"].dtype, pd.StringDtype)
+    assert out["apn"].dtype == object                  # mixed values are left alone
+    assert out["state"].tolist() == ["OH", "MI", "OH"]
+    assert out["motivation_score"].tolist()[::2] == [3, 9]
+    assert out["est_value"].tolist()[0] == 125000.5
+    assert frames.frame_nbytes(out) < frames.frame_nbytes(df)
+
+
+def test_result_store_evicts_least_recently_used_sessions(monkeypatch):
+    monkeypatch.setattr(frames, "_store", OrderedDict())
+    monkeypatch.setattr(frames, "_store_bytes", 0)
+    frame = pd.DataFrame({"id": range(1000)})
+    size = frames.frame_nbytes(frame)
+    monkeypatch.setattr(frames, "RESULT_STORE_MAX_BYTES", size * 2)
+
+    def as_session(sid):
+        monkeypatch.setattr(frames, "_session_id", lambda: sid)
+
+    as_session("a")
+    frames.put_frame("results", frame)
+    as_session("b")
+    frames.put_frame("results", frame)
+    as_session("a")
+    assert frames.get_frame("results") is frame       # a is now the most recently used
+    as_session("c")
+    frames.put_frame("results", frame)
+    assert frames.store_stats()["total_bytes"] == size * 2
+    assert set(frames._store) == {"a", "c"}
+    as_session("b")
+    assert frames.get_frame("results") is None
+
+    # A session's own frames are never evicted to make room for themselves
+    as_session("d")
+    frames.put_frame("results", pd.DataFrame({"id": range(10000)}))
+    assert set(frames._store) == {"d"}
+    frames.drop_frame("results")
+    assert frames.store_stats() == {"session_bytes": 0, "total_bytes": 0, "sessions": 0,
+                                    "max_bytes": size * 2}
@@ -0,0 +1,43 @@
+"""Lead Engine page, driven through Streamlit's AppTest."""
+import os
+import sys
+
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _lead_engine():
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.session_state["current_page"] = "Lead Engine"
+    return at.run()
+
+
+def test_search_with_no_matches(leads):
+    at = _lead_engine()
+    at.text_input(key="apn_search").input("NO-SUCH-APN")
+    at.button(key="run_search_btn").click().run()
+    assert not at.exception
+    assert not at.error
+    assert any("No leads match" in i.value for i in at.info)
+    assert not any(b.key == "batch_update" for b in at.button)
+
+
+def test_search_shows_results(leads):
+    at = _lead_engine()
+    at.button(key="run_search_btn").click().run()
+    assert not at.exception
+    assert not at.error
+    assert any(c.value.startswith("Showing 1–") for c in at.caption)
+    assert any(b.key == "batch_update" for b in at.button)
+
+
+def test_export_over_the_download_limit_is_refused(leads, monkeypatch):
+    at = _lead_engine()
+    at.button(key="run_search_btn").click().run()
+    at.button(key="btn_sel_all").click().run()
+    at.button(key="batch_export").click().run()
+    monkeypatch.setattr(sys.modules["views.lead_engine"], "EXPORT_DOWNLOAD_MAX_MB", 0)
+    at.button(key="export_run").click().run()
+    assert not at.exception
+    assert any("over the 0 MB download limit" in w.value for w in at.warning)
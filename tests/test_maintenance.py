@@ -0,0 +1,140 @@
+"""Maintenance paths behind manage.py, and the write paths they rely on."""
+import time
+
+import core
+
+
+def test_slow_queries_are_shared_through_the_log_table(leads, monkeypatch):
+    monkeypatch.setattr(core, "SLOW_QUERY_MS", 0)
+    core.execute_query("SELECT COUNT(*) AS c FROM properties WHERE county = %s", ("Nowhere",), fetch=True)
+    core.execute_query("SELECT COUNT(*) AS c FROM properties WHERE county = %s", ("Elsewhere",), fetch=True)
+    assert core.flush_slow_queries() >= 1
+    logged = {q["query"]: q for q in core.slow_queries()}
+    assert logged["SELECT COUNT(*) AS c FROM properties WHERE county = %s"]["calls"] == 2
+
+
+def test_migrations_run_on_tuple_row_connections(embedded):
+    # Embedded connections, like psycopg2's from DB_CONFIG, return tuples
+    # unless a cursor asks for dict rows
+    applied = core.apply_migrations(log=lambda msg: None)
+    assert applied == [v for v, _, _, needs in core.SCHEMA_MIGRATIONS
+                       if not needs or core.backend_supports(needs)]
+    assert not [m for m in core.migration_status() if m["state"] == "pending"]
+    assert core.apply_migrations(log=lambda msg: None) == []
+
+
+def test_archive_column_sync_copies_new_columns(embedded, monkeypatch):
+    migrations = list(core.SCHEMA_MIGRATIONS)
+    monkeypatch.setattr(core, "SCHEMA_MIGRATIONS", [m for m in migrations if m[0] < 10])
+    core.apply_migrations(log=lambda msg: None)
+    core.execute_query("ALTER TABLE properties ADD COLUMN phone_list VARCHAR[]")
+    core.execute_query("ALTER TABLE properties ADD COLUMN offer_price DECIMAL(12, 3)")
+    monkeypatch.setattr(core, "SCHEMA_MIGRATIONS", migrations)
+    assert 10 in core.apply_migrations(log=lambda msg: None)
+
+    core.bulk_insert_leads([{"address": "1 Sync St", "city": "Columbus", "state": "OH"}])
+    lead_id = core.execute_query("SELECT MAX(id) AS id FROM properties", fetch=True)[0]["id"]
+    core.execute_query("UPDATE properties SET phone_list = ['555', '556'], offer_price = 1.234 WHERE id = %s",
+                       (lead_id,))
+    core.delete_selection(core.lead_selection({}, ids=[lead_id]))
+    core.restore_leads([lead_id])
+    row = core.execute_query("SELECT phone_list, offer_price FROM properties WHERE id = %s",
+                             (lead_id,), fetch=True)[0]
+    assert row["phone_list"] == ["555", "556"] and str(row["offer_price"]) == "1.234"
+
+
+def test_migrations_are_recorded_once(leads):
+    assert core.apply_migrations(log=lambda msg: None) == []
+    states = {m["version"]: m["state"] for m in core.migration_status()}
+    assert "pending" not in states.values() and states[1] == "applied"
+
+
+def test_writes_invalidate_cached_reads_of_their_tables(scratch_leads):
+    loads = []
+
+    def count_zz():
+        loads.append(1)
+        return core.execute_query("SELECT COUNT(*) AS n FROM properties WHERE state = 'ZZ'", fetch=True)[0]["n"]
+
+    assert core.cached_call("zz-count", count_zz, {"properties"}) == len(scratch_leads)
+    assert core.cached_call("zz-count", count_zz, {"properties"}) == len(scratch_leads)
+    assert len(loads) == 1
+    core.execute_query("DELETE FROM saved_searches WHERE name = %s", ("No such search",))
+    assert core.cached_call("zz-count", count_zz, {"properties"}) == len(scratch_leads)
+    assert len(loads) == 1
+    core.execute_query("DELETE FROM properties WHERE id = %s", (scratch_leads[0],))
+    assert core.cached_call("zz-count", count_zz, {"properties"}) == len(scratch_leads) - 1
+    assert len(loads) == 2
+
+
+def _wait_for(job_id):
+    deadline = time.monotonic() + 30
+    while core.delete_job_status(job_id)["state"] == "running" and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return core.delete_job_status(job_id)
+
+
+def test_state_clear_deletes_in_chunks(scratch_leads, monkeypatch):
+    monkeypatch.setattr(core, "DELETE_CHUNK_ROWS", 5)
+    core.delete_selection(core.lead_selection({}, ids=scratch_leads[:3]))
+    chunks = []
+    delete_chunk = core._delete_chunk
+    monkeypatch.setattr(core, "_delete_chunk", lambda *a: chunks.append(delete_chunk(*a)) or chunks[-1])
+
+    job = _wait_for(core.start_delete_job("ZZ"))
+    assert job["state"] == "done" and job["done"] == job["total"] == len(scratch_leads)
+    assert chunks == [5, 4, 0, 3, 0]   # live leads, then archived ones
+    assert core.count_properties("ZZ") == 0
+    assert core.count_properties() == core.count_properties("OH") + core.count_properties("MI")
+    remaining = core.execute_query("SELECT COUNT(*) AS n FROM lead_activities WHERE property_id = ANY(%s::bigint[])",
+                                   (scratch_leads,), fetch=True)
+    assert remaining[0]["n"] == 0
+    assert core.delete_job_status("no-such-job") == {}
+
+
+def test_full_clear_truncates_every_lead_table(embedded):
+    core.ensure_schema()
+    core.bulk_insert_leads([{"address": f"{i} Clear St", "city": "Akron", "state": "OH"} for i in range(4)])
+    ids = [r["id"] for r in core.execute_query("SELECT id FROM properties", fetch=True)]
+    core.delete_selection(core.lead_selection({}, ids=ids[:1]))
+
+    job = _wait_for(core.start_delete_job())
+    assert job["state"] == "done" and job["label"] == "all states" and job["done"] == 4
+    for table in core.CLEAR_TABLES:
+        assert core.execute_query(f"SELECT COUNT(*) AS n FROM {table}", fetch=True)[0]["n"] == 0
+
+
+def _activity_types(ids):
+    rows = core.execute_query("SELECT property_id, activity_type FROM lead_activities "
+                              "WHERE property_id = ANY(%s::bigint[]) ORDER BY id", (list(ids),), fetch=True)
+    out = {}
+    for r in rows:
+        out.setdefault(r["property_id"], []).append(r["activity_type"])
+    return out
+
+
+def test_cold_leads_archive_and_restore_round_trip(scratch_leads):
+    cold, active = scratch_leads[:5], scratch_leads[5]
+    core.execute_query("UPDATE properties SET stage = 'ZZ Cold', notes = 'keep me' WHERE id = ANY(%s::bigint[])",
+                       (cold + [active],))
+    core.add_lead_activity(active, "call", "Still talking")
+    batches = core.execute_query("SELECT COUNT(*) AS n FROM audit_batches", fetch=True)[0]["n"]
+
+    assert core.archive_cold_leads(months=1, stages=("ZZ Cold",), chunk=2) == len(cold)
+    assert core.execute_query("SELECT COUNT(*) AS n FROM audit_batches", fetch=True)[0]["n"] == batches + 3
+    live = {r["id"] for r in core.execute_query("SELECT id FROM properties WHERE state = 'ZZ'", fetch=True)}
+    assert active in live and not live & set(cold)
+    assert set(cold) <= {r["id"] for r in core.list_archived("archived")}
+    assert core.count_archived().get("archived", 0) >= len(cold)
+    # Nothing left to archive: no leads moved and no empty audit batch
+    assert core.archive_cold_leads(months=1, stages=("ZZ Cold",), chunk=2) == 0
+    assert core.execute_query("SELECT COUNT(*) AS n FROM audit_batches", fetch=True)[0]["n"] == batches + 3
+
+    assert core.restore_leads(cold) == len(cold)
+    rows = core.execute_query("SELECT id, stage, notes, street_address FROM properties WHERE id = ANY(%s::bigint[])",
+                              (cold,), fetch=True)
+    assert {r["id"] for r in rows} == set(cold)
+    assert all(r["stage"] == "ZZ Cold" and r["notes"] == "keep me" and r["street_address"].endswith("Scratch Rd")
+               for r in rows)
+    assert not set(cold) & {r["id"] for r in core.list_archived()}
+    assert all(types == ["archived", "restored"] for types in _activity_types(cold).values())
@@ -0,0 +1,125 @@
+"""Lead search and keyset paging."""
+import csv
+from decimal import Decimal
+
+import pytest
+
+import core
+
+
+def test_lead_search_needs_three_characters(leads):
+    assert core.search_leads("Ma") == []
+    assert "7 Main St" in {r["street_address"] for r in core.search_leads("7 Main", limit=50)}
+
+
+def test_lead_search_by_id_allows_short_terms(leads):
+    lead_id = core.execute_query("SELECT MIN(id) AS id FROM properties", fetch=True)[0]["id"]
+    assert lead_id in {r["id"] for r in core.search_leads(str(lead_id))}
+
+
+def _all_pages(spec, limit):
+    rows, cursor, pages = [], None, 0
+    while True:
+        page, cursor = core.fetch_lead_page(spec, cursor, limit=limit)
+        rows += page
+        pages += 1
+        if cursor is None:
+            return rows, pages
+
+
+def test_keyset_pages_cover_every_lead_once_in_order(leads):
+    rows, pages = _all_pages({}, limit=40)
+    ids = [r["id"] for r in rows]
+    assert len(ids) == len(set(ids)) == leads
+    assert pages == -(-leads // 40)
+    # The database's own ordering (its collation decides the address order)
+    query, params = core.build_lead_search({})
+    assert ids == [r["id"] for r in core.execute_query(query, params, fetch=True)]
+
+
+def test_keyset_page_seeks_the_order_index(leads):
+    if not core.backend_supports("index_migrations"):
+        pytest.skip("index migrations are Postgres-only")
+    core.apply_index_migrations(log=lambda msg: None)
+    _, cursor = core.fetch_lead_page({}, limit=40)
+    parts = core.lead_search_parts({})
+    keys = ", ".join(expr for expr, _ in core._search_sort_keys({}))
+    conn = core.get_db_connection()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("SET LOCAL enable_seqscan = off")
+            cur.execute(f"EXPLAIN SELECT p.id FROM {parts['from']} WHERE ({keys}) > (%s, %s, %s) "
+                        f"ORDER BY {', '.join(parts['order'])} LIMIT 41", cursor)
+            plan = "\n".join(r[0] for r in cur.fetchall())
+    finally:
+        conn.close()
+    assert "idx_properties_search_keyset" in plan and "Index Cond" in plan
+    assert "Sort" not in plan
+
+
+def test_filtered_pages_match_the_summary(leads):
+    spec = {"selected_state": "OH", "filter_by_distress": True, "min_distress": 5}
+    rows, _ = _all_pages(spec, limit=25)
+    assert rows and all(r["state"] == "OH" and r["motivation_score"] >= 5 for r in rows)
+    assert core.get_search_summary(spec)["total"] == len(rows)
+
+
+def test_page_projection_keeps_the_cursor_columns(leads):
+    page, cursor = core.fetch_lead_page({}, limit=10, fields=("id", "city"))
+    assert len(page) == 10 and cursor is not None
+    assert set(page[0]) == {"id", "city", "motivation_score", "street_address"}
+    following, _ = core.fetch_lead_page({}, cursor, limit=10, fields=("id", "city"))
+    assert not {r["id"] for r in page} & {r["id"] for r in following}
+
+
+def test_all_matching_selection_with_exclusions(leads):
+    spec = {"selected_state": "MI"}
+    first, _ = core.fetch_lead_page(spec, limit=3)
+    excluded = [r["id"] for r in first]
+    selection = core.lead_selection(spec, all_matching=True, excluded=excluded)
+    total = core.get_search_summary(spec)["total"]
+    assert core.count_selection(selection) == total - 3
+    assert not set(core.selection_ids(selection)) & set(excluded)
+
+
+def test_csv_export_without_copy(leads, tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "EXPORT_DIR", str(tmp_path))
+    path = core.export_search_csv({"selected_state": "OH"}, fields=("id", "state"))
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == core.get_search_summary({"selected_state": "OH"})["total"]
+    assert {r["state"] for r in rows} == {"OH"}
+
+
+def test_parquet_export_projects_the_requested_columns(leads, tmp_path):
+    import pyarrow.parquet as pq
+    selection = core.lead_selection({"selected_state": "MI"}, all_matching=True)
+    out = core.export_parquet(str(tmp_path / "leads"), selection=selection, fields=["city", "state"],
+                              columns=core.get_app_bootstrap()["cols"])
+    table = pq.read_table(out["path"])
+    assert table.column_names == ["id", "city", "state"]
+    assert table.num_rows == out["rows"] == core.count_selection(selection)
+
+
+def test_parquet_export_keeps_money_exact(scratch_leads, tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    core.execute_query("UPDATE properties SET est_value = 123456.78, baths = 2.5 WHERE id = %s",
+                       (scratch_leads[0],))
+    selection = core.lead_selection({}, ids=scratch_leads[:1])
+    out = core.export_parquet(str(tmp_path / "leads"), selection=selection, fields=["est_value", "baths"],
+                              columns=core.get_app_bootstrap()["cols"])
+    table = pq.read_table(out["path"])
+    assert table.schema.field("est_value").type == pa.decimal128(14, 2)
+    assert table.schema.field("baths").type == pa.float64()
+    assert table.column("est_value").to_pylist() == [Decimal("123456.78")]
+    assert core._arrow_type(pa, "numeric") == pa.float64()
+
+
+def test_stage_and_tag_lists_leave_out_lazy_columns(scratch_leads):
+    core.execute_query("UPDATE properties SET stage = 'ZZ Stage', tags = 'zz-list', notes = 'long notes' "
+                       "WHERE id = ANY(%s::bigint[])", (scratch_leads[:2],))
+    for rows in (core.get_leads_by_stage("ZZ Stage"), core.get_leads_by_tag("ZZ-List")):
+        assert sorted(r["id"] for r in rows) == scratch_leads[:2]
+        assert "street_address" in rows[0] and not set(core.LAZY_COLUMNS) & set(rows[0])
+    assert set(core.get_leads_by_stage("ZZ Stage", ["city"])[0]) == {"id", "city"}
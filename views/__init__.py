@@ -0,0 +1,77 @@
+"""
+Page bodies for app.py. Each page lives in its own module exposing render(ctx)
+and is imported the first time that page is shown, so a rerun only executes
+the active page.
+"""
+import importlib
+import threading
+import time
+
+import streamlit as st
+
+# (page key, nav label, module)
+PAGES = [
+    ("Dashboard",   "📈 Dashboard",   "dashboard"),
+    ("Lead Engine", "🔍 Lead Engine", "lead_engine"),
+    ("Pipeline",    "📊 Pipeline",    "pipeline"),
+    ("Import",      "📥 Import",      "importer"),
+    ("My Files",    "📁 My Files",    "my_files"),
+    ("Tags",        "🏷 Tags",        "tags"),
+]
+_MODULES = {key: module for key, _, module in PAGES}
+
+# page -> {"runs", "total_ms", "last_ms", "max_ms"}, shared by every session
+_timings = {}
+_timings_lock = threading.Lock()
+
+
+def fragment(func=None, *, run_every=None):
+    """
+    Rerun func on its own when its widgets change (st.fragment, Streamlit >= 1.33);
+    a plain call otherwise. With run_every (seconds) it also reruns on that timer
+    for as long as it is on the page. Use as @fragment or @fragment(run_every=1).
+    """
+    if func is None:
+        return lambda f: fragment(f, run_every=run_every)
+    deco = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    if not deco:
+        return func
+    return deco(func, run_every=run_every) if run_every else deco(func)
+
+
+def rerun_fragment():
+    """
+    Rerun just the enclosing fragment (Streamlit >= 1.37, during a fragment rerun);
+    the whole app otherwise.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except (TypeError, st.errors.StreamlitAPIException):
+        st.rerun()
+
+
+def record_timing(name, seconds):
+    ms = seconds * 1000
+    with _timings_lock:
+        t = _timings.setdefault(name, {"runs": 0, "total_ms": 0.0, "last_ms": 0.0, "max_ms": 0.0})
+        t["runs"] += 1
+        t["total_ms"] += ms
+        t["last_ms"] = ms
+        t["max_ms"] = max(t["max_ms"], ms)
+
+
+def render_timings():
+    """Per-page render times in ms: [{"page", "runs", "last_ms", "avg_ms", "max_ms"}]."""
+    with _timings_lock:
+        return [
+            {"page": name, "runs": t["runs"], "last_ms": round(t["last_ms"], 1),
+             "avg_ms": round(t["total_ms"] / t["runs"], 1), "max_ms": round(t["max_ms"], 1)}
+            for name, t in sorted(_timings.items())
+        ]
+
+
+def render_page(page_key, ctx):
+    """Import (once per process) and render the page, recording how long it took."""
+    start = time.perf_counter()
+    importlib.import_module(f"views.{_MODULES[page_key]}").render(ctx)
+    record_timing(page_key, time.perf_counter() - start)
@@ -0,0 +1,58 @@
+"""
+Notes & activity panel for one lead: its long text fields, a type-filtered
+activity timeline loaded a page at a time, and a form to log a new activity.
+"""
+import streamlit as st
+
+from core import (
+    add_lead_activity,
+    get_lead_details,
+    get_lead_timeline,
+    ACTIVITY_TYPES,
+    AUDIT_ACTIVITY_TYPES,
+    LAZY_COLUMNS,
+)
+from views import rerun_fragment
+
+
+def lead_activity_panel(lead_id, key):
+    """Render the panel for lead_id; key prefixes its widget and session-state keys."""
+    details = get_lead_details(lead_id)
+    for col in LAZY_COLUMNS:
+        if details.get(col):
+            st.markdown(f"**{col.replace('_', ' ').title()}**")
+            st.text(details[col])
+
+    types = st.multiselect("Show", list(ACTIVITY_TYPES + AUDIT_ACTIVITY_TYPES), placeholder="All activity types", key=f"{key}_types")
+    rows, next_cursor = get_lead_timeline(lead_id, types=types)
+    # Older pages the user asked for; dropped when the lead or the filter changes
+    view = (lead_id, tuple(types))
+    state_key = f"{key}_older"
+    older = st.session_state.get(state_key)
+    if older is None or older["view"] != view:
+        older = st.session_state[state_key] = {"view": view, "rows": [], "next": None}
+    if older["rows"]:
+        seen = {a["id"] for a in rows}
+        rows = rows + [a for a in older["rows"] if a["id"] not in seen]
+        next_cursor = older["next"]
+
+    for a in rows:
+        st.markdown(f"**{a.get('activity_type','note')}** — {a.get('created_at')}")
+        if a.get("content"): st.text(a["content"])
+        st.caption("---")
+    if not rows:
+        st.info("No activity yet.")
+    if next_cursor and st.button("Show older", key=f"{key}_older_btn"):
+        page, older["next"] = get_lead_timeline(lead_id, types=types, after=next_cursor)
+        older["rows"] += page
+        rerun_fragment()
+
+    with st.form(f"{key}_add_activity", clear_on_submit=True):
+        act_type = st.selectbox("Type", list(ACTIVITY_TYPES))
+        content  = st.text_area("Content")
+        if st.form_submit_button("Add", type="primary"):
+            if content.strip():
+                add_lead_activity(lead_id, act_type, content.strip())
+                st.success("Added."); st.rerun()
+            else:
+                st.warning("Enter some content.")
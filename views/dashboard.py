@@ -0,0 +1,275 @@
+"""Dashboard page."""
+import streamlit as st
+import pandas as pd
+try:
+    import plotly.express as px
+    HAS_PLOTLY = True
+except ImportError:
+    HAS_PLOTLY = False
+from core import (
+    get_dashboard_stats,
+    list_uploaded_lists,
+    count_properties,
+    start_delete_job,
+    delete_job_status,
+    cancel_delete_job,
+    count_archived,
+    list_archived,
+    archive_cold_leads,
+    restore_leads,
+    ARCHIVE_STAGES,
+    ARCHIVE_AFTER_MONTHS,
+)
+from views import fragment, rerun_fragment
+
+
+@fragment
+def _data_management(all_states):
+    """Clear-data expander; changing its scope only reruns this fragment."""
+    with st.expander("⚙️ Data Management", expanded=False):
+        if "clear_result" in st.session_state:
+            st.success(st.session_state.pop("clear_result"))
+        clear_scope = st.selectbox("Scope", ["All states"] + sorted(all_states), key="clear_scope")
+        state_to_clear = None if clear_scope == "All states" else clear_scope
+        count_c = 0
+        try:
+            count_c = count_properties(state_to_clear)
+        except Exception:
+            pass
+        st.caption(f"{count_c:,} properties in scope")
+        if st.button("🗑 Clear data", type="secondary", key="clear_data_btn"):
+            # Kept in a dict: None (all states) is a valid scope
+            st.session_state["clear_confirm"] = {"state": state_to_clear}
+            rerun_fragment()
+        if "clear_confirm" in st.session_state:
+            confirm_state = st.session_state["clear_confirm"]["state"]
+            label_text = "all states" if confirm_state is None else confirm_state
+            st.warning(f"Delete {count_properties(confirm_state):,} ({label_text}), and any archived leads in scope?")
+            c1, c2 = st.columns(2)
+            with c1:
+                if st.button("Yes", key="clear_yes"):
+                    st.session_state.pop("clear_confirm", None)
+                    st.session_state["clear_job"] = start_delete_job(confirm_state)
+                    st.rerun()   # swaps this panel for _clear_progress
+            with c2:
+                if st.button("No", key="clear_no"):
+                    st.session_state.pop("clear_confirm", None)
+                    rerun_fragment()
+
+
+@fragment(run_every=1)
+def _clear_progress():
+    """
+    Progress of the session's clear job, in place of _data_management while it
+    runs. Rerenders once a second; the full rerun at the end drops it from the page.
+    """
+    job_id = st.session_state.get("clear_job")
+    job = delete_job_status(job_id) if job_id else {}
+    if job.get("state") == "running":
+        with st.expander("⚙️ Data Management", expanded=True):
+            total = job["total"] or 0
+            st.progress(min(job["done"] / total, 1.0) if total else 0.0,
+                        text=f"Deleting {job['label']}: {job['done']:,} of {total:,}")
+            if st.button("Stop", key="clear_cancel"):
+                cancel_delete_job(job_id)
+        return
+    st.session_state.pop("clear_job", None)
+    if not job:
+        pass   # unknown id (the server restarted since it was started): nothing to report
+    elif job["state"] == "failed":
+        st.session_state["clear_result"] = f"Clear failed after {job['done']:,} leads: {job['error']}"
+    else:
+        verb = "Stopped after deleting" if job["state"] == "cancelled" else "Cleared"
+        st.session_state["clear_result"] = f"{verb} {job['done']:,} leads ({job['label']})."
+    st.rerun()
+
+
+@fragment
+def _archive_panel():
+    """Archived and deleted leads with restore; acting here only reruns this fragment."""
+    with st.expander("🗄 Archive", expanded=False):
+        counts = count_archived()
+        st.caption(f"{counts.get('deleted', 0):,} deleted · {counts.get('archived', 0):,} archived "
+                   f"({', '.join(ARCHIVE_STAGES)} with no activity for {ARCHIVE_AFTER_MONTHS} months)")
+        if "archive_result" in st.session_state:
+            st.success(st.session_state.pop("archive_result"))
+        if st.button("Archive cold leads now", key="archive_run"):
+            with st.spinner("Archiving..."):
+                n = archive_cold_leads()
+            st.session_state["archive_result"] = f"Archived {n:,} leads."
+            st.rerun()
+        reason = st.radio("Show", ["All", "Deleted", "Archived"], horizontal=True, key="archive_reason")
+        rows = list_archived(None if reason == "All" else reason.lower())
+        if not rows:
+            st.info("Nothing archived.")
+            return
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        labels = {f"{r['id']} — {r.get('street_address') or '?'}, {r.get('city') or '?'}": r["id"] for r in rows}
+        picked = st.multiselect("Restore leads", list(labels), key="archive_restore_pick")
+        if picked and st.button(f"↩ Restore {len(picked)} lead(s)", type="primary", key="archive_restore_btn"):
+            n = restore_leads([labels[p] for p in picked])
+            st.session_state.pop("archive_restore_pick", None)
+            st.session_state["archive_result"] = f"Restored {n:,} leads."
+            st.rerun()
+
+
+def render(ctx):
+    if st.session_state.get("clear_job"):
+        _clear_progress()
+    else:
+        _data_management(ctx["all_states"])
+    _archive_panel()
+
+    st.markdown('<div class="page-title">Dashboard</div>', unsafe_allow_html=True)
+    st.markdown('<div class="page-sub">Live overview of your lead database and pipeline activity.</div>', unsafe_allow_html=True)
+
+    try:
+        stats    = get_dashboard_stats()
+        total    = stats["total"]
+        by_state = stats["by_state"]
+        by_stage = stats["by_stage"]
+
+        stage_map = {r["stage"]: r["cnt"] for r in by_stage} if by_stage else {}
+        total_pipeline = sum(stage_map.values())
+
+        # ── KPI row ──
+        k1, k2, k3, k4, k5 = st.columns(5)
+        def kpi(col, label, value, delta=None, down=False):
+            delta_html = ""
+            if delta:
+                cls = "down" if down else ""
+                delta_html = f'<div class="delta {cls}">{delta}</div>'
+            col.markdown(f"""
+            <div class="metric-tile">
+                <div class="label">{label}</div>
+                <div class="value">{value}</div>
+                {delta_html}
+            </div>""", unsafe_allow_html=True)
+
+        kpi(k1, "Total Leads",      f"{total:,}")
+        kpi(k2, "States",           str(len(by_state)) if by_state else "0")
+        kpi(k3, "In Pipeline",      f"{total_pipeline:,}")
+        kpi(k4, "Closed",           f"{stage_map.get('Closed', 0):,}", delta="✓ Won")
+        kpi(k5, "Motivation Score", "—")
+        if stats.get("as_of"):
+            st.caption(f"Counts as of {stats['as_of']:%b %d, %H:%M:%S} — recent changes can take a few seconds to appear.")
+
+        st.markdown("<div style='margin-top:1.5rem;'></div>", unsafe_allow_html=True)
+
+        # ── Pipeline summary bar ──
+        st.markdown('<div class="section-title">Pipeline Overview</div>', unsafe_allow_html=True)
+        PIPELINE_STAGES = ["New", "Contacted", "Negotiating", "Closed", "Lost", "Unset"]
+        STAGE_COLORS    = {
+            "New": "#3498db", "Contacted": "#9b59b6", "Negotiating": "#f39c12",
+            "Closed": "#27ae60", "Lost": "#e74c3c", "Unset": "#95a5a6",
+        }
+        STAGE_CSS = {
+            "New": "stage-new", "Contacted": "stage-contacted", "Negotiating": "stage-negotiating",
+            "Closed": "stage-closed", "Lost": "stage-lost", "Unset": "stage-unset",
+        }
+        pcols = st.columns(len(PIPELINE_STAGES))
+        for i, s in enumerate(PIPELINE_STAGES):
+            cnt = stage_map.get(s, 0)
+            css = STAGE_CSS.get(s, "stage-unset")
+            pcols[i].markdown(f"""
+            <div class="pipeline-col">
+                <div class="pipeline-header {css}">{s}</div>
+                <div class="pipeline-count">{cnt:,}</div>
+                <div class="pipeline-sub">leads</div>
+            </div>""", unsafe_allow_html=True)
+
+        st.markdown("<div style='margin-top:1.5rem;'></div>", unsafe_allow_html=True)
+
+        # ── Charts row ──
+        ch1, ch2 = st.columns(2)
+        with ch1:
+            st.markdown('<div class="section-title">Leads by State</div>', unsafe_allow_html=True)
+            if by_state:
+                df_s = pd.DataFrame(by_state).rename(columns={"state": "State", "cnt": "Leads"})
+                if HAS_PLOTLY:
+                    fig = px.bar(df_s, x="State", y="Leads", height=220,
+                                 color="Leads", color_continuous_scale="Blues",
+                                 template="plotly_dark")
+                    fig.update_layout(margin=dict(l=0,r=0,t=0,b=0), showlegend=False,
+                                      coloraxis_showscale=False,
+                                      paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.dataframe(df_s, use_container_width=True, hide_index=True)
+            else:
+                st.info("No state data yet — import a list to populate.")
+        with ch2:
+            st.markdown('<div class="section-title">Pipeline Distribution</div>', unsafe_allow_html=True)
+            if by_stage:
+                df_p = pd.DataFrame(by_stage).rename(columns={"stage": "Stage", "cnt": "Leads"})
+                STAGE_COLORS = {"New":"#58a6ff","Contacted":"#bc8cff","Negotiating":"#e3b341",
+                                 "Closed":"#3fb950","Lost":"#f85149","Unset":"#484f58"}
+                df_p["Color"] = df_p["Stage"].map(lambda s: STAGE_COLORS.get(s, "#8b949e"))
+                if HAS_PLOTLY:
+                    fig2 = px.bar(df_p, x="Stage", y="Leads", height=220,
+                                  color="Stage",
+                                  color_discrete_map=STAGE_COLORS,
+                                  template="plotly_dark")
+                    fig2.update_layout(margin=dict(l=0,r=0,t=0,b=0), showlegend=False,
+                                       paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+                    st.plotly_chart(fig2, use_container_width=True)
+                else:
+                    st.dataframe(df_p[["Stage","Leads"]], use_container_width=True, hide_index=True)
+            else:
+                st.info("No pipeline stages set yet.")
+
+        st.markdown("<div style='margin-top:1.5rem;'></div>", unsafe_allow_html=True)
+
+        # ── Recent uploads ──
+        st.markdown('<div class="section-title">Recent Imports</div>', unsafe_allow_html=True)
+        try:
+            files = list_uploaded_lists()
+            if files:
+                file_df = pd.DataFrame(files[:10])[["name", "filename", "uploaded_at", "status", "lead_count"]]
+                file_df.columns = ["List Name", "File", "Uploaded", "Status", "Leads"]
+                st.dataframe(file_df, use_container_width=True, hide_index=True)
+            else:
+                st.info("No imports yet. Go to **Import** to upload your first list.")
+        except Exception:
+            st.info("No import history available.")
+
+    except Exception as e:
+        st.error(str(e))
+        st.exception(e)
+
+    # ── Distress Score Distribution + Stacking ── (outside try block)
+    st.markdown("<div style='margin-top:1.5rem;'></div>", unsafe_allow_html=True)
+    d1, d2 = st.columns([3, 1])
+    with d1:
+        st.markdown('<div class="section-title">🎯 Distress Score Distribution</div>', unsafe_allow_html=True)
+        try:
+            score_dist = stats["score_dist"]
+            if score_dist:
+                df_sc = pd.DataFrame(score_dist).rename(columns={"score": "Score", "count": "Leads"})
+                df_sc["Score"] = df_sc["Score"].astype(int)
+                df_sc = df_sc.sort_values("Score")
+                if HAS_PLOTLY:
+                    fig3 = px.bar(df_sc, x="Score", y="Leads", height=180,
+                                  color="Score",
+                                  color_continuous_scale=[[0,"#3fb950"],[0.5,"#e3b341"],[1,"#f85149"]],
+                                  template="plotly_dark")
+                    fig3.update_layout(margin=dict(l=0,r=0,t=0,b=0), showlegend=False,
+                                       coloraxis_showscale=False,
+                                       paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+                    st.plotly_chart(fig3, use_container_width=True)
+                else:
+                    st.dataframe(df_sc, use_container_width=True, hide_index=True)
+            else:
+                st.info("Go to Lead Engine → Distress Score → Recalculate All Scores to populate.")
+        except Exception:
+            st.info("No score data yet.")
+    with d2:
+        st.markdown('<div class="section-title">🔥 List Stacking</div>', unsafe_allow_html=True)
+        try:
+            st.markdown(f'''<div class="metric-tile">
+                <div class="label">Stacked Leads</div>
+                <div class="value" style="color:#f85149;">{stats["stacked"]:,}</div>
+                <div class="delta">appear on 2+ lists</div>
+            </div>''', unsafe_allow_html=True)
+        except Exception:
+            pass
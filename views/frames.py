@@ -0,0 +1,156 @@
+"""
+Compact DataFrames for search results, and a server-wide store that holds
+them for every session under one memory cap.
+"""
+import os
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+
+import pandas as pd
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:     # very old Streamlit
+    get_script_run_ctx = None
+
+# ----------------------------------------------------------------
+# Compact dtypes
+# ----------------------------------------------------------------
+CATEGORY_COLUMNS = {
+    "state", "property_state", "city", "county", "stage", "property_type",
+    "owner_type", "occupancy_status", "last_list_source", "mailing_state",
+}
+SMALL_INT_COLUMNS = {"beds", "stories", "motivation_score", "units_count", "fireplaces"}
+FLOAT32_COLUMNS = {"baths", "est_equity_pct", "lot_acres"}   # money stays float64
+
+try:
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    STRING_DTYPE = pd.StringDtype()
+
+
+def _is_numeric_object(s):
+    sample = s.dropna()
+    return len(sample) > 0 and sample.map(lambda v: isinstance(v, (int, float, Decimal))
+                                          and not isinstance(v, bool)).all()
+
+
+def _is_bool_object(s):
+    sample = s.dropna()
+    return len(sample) > 0 and sample.map(lambda v: isinstance(v, bool)).all()
+
+
+def _small_int_dtype(s):
+    """Narrowest nullable int holding s; raises ValueError for fractional values."""
+    vals = s.dropna()
+    if not vals.mod(1).eq(0).all():
+        raise ValueError("fractional")
+    lo, hi = (vals.min(), vals.max()) if len(vals) else (0, 0)
+    for dtype, bound in (("Int8", 2 ** 7), ("Int16", 2 ** 15), ("Int32", 2 ** 31)):
+        if -bound <= lo and hi < bound:
+            return dtype
+    return "Int64"
+
+
+def compact_frame(df):
+    """
+    Re-type a result page for a small footprint: categoricals for low-cardinality
+    labels, nullable small ints, float32 where precision allows and Arrow-backed
+    strings. Values are unchanged; columns that don't fit a rule are left alone.
+    """
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        try:
+            if s.dtype == object and _is_bool_object(s):
+                s = s.astype("boolean")
+            elif s.dtype == object and _is_numeric_object(s):
+                s = pd.to_numeric(s, errors="coerce")
+
+            if c in CATEGORY_COLUMNS and not pd.api.types.is_numeric_dtype(s):
+                s = s.astype("category")
+            elif c in SMALL_INT_COLUMNS and pd.api.types.is_numeric_dtype(s):
+                s = s.astype(_small_int_dtype(s))
+            elif c in FLOAT32_COLUMNS and pd.api.types.is_numeric_dtype(s):
+                s = s.astype("float32")
+            elif s.dtype == object or pd.api.types.is_string_dtype(s):
+                if s.dropna().map(lambda v: isinstance(v, str)).all():
+                    s = s.astype(STRING_DTYPE)
+        except (TypeError, ValueError):
+            s = df[c]
+        out[c] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def frame_nbytes(df) -> int:
+    return int(df.memory_usage(deep=True).sum()) if df is not None else 0
+
+
+# ----------------------------------------------------------------
+# Server-wide result store — frames live here rather than in session
+# state so one cap covers every session. When the total passes the cap
+# the least recently used sessions lose their frames and refetch on
+# their next run.
+# ----------------------------------------------------------------
+RESULT_STORE_MAX_BYTES = int(os.environ.get("RESULT_STORE_MAX_MB", "256")) * 2 ** 20
+
+_store = OrderedDict()   # session id -> {name: (frame, nbytes)}
+_store_bytes = 0
+_store_lock = threading.Lock()
+
+
+def _session_id():
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    return ctx.session_id if ctx is not None else "local"
+
+
+def put_frame(name, df):
+    """Keep df for this session under name, evicting other sessions' frames if over the cap."""
+    global _store_bytes
+    sid, size = _session_id(), frame_nbytes(df)
+    with _store_lock:
+        frames = _store.setdefault(sid, {})
+        _store_bytes -= frames.get(name, (None, 0))[1]
+        frames[name] = (df, size)
+        _store_bytes += size
+        _store.move_to_end(sid)
+        while _store_bytes > RESULT_STORE_MAX_BYTES and next(iter(_store)) != sid:
+            _, evicted = _store.popitem(last=False)
+            _store_bytes -= sum(n for _, n in evicted.values())
+
+
+def get_frame(name):
+    """This session's frame for name, or None if it was never stored or has been evicted."""
+    sid = _session_id()
+    with _store_lock:
+        hit = _store.get(sid, {}).get(name)
+        if hit is None:
+            return None
+        _store.move_to_end(sid)
+        return hit[0]
+
+
+def drop_frame(*names):
+    global _store_bytes
+    sid = _session_id()
+    with _store_lock:
+        frames = _store.get(sid)
+        if not frames:
+            return
+        for name in names:
+            _store_bytes -= frames.pop(name, (None, 0))[1]
+        if not frames:
+            del _store[sid]
+
+
+def store_stats() -> dict:
+    """{"session_bytes", "total_bytes", "sessions", "max_bytes"} for the result store."""
+    sid = _session_id()
+    with _store_lock:
+        return {
+            "session_bytes": sum(n for _, n in _store.get(sid, {}).values()),
+            "total_bytes": _store_bytes,
+            "sessions": len(_store),
+            "max_bytes": RESULT_STORE_MAX_BYTES,
+        }
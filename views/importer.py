@@ -0,0 +1,522 @@
+"""Import page."""
+import streamlit as st
+import pandas as pd
+from core import (
+    execute_query,
+    stack_lead,
+    bulk_insert_leads,
+    add_uploaded_list,
+    search_leads,
+)
+
+
+def _norm(s):
+    if s is None or pd.isna(s):
+        return ""
+    return " ".join(str(s).strip().lower().replace("_", " ").replace("-", " ").split())
+
+DEFAULT_IMPORT_MAP = {
+    "property_address":    ["property address","address","street address","prop address","situs address","street"],
+    "property_city":       ["property city","city","prop city","property city name"],
+    "property_state":      ["property state","state","prop state","st","property sta"],
+    "property_zip":        ["property zip","zip","zip code","zipcode","prop zip"],
+    "property_county":     ["property county","county","prop county"],
+    "first_name":          ["first name","firstname","first_name","owner first","owner first name","owner 1 first name","fname"],
+    "last_name":           ["last name","lastname","last_name","owner last","owner last name","owner 1 last name","lname"],
+    "owner_2_first_name":  ["owner 2 first name","owner2 first name","owner 2 first"],
+    "owner_2_last_name":   ["owner 2 last name","owner2 last name","owner 2 last"],
+    "owner_3_first_name":  ["owner 3 first name","owner3 first name"],
+    "owner_3_last_name":   ["owner 3 last name","owner3 last name"],
+    "owner_4_first_name":  ["owner 4 first name","owner4 first name"],
+    "owner_4_last_name":   ["owner 4 last name","owner4 last name"],
+    "mailing_address":     ["mailing address","mail address","owner address","owner mailing address"],
+    "mailing_city":        ["mailing city","mail city","owner mailing city"],
+    "mailing_state":       ["mailing state","mail state","owner mailing state"],
+    "mailing_zip":         ["mailing zip","mail zip","owner mailing zip"],
+    "phone_1":             ["phone 1","phone","cell","mobile","telephone","primary phone","owner phone"],
+    "phone_2":             ["phone 2","secondary phone","alt phone"],
+    "phone_3":             ["phone 3"],
+    "phone_4":             ["phone 4"],
+    "apn":                 ["apn","parcel","parcel id","parcel number"],
+    "property_type":       ["property type","type","prop type"],
+    "property_use":        ["property use","use","prop use"],
+    "land_use":            ["land use","land use code"],
+    "subdivision":         ["subdivision","sub","subdivision name"],
+    "legal_description":   ["legal description","legal desc","legal"],
+    "living_sqft":         ["living square feet","living sqft","living sq ft","sqft","square feet","living area"],
+    "lot_acres":           ["lot acres","acres","lot size acres"],
+    "lot_sqft":            ["lot square feet","lot sqft","lot sq ft","lot size"],
+    "year_built":          ["year built","built","year","construction year"],
+    "stories":             ["stories","# of stories","number of stories","floors"],
+    "units_count":         ["units count","units","number of units","# of units"],
+    "beds":                ["beds","bedrooms","bed","br"],
+    "baths":               ["baths","bathrooms","bath","ba"],
+    "fireplaces":          ["fireplaces","# of fireplaces"],
+    "ac_type":             ["air conditioning type","ac type","air conditioning","ac","cooling type"],
+    "heating_type":        ["heating type","heating","heat type"],
+    "garage_type":         ["garage type","garage"],
+    "garage_sqft":         ["garage square feet","garage sqft","garage sq ft"],
+    "carport":             ["carport","has carport"],
+    "carport_area":        ["carport area","carport sqft"],
+    "ownership_length_months": ["ownership length months","ownership length","months owned"],
+    "owner_type":          ["owner type","owner type code"],
+    "owner_occupied":      ["owner occupied","owner occ","occupied"],
+    "vacant":              ["vacant","is vacant","vacancy"],
+    "occupancy":           ["occupancy","occupancy status","occ"],
+    "est_value":           ["est value","estimated value","value","market value","avm"],
+    "last_sale_price":     ["last sale price","last sale","sale price","sales price","sold price"],
+}
+
+def _match_column(csv_columns, field_key, used=None):
+    used = used or set()
+    patterns = DEFAULT_IMPORT_MAP.get(field_key, [])
+    normalized_csv = {c: _norm(c) for c in csv_columns}
+    for p in patterns:
+        for col, n in normalized_csv.items():
+            if col in used:
+                continue
+            if p in n or n in p or n == p:
+                return col
+    return None
+
+def _default_indices(csv_columns):
+    csv_list = list(csv_columns)
+    used = set()
+    out = {}
+    for key in DEFAULT_IMPORT_MAP:
+        matched = _match_column(csv_columns, key, used)
+        if matched and matched in csv_list:
+            out[key] = 1 + csv_list.index(matched)
+            used.add(matched)
+        else:
+            out[key] = 0
+    return out
+
+
+def render(ctx):
+    st.markdown('<div class="page-title">📥 Import</div>', unsafe_allow_html=True)
+    st.markdown('<div class="page-sub">Upload CSV lists, add phone numbers, or enter leads manually.</div>', unsafe_allow_html=True)
+
+    import_tab1, import_tab2, import_tab3 = st.tabs(["📂 CSV Lead Import", "📞 Add Phone Numbers", "✏️ Manual Lead Entry"])
+
+    # ═══════════════════════════════════════════════════════════════
+    # TAB 1 — CSV BULK IMPORT
+    # ═══════════════════════════════════════════════════════════════
+    with import_tab1:
+        with st.expander("ℹ️ How it works", expanded=False):
+            st.markdown("""
+            <div class="step-row"><div class="step-badge">1</div> Upload one or more CSV files below.</div>
+            <div class="step-row"><div class="step-badge">2</div> Columns are auto-matched by header name — adjust if needed.</div>
+            <div class="step-row"><div class="step-badge">3</div> Click <strong>Import</strong>. Duplicate addresses bump the motivation score; new addresses are inserted.</div>
+            <div class="step-row"><div class="step-badge">4</div> Results appear in <strong>Lead Engine</strong> immediately.</div>
+            """, unsafe_allow_html=True)
+
+        ic1, ic2 = st.columns([2, 1])
+        with ic1:
+            source_name = st.text_input("List source name", placeholder="e.g. Foreclosure list — OH — March 2025", key="bulk_source")
+        with ic2:
+            st.markdown("<div style='margin-top:1.75rem;'></div>", unsafe_allow_html=True)
+            uploaded_files = st.file_uploader("Upload CSV(s)", type=["csv"], accept_multiple_files=True, key="bulk_uploader", label_visibility="collapsed")
+
+        if not uploaded_files:
+            st.markdown("""
+            <div class="re-card" style="text-align:center;padding:2.5rem;">
+                <div style="font-size:2rem;margin-bottom:0.75rem;">📂</div>
+                <div style="font-weight:600;color:#e6edf3;">Drop your CSV files above to get started</div>
+                <div style="font-size:0.82rem;margin-top:0.4rem;color:#8b949e;">Accepts .csv · Multiple files supported · Up to 500 rows per batch</div>
+            </div>""", unsafe_allow_html=True)
+        else:
+            st.success(f"✅ {len(uploaded_files)} file(s) ready")
+            file_tabs = st.tabs([f"📄 {f.name}" for f in uploaded_files])
+
+            for idx, (tab, uploaded_file) in enumerate(zip(file_tabs, uploaded_files)):
+                with tab:
+                    try:
+                        try:    raw_df = pd.read_csv(uploaded_file, encoding="utf-8")
+                        except: raw_df = pd.read_csv(uploaded_file, encoding="latin-1")
+                        raw_df.columns = [str(c).strip() for c in raw_df.columns]
+
+                        with st.expander("👁 Preview first 10 rows"):
+                            st.dataframe(raw_df.head(10), use_container_width=True)
+                            st.caption(f"{len(raw_df):,} rows · {len(raw_df.columns)} columns")
+
+                        csv_cols = list(raw_df.columns)
+                        cols     = ["None"] + csv_cols
+                        di       = _default_indices(csv_cols)
+                        def _idx(k): return min(di.get(k, 0), len(cols)-1)
+
+                        st.markdown('<div class="section-title" style="margin-top:1rem;">Column Mapping</div>', unsafe_allow_html=True)
+                        st.caption("Auto-matched from your CSV headers. Adjust any dropdown if a field mapped incorrectly.")
+
+                        st.markdown("**📍 Property Location** *(required)*")
+                        e1,e2,e3,e4,e5 = st.columns(5)
+                        with e1: m_prop_addr  = st.selectbox("Address *",  cols, _idx("property_address"), key=f"prop_addr_{idx}")
+                        with e2: m_prop_city  = st.selectbox("City *",     cols, _idx("property_city"),    key=f"prop_city_{idx}")
+                        with e3: m_prop_state = st.selectbox("State *",    cols, _idx("property_state"),   key=f"prop_state_{idx}")
+                        with e4: m_prop_zip   = st.selectbox("Zip",        cols, _idx("property_zip"),     key=f"prop_zip_{idx}")
+                        with e5: m_prop_county= st.selectbox("County",     cols, _idx("property_county"),  key=f"prop_county_{idx}")
+
+                        st.markdown("**👤 Owner Name** *(at least one required)*")
+                        n1,n2 = st.columns(2)
+                        with n1: m_first = st.selectbox("First Name *", cols, _idx("first_name"), key=f"first_name_{idx}")
+                        with n2: m_last  = st.selectbox("Last Name *",  cols, _idx("last_name"),  key=f"last_name_{idx}")
+
+                        with st.expander("👥 Additional Owners (2–4)"):
+                            a1,a2 = st.columns(2)
+                            with a1: m_o2f = st.selectbox("Owner 2 First", cols, _idx("owner_2_first_name"), key=f"o2f_{idx}")
+                            with a2: m_o2l = st.selectbox("Owner 2 Last",  cols, _idx("owner_2_last_name"),  key=f"o2l_{idx}")
+                            a3,a4 = st.columns(2)
+                            with a3: m_o3f = st.selectbox("Owner 3 First", cols, _idx("owner_3_first_name"), key=f"o3f_{idx}")
+                            with a4: m_o3l = st.selectbox("Owner 3 Last",  cols, _idx("owner_3_last_name"),  key=f"o3l_{idx}")
+                            a5,a6 = st.columns(2)
+                            with a5: m_o4f = st.selectbox("Owner 4 First", cols, _idx("owner_4_first_name"), key=f"o4f_{idx}")
+                            with a6: m_o4l = st.selectbox("Owner 4 Last",  cols, _idx("owner_4_last_name"),  key=f"o4l_{idx}")
+
+                        st.markdown("**📬 Mailing Address**")
+                        m1,m2,m3,m4 = st.columns(4)
+                        with m1: m_mail_addr  = st.selectbox("Mailing Address", cols, _idx("mailing_address"), key=f"mail_addr_{idx}")
+                        with m2: m_mail_city  = st.selectbox("Mailing City",    cols, _idx("mailing_city"),    key=f"mail_city_{idx}")
+                        with m3: m_mail_state = st.selectbox("Mailing State",   cols, _idx("mailing_state"),   key=f"mail_sta_{idx}")
+                        with m4: m_mail_zip   = st.selectbox("Mailing Zip",     cols, _idx("mailing_zip"),     key=f"mail_zip_{idx}")
+
+                        st.markdown("**📞 Phone Numbers**")
+                        p1,p2,p3,p4 = st.columns(4)
+                        with p1: m_ph1 = st.selectbox("Phone 1", cols, _idx("phone_1"), key=f"ph1_{idx}")
+                        with p2: m_ph2 = st.selectbox("Phone 2", cols, _idx("phone_2"), key=f"ph2_{idx}")
+                        with p3: m_ph3 = st.selectbox("Phone 3", cols, _idx("phone_3"), key=f"ph3_{idx}")
+                        with p4: m_ph4 = st.selectbox("Phone 4", cols, _idx("phone_4"), key=f"ph4_{idx}")
+
+                        with st.expander("📊 Optional Fields (Property Details, Financials, etc.)"):
+                            st.markdown("**Property Details**")
+                            o1,o2,o3,o4 = st.columns(4)
+                            with o1: m_apn       = st.selectbox("APN",           cols, _idx("apn"),           key=f"apn_{idx}")
+                            with o2: m_prop_type = st.selectbox("Property Type", cols, _idx("property_type"), key=f"prop_type_{idx}")
+                            with o3: m_prop_use  = st.selectbox("Property Use",  cols, _idx("property_use"),  key=f"prop_use_{idx}")
+                            with o4: m_land_use  = st.selectbox("Land Use",      cols, _idx("land_use"),      key=f"land_use_{idx}")
+
+                            st.markdown("**Size & Structure**")
+                            s1,s2,s3,s4 = st.columns(4)
+                            with s1: m_sqft    = st.selectbox("Living SqFt",  cols, _idx("living_sqft"), key=f"sqft_{idx}")
+                            with s2: m_acres   = st.selectbox("Lot Acres",    cols, _idx("lot_acres"),   key=f"acres_{idx}")
+                            with s3: m_yr_blt  = st.selectbox("Year Built",   cols, _idx("year_built"),  key=f"yr_blt_{idx}")
+                            with s4: m_beds    = st.selectbox("Beds",         cols, _idx("beds"),        key=f"beds_{idx}")
+                            s5,s6,s7,s8 = st.columns(4)
+                            with s5: m_baths   = st.selectbox("Baths",        cols, _idx("baths"),       key=f"baths_{idx}")
+                            with s6: m_story   = st.selectbox("Stories",      cols, _idx("stories"),     key=f"stories_{idx}")
+                            with s7: m_units   = st.selectbox("Units",        cols, _idx("units_count"), key=f"units_{idx}")
+                            with s8: m_lotsqft = st.selectbox("Lot SqFt",     cols, _idx("lot_sqft"),    key=f"lotsqft_{idx}")
+
+                            st.markdown("**Financial**")
+                            f1,f2,f3 = st.columns(3)
+                            with f1: m_val   = st.selectbox("Est Value",       cols, _idx("est_value"),       key=f"val_{idx}")
+                            with f2: m_sale  = st.selectbox("Last Sale Price", cols, _idx("last_sale_price"), key=f"sale_{idx}")
+                            with f3: m_occ   = st.selectbox("Occupancy",       cols, _idx("occupancy"),       key=f"occ_{idx}")
+
+                            st.markdown("**Owner Info**")
+                            oi1,oi2,oi3,oi4 = st.columns(4)
+                            with oi1: m_own_months  = st.selectbox("Ownership Months", cols, _idx("ownership_length_months"), key=f"own_mo_{idx}")
+                            with oi2: m_owner_type  = st.selectbox("Owner Type",       cols, _idx("owner_type"),              key=f"own_type_{idx}")
+                            with oi3: m_owner_occ   = st.selectbox("Owner Occupied",   cols, _idx("owner_occupied"),          key=f"own_occ_{idx}")
+                            with oi4: m_vacant_col  = st.selectbox("Vacant",           cols, _idx("vacant"),                  key=f"vacant_{idx}")
+
+                            st.markdown("**Garage & HVAC**")
+                            g1,g2,g3,g4 = st.columns(4)
+                            with g1: m_garage_t = st.selectbox("Garage Type",  cols, _idx("garage_type"),  key=f"gar_t_{idx}")
+                            with g2: m_garage_s = st.selectbox("Garage SqFt",  cols, _idx("garage_sqft"),  key=f"gar_s_{idx}")
+                            with g3: m_ac       = st.selectbox("AC Type",      cols, _idx("ac_type"),      key=f"ac_{idx}")
+                            with g4: m_heat     = st.selectbox("Heating Type", cols, _idx("heating_type"), key=f"heat_{idx}")
+
+                        essential_ok = (m_prop_addr != "None" and m_prop_city != "None"
+                                        and m_prop_state != "None"
+                                        and (m_first != "None" or m_last != "None"))
+
+                        if not essential_ok:
+                            st.warning("Map at least: Property Address, City, State, and First or Last Name.")
+                        else:
+                            st.markdown("<div style='margin-top:0.75rem;'></div>", unsafe_allow_html=True)
+                            if st.button(f"⬆️ Import {uploaded_file.name}", key=f"import_{idx}", type="primary", use_container_width=True):
+                                prog   = st.progress(0)
+                                status = st.empty()
+                                stats  = {"new": 0, "error": 0, "skipped": 0}
+                                batch  = []
+                                BATCH_SIZE = 500
+
+                                for i, row in raw_df.iterrows():
+                                    try:
+                                        addr_val = row.get(m_prop_addr) if m_prop_addr != "None" else None
+                                        if pd.isna(addr_val) or str(addr_val).strip() == "":
+                                            stats["skipped"] += 1; continue
+                                        city_val  = str(row.get(m_prop_city,"")).strip()[:100]  if m_prop_city  != "None" else ""
+                                        state_val = str(row.get(m_prop_state,"")).strip().upper()[:2] if m_prop_state != "None" else ""
+                                        if not city_val or not state_val:
+                                            stats["skipped"] += 1; continue
+
+                                        payload = {"address": str(addr_val).strip()[:255], "city": city_val, "state": state_val}
+                                        if source_name: payload["source"] = source_name
+
+                                        def _s(col, maxlen=255):
+                                            if col == "None" or pd.isna(row.get(col)): return None
+                                            return str(row[col]).strip()[:maxlen]
+                                        def _i(col):
+                                            if col == "None" or pd.isna(row.get(col)): return None
+                                            try: return int(float(str(row[col]).replace(",","")))
+                                            except: return None
+                                        def _f(col):
+                                            if col == "None" or pd.isna(row.get(col)): return None
+                                            try: return float(str(row[col]).replace(",","").replace("$",""))
+                                            except: return None
+                                        def _b(col, truthy=None):
+                                            if col == "None" or pd.isna(row.get(col)): return None
+                                            return str(row[col]).strip().lower() in (truthy or ["yes","y","true","1"])
+
+                                        if _s(m_prop_zip, 20):    payload["zip"]    = _s(m_prop_zip, 20)
+                                        if _s(m_prop_county, 100): payload["county"] = _s(m_prop_county, 100)
+
+                                        of = _s(m_first, 100); ol = _s(m_last, 100)
+                                        if of: payload["owner_first"] = of
+                                        if ol: payload["owner_last"]  = ol
+
+                                        parts = []
+                                        if of or ol: parts.append(f"{of or ''} {ol or ''}".strip())
+                                        for ff, lf in [(m_o2f,m_o2l),(m_o3f,m_o3l),(m_o4f,m_o4l)]:
+                                            pf = _s(ff,100); pl = _s(lf,100)
+                                            if pf: parts.append(f"{pf} {pl or ''}".strip())
+                                        if len(parts) > 1:
+                                            payload["owner_name"] = " / ".join(parts)
+                                            payload.pop("owner_first",None); payload.pop("owner_last",None)
+
+                                        for key, col, mx in [("mailing_address",m_mail_addr,255),("mailing_city",m_mail_city,100),
+                                                              ("mailing_state",m_mail_state,2),("mailing_zip",m_mail_zip,20)]:
+                                            v = _s(col, mx)
+                                            if v: payload[key] = v
+
+                                        phones = [str(row[ph]).strip() for ph in [m_ph1,m_ph2,m_ph3,m_ph4]
+                                                  if ph != "None" and not pd.isna(row.get(ph)) and str(row[ph]).strip()]
+                                        if phones: payload["phone_numbers"] = ", ".join(phones)
+
+                                        for key, col in [("apn",m_apn),("property_type",m_prop_type),("property_use",m_prop_use),
+                                                         ("land_use",m_land_use),("garage_type",m_garage_t),
+                                                         ("ac_type",m_ac),("heating_type",m_heat),("owner_type",m_owner_type)]:
+                                            v = _s(col); v and payload.update({key: v})
+
+                                        for key, col in [("living_sqft",m_sqft),("lot_sqft",m_lotsqft),("year_built",m_yr_blt),
+                                                         ("stories",m_story),("units_count",m_units),
+                                                         ("garage_sqft",m_garage_s),("ownership_length_months",m_own_months)]:
+                                            v = _i(col)
+                                            if v is not None: payload[key] = v
+
+                                        for key, col in [("lot_acres",m_acres),("baths",m_baths),
+                                                         ("est_value",m_val),("last_sale_price",m_sale)]:
+                                            v = _f(col)
+                                            if v is not None: payload[key] = v
+
+                                        v = _i(m_beds)
+                                        if v is not None: payload["beds"] = v
+
+                                        v = _b(m_owner_occ, ["yes","y","true","1","owner occupied"])
+                                        if v is not None: payload["owner_occupied"] = v
+                                        v = _b(m_vacant_col, ["yes","y","true","1","vacant"])
+                                        if v is not None: payload["vacant"] = v
+
+                                        if m_occ != "None" and not pd.isna(row.get(m_occ)):
+                                            ov = str(row[m_occ]).strip()
+                                            payload["occupancy_status"] = (
+                                                "Vacant"   if ov.lower() in ["vacant","v","empty"] else
+                                                "Occupied" if ov.lower() in ["occupied","occ","owner occupied"] else ov
+                                            )
+
+                                        batch.append(payload)
+                                        stats["new"] += 1
+                                        if len(batch) >= BATCH_SIZE:
+                                            bulk_insert_leads(batch); batch = []
+                                    except Exception:
+                                        stats["error"] += 1
+
+                                    prog.progress((i+1)/len(raw_df))
+                                    status.text(f"Processing {i+1:,} / {len(raw_df):,}")
+
+                                if batch: bulk_insert_leads(batch)
+
+                                st.success(f"✅ Imported **{stats['new']:,}** leads · {stats['error']} errors · {stats['skipped']} skipped")
+                                if stats["new"] > 0:
+                                    st.balloons()
+                                    try:
+                                        list_name = source_name.strip() if (source_name and source_name.strip()) else uploaded_file.name
+                                        add_uploaded_list(list_name, uploaded_file.name)
+                                    except Exception:
+                                        pass
+                    except Exception as e:
+                        st.error(f"Error reading file: {e}")
+
+    # ═══════════════════════════════════════════════════════════════
+    # TAB 2 — ADD PHONE NUMBERS
+    # ═══════════════════════════════════════════════════════════════
+    with import_tab2:
+        st.markdown('<div class="section-title">📞 Add / Update Phone Numbers</div>', unsafe_allow_html=True)
+        ph_method = st.radio("Method", ["📂 Upload CSV with phones", "✏️ Type phones manually"],
+                             horizontal=True, key="ph_method")
+
+        if ph_method == "📂 Upload CSV with phones":
+            st.caption("Your CSV needs one column to match leads (address or APN) + phone number columns.")
+            phone_file = st.file_uploader("Upload phone CSV", type=["csv"], key="phone_csv_upload")
+
+            if phone_file:
+                try:
+                    try:    ph_df = pd.read_csv(phone_file, encoding="utf-8")
+                    except: ph_df = pd.read_csv(phone_file, encoding="latin-1")
+                    ph_df.columns = [str(c).strip() for c in ph_df.columns]
+
+                    st.success(f"Loaded {len(ph_df):,} rows")
+                    with st.expander("Preview"):
+                        st.dataframe(ph_df.head(8), use_container_width=True)
+
+                    ph_cols = ["None"] + list(ph_df.columns)
+                    mc1, mc2 = st.columns(2)
+                    with mc1: match_by  = st.selectbox("Match leads by", ["Address", "APN"], key="ph_match_by")
+                    with mc2: match_col = st.selectbox("Which column?", ph_cols, key="ph_match_col")
+
+                    p1c,p2c,p3c,p4c = st.columns(4)
+                    with p1c: ph1_col = st.selectbox("Phone 1", ph_cols, key="ph1_col")
+                    with p2c: ph2_col = st.selectbox("Phone 2", ph_cols, key="ph2_col")
+                    with p3c: ph3_col = st.selectbox("Phone 3", ph_cols, key="ph3_col")
+                    with p4c: ph4_col = st.selectbox("Phone 4", ph_cols, key="ph4_col")
+
+                    overwrite = st.checkbox("Overwrite existing phones (unchecked = append)", value=False, key="ph_overwrite")
+
+                    if st.button("📥 Import Phone Numbers", type="primary", key="ph_import_btn"):
+                        matched = 0; not_found = 0
+                        prog_ph = st.progress(0)
+                        for i, row in ph_df.iterrows():
+                            phones = [str(row[c]).strip() for c in [ph1_col,ph2_col,ph3_col,ph4_col]
+                                      if c != "None" and not pd.isna(row.get(c)) and str(row.get(c,"")).strip()
+                                      and str(row[c]).strip().lower() not in ("nan","none","null","")]
+                            if not phones:
+                                prog_ph.progress((i+1)/len(ph_df)); continue
+                            try:
+                                val = str(row.get(match_col, "")).strip()
+                                if not val: continue
+                                if match_by == "Address":
+                                    ex = execute_query("SELECT id, phone_numbers FROM properties WHERE LOWER(TRIM(street_address)) = LOWER(TRIM(%s)) LIMIT 1", (val,), fetch=True)
+                                else:
+                                    ex = execute_query("SELECT id, phone_numbers FROM properties WHERE LOWER(TRIM(apn)) = LOWER(TRIM(%s)) LIMIT 1", (val,), fetch=True)
+                                if ex:
+                                    lead = dict(ex[0])
+                                    if overwrite:
+                                        new_ph = ", ".join(phones)
+                                    else:
+                                        old_ph = [p.strip() for p in str(lead.get("phone_numbers") or "").split(",") if p.strip()]
+                                        new_ph = ", ".join(dict.fromkeys(old_ph + phones))
+                                    execute_query("UPDATE properties SET phone_numbers = %s WHERE id = %s", (new_ph, lead["id"]))
+                                    matched += 1
+                                else:
+                                    not_found += 1
+                            except Exception:
+                                not_found += 1
+                            prog_ph.progress((i+1)/len(ph_df))
+                        st.success(f"✅ Updated **{matched:,}** leads · {not_found:,} not matched")
+                except Exception as e:
+                    st.error(f"Error: {e}")
+
+        else:  # Manual
+            search_term = st.text_input("🔍 Search lead by address, name or APN", placeholder="123 Main St", key="ph_search_term")
+            if search_term and len(search_term) >= 3:
+                try:
+                    results = search_leads(search_term, limit=20)
+                    if results:
+                        choices = {f"{r.get('street_address')}, {r.get('city')} — {r.get('owner_name') or 'Unknown'}": r for r in results}
+                        picked = st.selectbox("Select lead", list(choices.keys()), key="ph_manual_pick")
+                        if picked:
+                            ld = choices[picked]
+                            st.info(f"Current phones: **{ld.get('phone_numbers') or 'None'}**")
+                            with st.form("manual_phone_form"):
+                                mp1,mp2 = st.columns(2); mp3,mp4 = st.columns(2)
+                                with mp1: new_ph1 = st.text_input("Phone 1", placeholder="555-123-4567")
+                                with mp2: new_ph2 = st.text_input("Phone 2")
+                                with mp3: new_ph3 = st.text_input("Phone 3")
+                                with mp4: new_ph4 = st.text_input("Phone 4")
+                                overwrite_m = st.checkbox("Replace existing (unchecked = append)", value=False)
+                                if st.form_submit_button("💾 Save", type="primary"):
+                                    new_phones = [p.strip() for p in [new_ph1,new_ph2,new_ph3,new_ph4] if p.strip()]
+                                    if new_phones:
+                                        if overwrite_m:
+                                            final = ", ".join(new_phones)
+                                        else:
+                                            old = [p.strip() for p in str(ld.get("phone_numbers") or "").split(",") if p.strip()]
+                                            final = ", ".join(dict.fromkeys(old + new_phones))
+                                        execute_query("UPDATE properties SET phone_numbers = %s WHERE id = %s", (final, ld["id"]))
+                                        st.success(f"✅ Saved: {final}")
+                                        st.rerun()
+                                    else:
+                                        st.warning("Enter at least one phone number.")
+                    else:
+                        st.info("No leads found.")
+                except Exception as e:
+                    st.error(str(e))
+
+    # ═══════════════════════════════════════════════════════════════
+    # TAB 3 — MANUAL SINGLE LEAD ENTRY
+    # ═══════════════════════════════════════════════════════════════
+    with import_tab3:
+        st.markdown('<div class="section-title">✏️ Add a Single Lead Manually</div>', unsafe_allow_html=True)
+        with st.form("manual_lead_form", clear_on_submit=True):
+            st.markdown("**📍 Property Location** *(required)*")
+            ml1,ml2,ml3,ml4 = st.columns(4)
+            with ml1: ml_addr  = st.text_input("Street Address *", placeholder="123 Main St")
+            with ml2: ml_city  = st.text_input("City *", placeholder="Columbus")
+            with ml3: ml_state = st.text_input("State *", placeholder="OH", max_chars=2)
+            with ml4: ml_zip   = st.text_input("Zip", placeholder="43215")
+
+            st.markdown("**👤 Owner**")
+            mo1,mo2 = st.columns(2)
+            with mo1: ml_first = st.text_input("First Name")
+            with mo2: ml_last  = st.text_input("Last Name")
+
+            st.markdown("**📞 Phone Numbers**")
+            mp1c,mp2c,mp3c = st.columns(3)
+            with mp1c: ml_ph1 = st.text_input("Phone 1", placeholder="555-123-4567")
+            with mp2c: ml_ph2 = st.text_input("Phone 2")
+            with mp3c: ml_ph3 = st.text_input("Phone 3")
+
+            st.markdown("**🏠 Property Details** *(optional)*")
+            pd1,pd2,pd3,pd4,pd5 = st.columns(5)
+            with pd1: ml_type  = st.selectbox("Type", ["","Single-Family","Condo","Multi-Family","Land","Commercial"])
+            with pd2: ml_beds  = st.number_input("Beds",  0, 20, 0)
+            with pd3: ml_baths = st.number_input("Baths", 0, 20, 0)
+            with pd4: ml_sqft  = st.number_input("SqFt",  0, 50000, 0, step=100)
+            with pd5: ml_yr    = st.number_input("Year Built", 0, 2025, 0)
+
+            st.markdown("**💰 Financial** *(optional)*")
+            pf1,pf2,pf3 = st.columns(3)
+            with pf1: ml_value  = st.number_input("Est. Value ($)",  0, 10000000, 0, step=5000)
+            with pf2: ml_equity = st.number_input("Est. Equity ($)", 0, 10000000, 0, step=5000)
+            with pf3: ml_source = st.text_input("List Source", placeholder="e.g. Direct Mail March")
+
+            ml_notes = st.text_area("Notes", placeholder="Any notes about this lead...")
+            ml_stage = st.selectbox("Pipeline Stage", ["","New","Contacted","Negotiating","Closed","Lost"])
+
+            if st.form_submit_button("➕ Add Lead", type="primary", use_container_width=True):
+                if not ml_addr.strip() or not ml_city.strip() or not ml_state.strip():
+                    st.error("Address, City, and State are required.")
+                else:
+                    phones = [p.strip() for p in [ml_ph1,ml_ph2,ml_ph3] if p.strip()]
+                    payload = {"address": ml_addr.strip(), "city": ml_city.strip(), "state": ml_state.strip().upper()[:2]}
+                    if ml_zip.strip():    payload["zip"]           = ml_zip.strip()
+                    if ml_first.strip():  payload["owner_first"]   = ml_first.strip()
+                    if ml_last.strip():   payload["owner_last"]    = ml_last.strip()
+                    if phones:            payload["phone_numbers"] = ", ".join(phones)
+                    if ml_type:           payload["property_type"] = ml_type
+                    if ml_beds > 0:       payload["beds"]          = ml_beds
+                    if ml_baths > 0:      payload["baths"]         = ml_baths
+                    if ml_sqft > 0:       payload["living_sqft"]   = ml_sqft
+                    if ml_yr > 1800:      payload["year_built"]    = ml_yr
+                    if ml_value > 0:      payload["est_value"]     = ml_value
+                    if ml_equity > 0:     payload["est_equity_amt"]= ml_equity
+                    if ml_source.strip(): payload["source"]        = ml_source.strip()
+                    if ml_notes.strip():  payload["notes"]         = ml_notes.strip()
+                    if ml_stage:          payload["stage"]         = ml_stage
+                    try:
+                        stack_lead(payload)
+                        st.success(f"✅ Lead added: {ml_addr.strip()}, {ml_city.strip()}, {ml_state.strip().upper()}")
+                        st.balloons()
+                    except Exception as e:
+                        st.error(f"Error: {e}")
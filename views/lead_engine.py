@@ -0,0 +1,748 @@
+"""Lead Engine page."""
+import streamlit as st
+import pandas as pd
+import os
+import shutil
+import tempfile
+import datetime
+import json
+from views import fragment, rerun_fragment
+from views.activity import lead_activity_panel
+from views.frames import compact_frame, put_frame, get_frame, drop_frame
+from views.lead_picker import lead_picker
+from core import (
+    save_saved_search,
+    list_saved_searches,
+    get_saved_search,
+    delete_saved_search,
+    get_stacked_leads,
+    get_list_stack_summary,
+    batch_update_distress_scores,
+    skip_trace_lead,
+    record_audit,
+    lead_selection,
+    selection_ids,
+    export_selection_csv,
+    export_stacked_leads_csv,
+    export_parquet,
+    get_selection_tags,
+    update_selection,
+    tag_selection,
+    delete_selection,
+    normalize_search_spec,
+    build_lead_search,
+    get_search_summary,
+    get_search_profile,
+    fetch_lead_page,
+    SEARCH_PAGE_SIZE,
+    LEAD_ENGINE_COLUMNS,
+    get_map_clusters,
+    get_map_points,
+    map_cell_size,
+    MAP_POINT_ZOOM,
+    EXPORT_DOWNLOAD_MAX_MB,
+)
+
+
+def _start_search(spec, cols):
+    """Begin a new paginated search — pages and the summary are fetched lazily."""
+    drop_frame("search_results", "search_grid")
+    for k in ("search_summary", "search_profile", "search_next_cursor"):
+        st.session_state.pop(k, None)
+    query, params = build_lead_search(spec, cols)
+    st.session_state["search_spec"]    = spec
+    st.session_state["search_cursors"] = [None]   # keyset cursor that starts each visited page
+    st.session_state["search_page"]    = 0
+    st.session_state["last_query"]     = query
+    st.session_state["last_params"]    = params
+    _reset_selection()
+
+def _invalidate_search_page():
+    """Refetch the current page and totals on the next run (after a write)."""
+    drop_frame("search_results", "search_grid")
+    for k in ("search_summary", "search_profile", "search_next_cursor"):
+        st.session_state.pop(k, None)
+
+def _reset_selection(all_matching=False):
+    """
+    Select nothing, or every lead matching the search. Ticks are kept in
+    session state as ids, so a selection survives paging: "ids" holds the
+    ticked leads, or in all-matching mode "except" holds the unticked ones.
+    """
+    st.session_state["lead_selection"] = {"all": all_matching, "ids": set(), "except": set()}
+    st.session_state["lead_selection_epoch"] = st.session_state.get("lead_selection_epoch", 0) + 1
+
+
+def _download_export(label, path, file_name, key):
+    """
+    Offer an export file (.csv, .csv.gz or .zip) for download, then remove it.
+    st.download_button keeps the whole file in memory for the session, so
+    files over EXPORT_DOWNLOAD_MAX_MB are refused instead.
+    """
+    mime = {".gz": "application/gzip", ".zip": "application/zip"}.get(os.path.splitext(path)[1], "text/csv")
+    try:
+        size_mb = os.path.getsize(path) / 2 ** 20
+        if size_mb > EXPORT_DOWNLOAD_MAX_MB:
+            st.warning(f"This export is {size_mb:,.0f} MB, over the {EXPORT_DOWNLOAD_MAX_MB:,} MB download limit. "
+                       "Compress it, use Parquet or export fewer leads.")
+            return
+        with open(path, "rb") as f:
+            st.download_button(label, f, file_name, mime, key=key)
+    finally:
+        os.remove(path)
+
+
+def _export_parquet_zip(selection, cols, partition_by):
+    """Export a selection's cols as a Parquet dataset and zip it; returns the zip path."""
+    work = tempfile.mkdtemp(prefix="avacrm_parquet_")
+    try:
+        export_parquet(os.path.join(work, "leads"), selection=selection, partition_by=partition_by,
+                       fields=cols, columns=cols)
+        fd, zip_path = tempfile.mkstemp(prefix="avacrm_export_", suffix=".zip")
+        os.close(fd)
+        return shutil.make_archive(zip_path[:-4], "zip", work)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def _visible_columns(df, profile):
+    """
+    Columns worth showing, judged over the whole result set: the identity columns
+    plus any that are mostly filled. Columns the profile doesn't cover are kept.
+    """
+    always   = {"id","street_address","city","owner_name"}
+    cond     = {"state","property_state","phone_numbers","tags","stage","motivation_score","zip_code","apn","property_type","beds","baths"}
+    stats    = profile["columns"]
+    return [c for c in df.columns if
+            c in always or c not in stats or
+            (c in cond and stats[c]["ratio"] > 0.3) or
+            (c not in cond and stats[c]["ratio"] > 0.1)]
+
+
+def _grid_frame(df, profile=None):
+    """Editor input for one page of results, with the ✓ column prepended. profile=None shows every column."""
+    df_sel = (df if profile is None else df[_visible_columns(df, profile)]).copy()
+    if "selected" not in df_sel.columns:
+        df_sel.insert(0, "selected", False)
+    return df_sel
+
+
+@fragment
+def _map_view(cols):
+    """Map tab — moving the zoom slider reruns only the map."""
+    try:
+        import pydeck as pdk
+        has_coords = "lat" in cols and "lon" in cols
+        base_q = st.session_state.get("last_query")
+        base_p = st.session_state.get("last_params") or []
+        map_zoom = st.slider("Map zoom", 3, 16, 10, key="map_zoom",
+                             help=f"Below {MAP_POINT_ZOOM} leads are clustered; at {MAP_POINT_ZOOM}+ every pin is shown.")
+        points_mode = map_zoom >= MAP_POINT_ZOOM
+        map_rows = []
+        if has_coords and base_q:
+            map_rows = (get_map_points(base_q, base_p) if points_mode
+                        else get_map_clusters(base_q, base_p, map_zoom))
+
+        if map_rows:
+            map_df = pd.DataFrame(map_rows)
+            # Color by motivation score (vectorized — one bucket per marker)
+            score_col = "motivation_score" if points_mode else "avg_score"
+            scores = pd.to_numeric(map_df[score_col], errors="coerce").fillna(0)
+            buckets = pd.cut(scores, [-float("inf"), 0, 3.999, 5.999, 7.999, float("inf")],
+                             labels=["none", "low", "med", "medhigh", "high"])
+            palette = {"none": [100, 149, 237, 180], "low": [63, 185, 80, 180], "med": [227, 179, 65, 200],
+                       "medhigh": [251, 143, 68, 220], "high": [248, 81, 73, 220]}
+            map_df["color"] = buckets.astype(str).map(palette)
+
+            if points_mode:
+                map_df["tooltip_text"] = (map_df["street_address"].fillna("").astype(str)
+                                          + " | Score: " + map_df["motivation_score"].astype(str))
+                layer = pdk.Layer(
+                    "ScatterplotLayer",
+                    data=map_df,
+                    get_position=["lon","lat"],
+                    get_color="color",
+                    get_radius=60,
+                    radius_min_pixels=5,
+                    radius_max_pixels=20,
+                    pickable=True,
+                    auto_highlight=True,
+                )
+                n_pins = len(map_df)
+            else:
+                counts = map_df["lead_count"].astype(float)
+                cell_m = map_cell_size(map_zoom) * 111_000
+                map_df["radius"] = cell_m * 0.5 * (counts / counts.max()) ** 0.5
+                map_df["tooltip_text"] = (counts.astype(int).map("{:,} leads".format)
+                                          + " | Avg score: " + map_df["avg_score"].astype(str)
+                                          + " | Max equity: $" + pd.to_numeric(map_df["max_equity"], errors="coerce")
+                                            .fillna(0).map("{:,.0f}".format))
+                layer = pdk.Layer(
+                    "ScatterplotLayer",
+                    data=map_df,
+                    get_position=["lon","lat"],
+                    get_color="color",
+                    get_radius="radius",
+                    radius_min_pixels=6,
+                    pickable=True,
+                    auto_highlight=True,
+                )
+                n_pins = int(counts.sum())
+            # Center on the lead-weighted centroid of what's being drawn
+            weights = (map_df["lead_count"].astype(float) if not points_mode
+                       else pd.Series(1.0, index=map_df.index))
+            view = pdk.ViewState(
+                latitude=float((map_df["lat"].astype(float) * weights).sum() / weights.sum()),
+                longitude=float((map_df["lon"].astype(float) * weights).sum() / weights.sum()),
+                zoom=map_zoom,
+                pitch=0,
+            )
+            st.pydeck_chart(pdk.Deck(
+                layers=[layer],
+                initial_view_state=view,
+                map_style="mapbox://styles/mapbox/dark-v10",
+                tooltip={"text": "{tooltip_text}"},
+            ))
+            mode_txt = f"{len(map_df):,} pins" if points_mode else f"{len(map_df):,} clusters · {n_pins:,} leads"
+            st.caption(f"🔴 High (8-10)  🟠 Med-High (6-7)  🟡 Med (4-5)  🟢 Low  · {mode_txt}")
+        else:
+            st.info("📍 No geocoded leads yet. Click **Geocode Results** to add map pins.")
+            gc1, gc2 = st.columns([2,1])
+            with gc1:
+                st.caption("Geocoding uses OpenStreetMap (free). ~1 sec per lead.")
+            with gc2:
+                if st.button("🌐 Geocode Results", type="primary", key="geocode_btn"):
+                    with st.spinner("Geocoding..."):
+                        try:
+                            page_df = get_frame("search_results")
+                            ids_to_geo = page_df["id"].tolist()[:50] if page_df is not None and "id" in page_df.columns else []
+                            done = 0
+                            for lid in ids_to_geo:
+                                from core import geocode_lead
+                                if geocode_lead(lid): done += 1
+                            st.success(f"Geocoded {done} leads. Refresh search to see pins.")
+                            st.rerun()
+                        except Exception as ge:
+                            st.error(str(ge))
+    except ImportError:
+        st.warning("pydeck not installed. Add `pydeck` to requirements.txt")
+    except Exception as me:
+        st.error(f"Map error: {me}")
+
+
+@fragment
+def _stacked_leads():
+    """Stacked Leads tab — the slider reruns only this tab."""
+    st.markdown('<div class="section-title">🔥 List Stacking — High Priority Leads</div>', unsafe_allow_html=True)
+    st.caption("Leads appearing on 2+ of your imported lists are the hottest — motivated sellers on multiple radars.")
+    min_stack = st.slider("Minimum list appearances", 2, 10, 2, key="stack_slider")
+    try:
+        stacked = get_stacked_leads(min_stack)
+        summary = get_list_stack_summary()
+        if summary:
+            sc = st.columns(len(summary))
+            for i, s in enumerate(summary):
+                sc[i].markdown(f'''<div class="metric-tile">
+                    <div class="label">{s["list_count"]} Lists</div>
+                    <div class="value" style="color:#f85149;">{s["lead_count"]:,}</div>
+                    <div class="delta">stacked leads</div>
+                </div>''', unsafe_allow_html=True)
+            st.markdown("<div style='margin-top:1rem;'></div>", unsafe_allow_html=True)
+        if stacked:
+            stack_df = pd.DataFrame(stacked)
+            st.dataframe(stack_df, use_container_width=True, hide_index=True)
+            if st.button("📥 Export Stacked Leads", key="stack_export"):
+                _download_export("💾 Download CSV", export_stacked_leads_csv(min_stack),
+                              f"stacked_leads_{datetime.datetime.now().strftime('%Y%m%d')}.csv", "stack_download")
+        else:
+            st.info("No stacked leads yet. Import multiple lists with the same addresses to see overlaps here.")
+    except Exception as se:
+        st.error(f"Stacking error: {se}")
+
+
+@fragment
+def _results_grid(cols, total_found):
+    """
+    Pager, batch toolbar, result grid and batch actions. Ticking rows, ☑ All
+    and paging rerun only this fragment; writes rerun the whole page.
+    """
+    try:
+        # "Show all columns" widens the projection; otherwise only the grid's columns are fetched
+        show_all = bool(st.session_state.get("show_all_cols", False))
+        if st.session_state.get("search_results_all_cols") != show_all:
+            drop_frame("search_results", "search_grid")
+        # The page lives in the server-wide result store, which may have evicted it
+        if get_frame("search_results") is None or get_frame("search_grid") is None:
+            page_cursor = st.session_state["search_cursors"][st.session_state["search_page"]]
+            rows, next_cursor = fetch_lead_page(st.session_state["search_spec"], page_cursor, columns=cols,
+                                                fields=None if show_all else LEAD_ENGINE_COLUMNS)
+            page_df = compact_frame(pd.DataFrame(rows))
+            put_frame("search_results", page_df)
+            st.session_state["search_results_all_cols"] = show_all
+            st.session_state["search_next_cursor"]      = next_cursor
+            if not show_all and "search_profile" not in st.session_state:
+                st.session_state["search_profile"] = get_search_profile(
+                    st.session_state["search_spec"], columns=cols, fields=LEAD_ENGINE_COLUMNS)
+            put_frame("search_grid", _grid_frame(
+                page_df, None if show_all else st.session_state["search_profile"]))
+    except Exception as e:
+        st.error(f"Query error: {e}")
+        st.exception(e)
+        return
+    df = get_frame("search_results")
+
+    # Pager — one page of results is held at a time
+    page_no   = st.session_state["search_page"]
+    row_start = page_no * SEARCH_PAGE_SIZE
+    pg1, pg2, pg3 = st.columns([1, 1, 4])
+    with pg1:
+        if st.button("◀ Prev", key="search_prev", disabled=page_no == 0):
+            st.session_state["search_page"] = page_no - 1
+            drop_frame("search_results"); rerun_fragment()
+    with pg2:
+        next_cursor = st.session_state.get("search_next_cursor")
+        if st.button("Next ▶", key="search_next", disabled=next_cursor is None):
+            cursors = st.session_state["search_cursors"]
+            del cursors[page_no + 1:]
+            cursors.append(next_cursor)
+            st.session_state["search_page"] = page_no + 1
+            drop_frame("search_results"); rerun_fragment()
+    with pg3:
+        if len(df):
+            st.caption(f"Showing {row_start + 1:,}–{row_start + len(df):,} of {total_found:,}")
+
+    # An empty page has no columns at all, so there is nothing to select or act on
+    df_sel = get_frame("search_grid")
+    if df.empty or df_sel is None or "id" not in df_sel.columns:
+        st.info("No leads match these filters.")
+        return
+
+    # Batch toolbar — shown below tabs
+    st.markdown("<div style='margin-top:0.5rem;'></div>", unsafe_allow_html=True)
+    b1, b2, b3, b4, b5, b6 = st.columns([1,1,1,1,1,2])
+    with b1:
+        if st.button("☑ All",    key="btn_sel_all"):   _reset_selection(True);  rerun_fragment()
+    with b2:
+        if st.button("✕ Clear",  key="btn_clr_all"):   _reset_selection(False); rerun_fragment()
+    with b3:
+        if st.button("✏️ Update", key="batch_update"):  st.session_state["batch_action"] = "update"
+    with b4:
+        if st.button("🏷 Tag",    key="batch_tag"):     st.session_state["batch_action"] = "tag"
+    with b5:
+        if st.button("📤 Export", key="batch_export"):  st.session_state["batch_action"] = "export"
+    with b6:
+        if st.button("🗑 Delete", key="batch_delete"):  st.session_state["batch_action"] = "delete"
+
+    # Hide empty columns (the editor frame is built once per fetched page)
+    st.checkbox("Show all columns", value=False, key="show_all_cols")
+    if "lead_selection" not in st.session_state:
+        _reset_selection()
+    sel = st.session_state["lead_selection"]
+    ticked = ~df_sel["id"].isin(sel["except"]) if sel["all"] else df_sel["id"].isin(sel["ids"])
+
+    # A fresh editor per page and per ☑ All / ✕ Clear, seeded from the selection
+    edited = st.data_editor(
+        df_sel.assign(selected=ticked.to_numpy()), use_container_width=True, hide_index=True,
+        column_config={"selected": st.column_config.CheckboxColumn("✓", default=False)},
+        disabled=[c for c in df_sel.columns if c != "selected"],
+        key=f"lead_editor_{st.session_state['lead_selection_epoch']}_{page_no}",
+    )
+    on  = {int(i) for i in edited.loc[edited["selected"] == True, "id"]}
+    off = {int(i) for i in edited["id"]} - on
+    if sel["all"]:
+        sel["except"] = (sel["except"] - on) | off
+    else:
+        sel["ids"] = (sel["ids"] - off) | on
+    n_selected = total_found - len(sel["except"]) if sel["all"] else len(sel["ids"])
+    if n_selected:
+        st.caption(f"{n_selected:,} selected" + (" — every matching lead" if sel["all"] and not sel["except"] else ""))
+    selection = lead_selection(st.session_state["search_spec"], sel["ids"], sel["all"], sel["except"])
+
+    # ── Batch actions — each runs as one statement over the selection ──
+    if "batch_action" in st.session_state:
+        if n_selected == 0:
+            st.warning("Select at least one lead.")
+            del st.session_state["batch_action"]
+            rerun_fragment()
+        else:
+            act = st.session_state["batch_action"]
+
+            if act == "export":
+                st.markdown(f'<div class="section-title">Export {n_selected:,} Leads</div>', unsafe_allow_html=True)
+                fmt = st.radio("Format", ["CSV", "Parquet"], horizontal=True, key="export_format",
+                               help="Parquet keeps column types and every column, for analysis tools.")
+                if fmt == "CSV":
+                    gz = st.checkbox("Compress (.csv.gz)", value=n_selected > 50_000, key="export_gzip")
+                else:
+                    part = st.selectbox("Partition files by", ["None", "state", "list"], key="export_partition")
+                e1, e2 = st.columns(2)
+                with e1:
+                    if st.button(f"Build {fmt}", type="primary", key="export_run"):
+                        stamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+                        with st.spinner("Exporting..."):
+                            if fmt == "CSV":
+                                path = export_selection_csv(
+                                    selection, columns=cols, compress=gz,
+                                    fields=None if st.session_state.get("show_all_cols") else LEAD_ENGINE_COLUMNS)
+                                name = f"leads_{stamp}.csv" + (".gz" if gz else "")
+                            else:
+                                path = _export_parquet_zip(selection, cols, None if part == "None" else part)
+                                name = f"leads_{stamp}_parquet.zip"
+                        _download_export("📥 Download", path, name, "export_download")
+                        del st.session_state["batch_action"]
+                with e2:
+                    if st.button("Cancel", key="export_cancel"):
+                        del st.session_state["batch_action"]; rerun_fragment()
+
+            elif act == "delete":
+                st.error(f"Delete {n_selected:,} leads? They can be restored from the Dashboard's Archive.")
+                d1, d2 = st.columns(2)
+                with d1:
+                    if st.button("✅ Yes, Delete"):
+                        deleted = delete_selection(selection, columns=cols)
+                        st.success(f"Deleted {deleted:,} leads.")
+                        del st.session_state["batch_action"]
+                        _reset_selection()
+                        _invalidate_search_page()
+                        st.rerun()
+                with d2:
+                    if st.button("❌ Cancel", key="del_cancel"):
+                        del st.session_state["batch_action"]; rerun_fragment()
+
+            elif act == "update":
+                st.markdown('<div class="section-title">Batch Update</div>', unsafe_allow_html=True)
+                with st.form("batch_update_form"):
+                    new_motivation = st.number_input("Motivation Score (0 = skip)", 0, 10, 0)
+                    new_stage      = st.selectbox("Stage", ["", "New","Contacted","Negotiating","Closed","Lost"])
+                    new_notes      = st.text_area("Append notes")
+                    s1, s2 = st.columns(2)
+                    with s1: submitted = st.form_submit_button("Apply", type="primary")
+                    with s2: cancelled = st.form_submit_button("Cancel")
+                    if submitted:
+                        if new_motivation > 0 or new_stage or new_notes:
+                            updated = update_selection(selection, motivation_score=new_motivation or None,
+                                                       stage=new_stage or None, append_notes=new_notes or None,
+                                                       columns=cols)
+                            st.success(f"Updated {updated:,} leads.")
+                            del st.session_state["batch_action"]
+                            _invalidate_search_page()
+                            st.rerun()
+                    if cancelled:
+                        del st.session_state["batch_action"]; rerun_fragment()
+
+            elif act == "tag":
+                st.markdown('<div class="section-title">Manage Tags</div>', unsafe_allow_html=True)
+                all_t = get_selection_tags(selection, columns=cols)
+                st.caption("Current tags: " + (", ".join(all_t) if all_t else "None"))
+                with st.form("batch_tag_form"):
+                    action     = st.radio("Action", ["Add Tags","Remove Tags"], horizontal=True)
+                    tags_input = st.text_input("Tags (comma-separated)")
+                    t1, t2 = st.columns(2)
+                    with t1: ts = st.form_submit_button("Apply", type="primary")
+                    with t2: tc = st.form_submit_button("Cancel")
+                    if ts and tags_input:
+                        tag_list = [t.strip() for t in tags_input.split(",") if t.strip()]
+                        tagged = tag_selection(selection, tag_list, remove=action == "Remove Tags", columns=cols)
+                        st.success(f"Tags updated for {tagged:,} leads.")
+                        del st.session_state["batch_action"]
+                        _invalidate_search_page()
+                        st.rerun()
+                    if tc:
+                        del st.session_state["batch_action"]; rerun_fragment()
+
+            elif act == "skip_trace":
+                st.markdown('<div class="section-title">🔍 Skip Trace Selected Leads</div>', unsafe_allow_html=True)
+                sel_ids = selection_ids(selection, columns=cols)
+                st.info(f"Skip trace {len(sel_ids)} lead(s) to unlock phone numbers and emails.")
+                st.caption("Configure your API key in `.streamlit/secrets.toml` under `[skip_trace]`.")
+
+                provider_choice = st.selectbox(
+                    "Provider",
+                    ["batch_skip_tracing", "skip_genie"],
+                    format_func=lambda x: {
+                        "batch_skip_tracing": "BatchSkipTracing.com",
+                        "skip_genie": "SkipGenie.com",
+                    }[x],
+                    key="skip_provider"
+                )
+                sk1, sk2 = st.columns(2)
+                with sk1:
+                    if st.button("🔍 Run Skip Trace", type="primary", key="skip_run"):
+                        results_sk = {"success": 0, "failed": 0, "errors": []}
+                        traced = []
+                        prog_sk = st.progress(0)
+                        for i, lid in enumerate(sel_ids):
+                            r = skip_trace_lead(int(lid), provider_choice)
+                            if r["success"]:
+                                results_sk["success"] += 1
+                                traced.append(lid)
+                            else:
+                                results_sk["failed"] += 1
+                                if r.get("error"):
+                                    results_sk["errors"].append(f"#{lid}: {r['error']}")
+                            prog_sk.progress((i+1)/len(sel_ids))
+                        record_audit("skip_trace", traced, f"Skip traced via {provider_choice}",
+                                     {"provider": provider_choice})
+                        if results_sk["success"] > 0:
+                            st.success(f"✅ Skip traced {results_sk['success']} leads successfully.")
+                        if results_sk["failed"] > 0:
+                            st.warning(f"⚠️ {results_sk['failed']} failed.")
+                        if results_sk["errors"]:
+                            with st.expander("Errors"):
+                                for e in results_sk["errors"][:10]:
+                                    st.caption(e)
+                        del st.session_state["batch_action"]
+                        _invalidate_search_page()
+                        st.rerun()
+                with sk2:
+                    if st.button("Cancel", key="skip_cancel"):
+                        del st.session_state["batch_action"]; rerun_fragment()
+
+    # Notes
+    if len(df) > 0 and "id" in df.columns:
+        with st.expander("📝 Notes & Activity for a Lead"):
+            lid = lead_picker("notes_lead_search")
+            if lid is not None:
+                lead_activity_panel(lid, "search_activity")
+
+
+def render(ctx):
+    cols           = ctx["cols"]
+    selected_state = ctx["selected_state"]
+
+    st.markdown('<div class="page-title">Lead Engine</div>', unsafe_allow_html=True)
+    st.markdown('<div class="page-sub">Search, filter, and act on your leads.</div>', unsafe_allow_html=True)
+
+    # ── Layout: filters left, results right ──
+    filter_col, results_col = st.columns([1, 3])
+
+    with filter_col:
+        st.markdown('<div class="re-card">', unsafe_allow_html=True)
+        st.markdown("**Saved Searches**")
+        saved_list = list_saved_searches()
+        saved_options = {f"{r['name']}": r["id"] for r in saved_list}
+        saved_choice = st.selectbox("Load a saved search", ["— Select —"] + list(saved_options.keys()), key="saved_search_choice")
+        sc1, sc2 = st.columns(2)
+        with sc1:
+            load_clicked = st.button("Load", use_container_width=True, key="saved_load_btn")
+        with sc2:
+            delete_clicked = st.button("Delete", use_container_width=True, key="saved_delete_btn")
+        save_name = st.text_input("Save current as", placeholder="e.g. OH absentee", key="saved_search_name")
+        save_clicked = st.button("💾 Save search", use_container_width=True, key="saved_save_btn")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        # ── Filters card ──
+        st.markdown('<div class="re-card">', unsafe_allow_html=True)
+        st.markdown("**🏠 Property**")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            type_sf  = st.checkbox("Single-Family", key="prop_single")
+            type_c   = st.checkbox("Condo",         key="prop_condo")
+        with col2:
+            type_m2  = st.checkbox("Multi (2-4)",   key="prop_multi2")
+            type_m5  = st.checkbox("Multi (5+)",    key="prop_multi5")
+        prop_types = ([t for t, c in [("Single-Family Homes", type_sf), ("Condo/Co-Ownerships", type_c),
+                       ("Multi-Family (2-4)", type_m2), ("Multi-Family (5+)", type_m5)] if c])
+
+        st.markdown('<div class="filter-section">Bedrooms</div>', unsafe_allow_html=True)
+        f_beds   = st.radio("Beds",  ["Any","1+","2+","3+","4+","5+"], horizontal=True, key="beds_radio", label_visibility="collapsed")
+        bed_value = 0 if f_beds == "Any" else int(f_beds.replace("+",""))
+
+        st.markdown('<div class="filter-section">Bathrooms</div>', unsafe_allow_html=True)
+        f_baths  = st.radio("Baths", ["Any","1+","2+","3+","4+","5+"], horizontal=True, key="baths_radio", label_visibility="collapsed")
+        bath_value = 0 if f_baths == "Any" else int(f_baths.replace("+",""))
+
+        st.markdown('<div class="filter-section">Occupancy</div>', unsafe_allow_html=True)
+        occ_occ   = st.checkbox("Occupied", key="occ_occupied")
+        occ_vac   = st.checkbox("Vacant",   key="occ_vacant")
+        occupancy_list = [x for x, c in [("Occupied", occ_occ), ("Vacant", occ_vac)] if c]
+
+        apn_search = st.text_input("APN", placeholder="Search APN...", key="apn_search")
+
+        with st.expander("👤 Owner Filters"):
+            owner_name_contains = st.text_input("Owner name contains", key="owner_name_search")
+            ot1, ot2, ot3 = st.columns(3)
+            with ot1: o_ind = st.checkbox("Individual", key="owner_indiv")
+            with ot2: o_biz = st.checkbox("Business",   key="owner_biz")
+            with ot3: o_bnk = st.checkbox("Bank/Trust", key="owner_bank")
+            owner_types = [x for x, c in [("Individual", o_ind), ("Business", o_biz), ("Bank or Trust", o_bnk)] if c]
+            is_absentee  = st.checkbox("Absentee Only", key="is_absentee")
+            years_owned_min = st.number_input("Min years owned", min_value=0, value=0, step=1, key="years_owned")
+            tax_year_max = st.number_input("Max tax year", min_value=2000, max_value=datetime.datetime.now().year,
+                                           value=datetime.datetime.now().year, step=1, key="tax_year")
+
+        with st.expander("💰 Financial Filters"):
+            st.markdown('<div class="filter-section">Est. Value ($)</div>', unsafe_allow_html=True)
+            ev1, ev2 = st.columns(2)
+            with ev1: est_value_min = st.number_input("Min", min_value=0, value=0, step=10000, key="est_val_min", label_visibility="collapsed")
+            with ev2: est_value_max = st.number_input("Max", min_value=0, value=0, step=10000, key="est_val_max", label_visibility="collapsed")
+
+            st.markdown('<div class="filter-section">Est. Equity ($)</div>', unsafe_allow_html=True)
+            ee1, ee2 = st.columns(2)
+            with ee1: est_equity_min = st.number_input("Min", min_value=0, value=0, step=10000, key="est_eq_min", label_visibility="collapsed")
+            with ee2: est_equity_max = st.number_input("Max", min_value=0, value=0, step=10000, key="est_eq_max", label_visibility="collapsed")
+
+            st.markdown('<div class="filter-section">Equity %</div>', unsafe_allow_html=True)
+            ep1, ep2 = st.columns(2)
+            with ep1: est_equity_pct_min = st.number_input("Min%", min_value=0, max_value=100, value=0,   step=5, key="est_eq_pct_min", label_visibility="collapsed")
+            with ep2: est_equity_pct_max = st.number_input("Max%", min_value=0, max_value=100, value=100, step=5, key="est_eq_pct_max", label_visibility="collapsed")
+
+            st.markdown('<div class="filter-section">Last Sale Price ($)</div>', unsafe_allow_html=True)
+            ls1, ls2 = st.columns(2)
+            with ls1: last_sale_min = st.number_input("Min", min_value=0, value=0, step=10000, key="sale_min", label_visibility="collapsed")
+            with ls2: last_sale_max = st.number_input("Max", min_value=0, value=0, step=10000, key="sale_max", label_visibility="collapsed")
+
+            assessed_min = assessed_max = 0
+            filter_by_sale_date = st.checkbox("Filter by last sale date", key="filter_sale_date")
+            last_sale_date = st.date_input("Before", value=datetime.datetime.now(), key="sale_date", disabled=not filter_by_sale_date)
+            private_loan = st.checkbox("Private Loan Only", key="private_loan")
+            cash_buyer   = st.checkbox("Cash Buyer Only",   key="cash_buyer")
+
+        with st.expander("📊 Address Appearances"):
+            min_appearances = st.number_input("Min appearances", min_value=1, value=2, step=1, key="min_appear")
+            show_only_multi = st.checkbox("Only multi-appearance addresses", value=False, key="show_multi")
+
+        with st.expander("🎯 Distress Score"):
+            min_distress = st.slider("Min Distress Score", 1, 10, 1, key="min_distress")
+            filter_by_distress = st.checkbox("Filter by score", value=False, key="filter_distress")
+            st.caption("Score = Absentee+Equity+Tax Delinquent+Vacant+Ownership length")
+            if st.button("♻️ Recalculate All Scores", key="recalc_scores"):
+                with st.spinner("Scoring leads..."):
+                    try:
+                        n = batch_update_distress_scores()
+                        st.success(f"Updated {n:,} leads.")
+                    except Exception as e:
+                        st.error(str(e))
+
+        st.markdown('</div>', unsafe_allow_html=True)
+        run_search = st.button("🔍 Run Search", use_container_width=True, type="primary", key="run_search_btn")
+
+    # One filter spec drives Run Search, Save search and Load
+    current_spec = normalize_search_spec(dict(
+        selected_state=selected_state, prop_types=prop_types, bed_value=bed_value,
+        bath_value=bath_value, occupancy_list=occupancy_list, apn_search=apn_search or "",
+        owner_name_contains=owner_name_contains or "", owner_types=owner_types,
+        is_absentee=is_absentee, years_owned_min=years_owned_min, tax_year_max=tax_year_max,
+        est_value_min=est_value_min, est_value_max=est_value_max,
+        est_equity_min=est_equity_min, est_equity_max=est_equity_max,
+        est_equity_pct_min=est_equity_pct_min, est_equity_pct_max=est_equity_pct_max,
+        assessed_min=0, assessed_max=0,
+        last_sale_min=last_sale_min, last_sale_max=last_sale_max,
+        filter_by_sale_date=filter_by_sale_date,
+        last_sale_date=last_sale_date.isoformat() if last_sale_date else None,
+        private_loan=private_loan, cash_buyer=cash_buyer,
+        filter_by_distress=filter_by_distress, min_distress=min_distress,
+        show_only_multi=show_only_multi, min_appearances=min_appearances))
+
+    # ── Results ──
+    with results_col:
+        # ── Active filters summary ──
+        active = []
+        if selected_state != "All States": active.append(f"State: **{selected_state}**")
+        if prop_types:     active.append("Types: " + ", ".join(prop_types))
+        if bed_value:      active.append(f"Beds: {bed_value}+")
+        if bath_value:     active.append(f"Baths: {bath_value}+")
+        if occupancy_list: active.append("Occ: " + ", ".join(occupancy_list))
+        if is_absentee:    active.append("Absentee only")
+        if show_only_multi:active.append(f"Multi ≥{min_appearances}")
+        if active:
+            st.markdown("**Active filters:** " + "  ·  ".join(active))
+        else:
+            st.caption("No filters applied — showing all leads after search.")
+
+        # Saved search actions
+        if delete_clicked and saved_choice != "— Select —":
+            sid = saved_options.get(saved_choice)
+            if sid:
+                try:
+                    delete_saved_search(sid)
+                    st.success("Deleted.")
+                    st.rerun()
+                except Exception as e:
+                    st.error(str(e))
+
+        if load_clicked and saved_choice != "— Select —":
+            try:
+                sid = saved_options.get(saved_choice)
+                if sid:
+                    rec = get_saved_search(sid)
+                    if rec:
+                        fd = normalize_search_spec(json.loads(rec["filters_json"]))
+                        _start_search(fd, cols)
+                        st.success(f"Loaded «{rec['name']}».")
+                        st.rerun()
+            except Exception as e:
+                st.error(str(e))
+
+        if save_clicked and save_name and save_name.strip():
+            try:
+                save_saved_search(save_name.strip(), json.dumps(current_spec))
+                st.success(f"Saved «{save_name.strip()}».")
+                st.rerun()
+            except Exception as e:
+                st.error(str(e))
+
+        # ── Build & run query ──
+        if run_search:
+            st.session_state.pop("loaded_search_name", None)
+            _start_search(current_spec, cols)
+            st.rerun()
+
+        # ── Display results ──
+        if "search_spec" in st.session_state:
+            try:
+                if "search_summary" not in st.session_state:
+                    st.session_state["search_summary"] = get_search_summary(st.session_state["search_spec"], cols)
+            except Exception as e:
+                st.error(f"Query error: {e}")
+                st.exception(e)
+                st.stop()
+            kpis        = st.session_state["search_summary"]
+            total_found = kpis["total"]
+
+            # ── VIEW KPI CARDS ──
+            if total_found:
+                vk1, vk2, vk3, vk4, vk5 = st.columns(5)
+                vk1.markdown(f'''<div class="metric-tile">
+                    <div class="label">Leads Found</div>
+                    <div class="value">{total_found:,}</div>
+                </div>''', unsafe_allow_html=True)
+                vk2.markdown(f'''<div class="metric-tile">
+                    <div class="label">Total Equity in View</div>
+                    <div class="value">${kpis["total_equity"]/1_000_000:.1f}M</div>
+                </div>''', unsafe_allow_html=True)
+                vk3.markdown(f'''<div class="metric-tile">
+                    <div class="label">Avg Motivation Score</div>
+                    <div class="value">{kpis["avg_score"]}/10</div>
+                </div>''', unsafe_allow_html=True)
+                vk4.markdown(f'''<div class="metric-tile">
+                    <div class="label">Vacant</div>
+                    <div class="value">{kpis["vacant_count"]:,}</div>
+                </div>''', unsafe_allow_html=True)
+                vk5.markdown(f'''<div class="metric-tile">
+                    <div class="label">Absentee</div>
+                    <div class="value">{kpis["absentee_count"]:,}</div>
+                </div>''', unsafe_allow_html=True)
+                st.markdown("<div style='margin-bottom:1rem;'></div>", unsafe_allow_html=True)
+
+            # ── MAP VIEW (split: map top, table bottom) ──
+            map_tab, table_tab, stack_tab = st.tabs(["🗺 Map View", "📋 Table View", "🔥 Stacked Leads"])
+
+            with map_tab:
+                _map_view(cols)
+
+            with stack_tab:
+                _stacked_leads()
+
+            with table_tab:
+                st.markdown(f'<div class="section-title">🏠 {total_found:,} Leads Found</div>', unsafe_allow_html=True)
+
+            _results_grid(cols, total_found)
+        else:
+            st.markdown("""
+            <div class="re-card" style="text-align:center;padding:3rem 2rem;">
+                <div style="font-size:2.5rem;margin-bottom:1rem;">🔍</div>
+                <div style="font-size:1rem;font-weight:600;color:#e6edf3;">Set your filters and click Run Search</div>
+                <div style="font-size:0.85rem;margin-top:0.5rem;color:#8b949e;">Results will appear here with batch actions for export, tagging, and pipeline updates.</div>
+            </div>""", unsafe_allow_html=True)
@@ -0,0 +1,35 @@
+"""
+Search-as-you-type lead picker. Each search fetches a handful of matches
+from the database (core.search_leads) instead of preloading leads into a
+selectbox.
+"""
+import streamlit as st
+
+from core import search_leads, LEAD_SEARCH_MIN_CHARS
+
+PICKER_MATCHES = 15
+
+
+def _label(r):
+    where = ", ".join(str(v) for v in (r.get("street_address"), r.get("city"),
+                                       r.get("state") or r.get("property_state")) if v)
+    owner = f" · {r['owner_name']}" if r.get("owner_name") else ""
+    return f"{r['id']} — {where or '?'}{owner}"
+
+
+def lead_picker(key, label="Find lead"):
+    """Text search plus a pick from its matches. Returns the chosen lead id, or None."""
+    term = st.text_input(label, placeholder="Address, owner, APN or lead id", key=f"{key}_q")
+    term = (term or "").strip()
+    if not term:
+        return None
+    if len(term) < LEAD_SEARCH_MIN_CHARS and not term.isdigit():
+        st.caption(f"Type at least {LEAD_SEARCH_MIN_CHARS} characters.")
+        return None
+    matches = search_leads(term, limit=PICKER_MATCHES)
+    if not matches:
+        st.info("No leads found.")
+        return None
+    choices = {_label(r): r["id"] for r in matches}
+    picked = st.selectbox("Select lead", list(choices), key=f"{key}_pick")
+    return choices.get(picked)
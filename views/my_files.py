@@ -0,0 +1,60 @@
+"""My Files page."""
+import streamlit as st
+from core import (
+    list_uploaded_lists,
+    update_uploaded_list_status,
+    delete_uploaded_lists,
+    UPLOAD_STATUSES,
+)
+
+
+def render(ctx):
+    st.markdown('<div class="page-title">My Files</div>', unsafe_allow_html=True)
+    st.markdown('<div class="page-sub">Manage your uploaded lists and track their status.</div>', unsafe_allow_html=True)
+
+    try:
+        files = list_uploaded_lists()
+        if not files:
+            st.markdown("""
+            <div class="re-card" style="text-align:center;padding:2.5rem;">
+                <div style="font-size:2rem;margin-bottom:0.75rem;">📁</div>
+                <div style="font-weight:600;color:#e6edf3;">No uploaded files yet</div>
+                <div style="font-size:0.82rem;margin-top:0.4rem;color:#8b949e;">Import a CSV in the <strong>Import</strong> page to see it here.</div>
+            </div>""", unsafe_allow_html=True)
+        else:
+            if st.button("🗑 Delete selected", type="secondary"):
+                sel_ids = [f["id"] for f in files if st.session_state.get(f"myfiles_sel_{f['id']}", False)]
+                if sel_ids:
+                    delete_uploaded_lists(sel_ids)
+                    st.success(f"Deleted {len(sel_ids)} file(s).")
+                    st.rerun()
+                else:
+                    st.warning("Select at least one file to delete.")
+
+            st.divider()
+            # Header row
+            h0,h1,h2,h3,h4,h5 = st.columns([0.4,2.5,1.5,0.8,1.5,0.6])
+            for h, label in zip([h0,h1,h2,h3,h4,h5], ["","List Name","Uploaded","Leads","Status","Action"]):
+                h.markdown(f"<div style='font-size:0.7rem;font-weight:700;letter-spacing:0.07em;text-transform:uppercase;color:#8b949e;'>{label}</div>", unsafe_allow_html=True)
+            st.divider()
+
+            for f in files:
+                c0,c1,c2,c3,c4,c5 = st.columns([0.4,2.5,1.5,0.8,1.5,0.6])
+                with c0: st.checkbox("", value=False, key=f"myfiles_sel_{f['id']}", label_visibility="collapsed")
+                with c1:
+                    st.markdown(f"**{f['name']}**")
+                    st.caption(f['filename'])
+                with c2: st.caption(str(f['uploaded_at'])[:16])
+                with c3: st.caption(f"{f['lead_count']:,}")
+                with c4:
+                    new_status = st.selectbox("", UPLOAD_STATUSES,
+                                              index=UPLOAD_STATUSES.index(f["status"]) if f["status"] in UPLOAD_STATUSES else 0,
+                                              key=f"file_status_{f['id']}", label_visibility="collapsed")
+                with c5:
+                    if st.button("Save", key=f"file_update_{f['id']}", use_container_width=True):
+                        update_uploaded_list_status(f["id"], new_status)
+                        st.success("Updated.")
+                        st.rerun()
+                st.divider()
+    except Exception as e:
+        st.error(str(e)); st.exception(e)
@@ -0,0 +1,111 @@
+"""Pipeline page."""
+import streamlit as st
+import pandas as pd
+from core import (
+    get_pipeline_counts,
+    get_leads_by_stage,
+    update_stage,
+    PIPELINE_COLUMNS,
+)
+from views import fragment
+from views.activity import lead_activity_panel
+from views.lead_picker import lead_picker
+
+
+@fragment
+def _notes_panel():
+    """Lead picker and activity log; picking a lead only reruns this fragment."""
+    lid_pl = lead_picker("notes_lead_pipeline")
+    if lid_pl is None:
+        return
+    lead_activity_panel(lid_pl, "pipeline_activity")
+
+
+def render(ctx):
+    cols = ctx["cols"]
+
+    st.markdown('<div class="page-title">Pipeline</div>', unsafe_allow_html=True)
+    st.markdown('<div class="page-sub">Manage your deals by stage. Select leads and move them through the funnel.</div>', unsafe_allow_html=True)
+
+    if "stage" not in cols:
+        st.warning("No `stage` column found. Run: `ALTER TABLE properties ADD COLUMN stage VARCHAR(50);`")
+    else:
+        try:
+            counts    = get_pipeline_counts()
+            stage_map = {r["stage"]: r["cnt"] for r in counts} if counts else {}
+            PIPELINE_STAGES = ["New","Contacted","Negotiating","Closed","Lost","Unset"]
+            STAGE_CSS = {"New":"stage-new","Contacted":"stage-contacted","Negotiating":"stage-negotiating",
+                         "Closed":"stage-closed","Lost":"stage-lost","Unset":"stage-unset"}
+
+            # ── Board ──
+            st.markdown('<div class="section-title">Deal Board</div>', unsafe_allow_html=True)
+            board_cols = st.columns(len(PIPELINE_STAGES))
+            for i, s in enumerate(PIPELINE_STAGES):
+                cnt = stage_map.get(s, 0)
+                css = STAGE_CSS.get(s, "stage-unset")
+                board_cols[i].markdown(f"""
+                <div class="pipeline-col">
+                    <div class="pipeline-header {css}">{s}</div>
+                    <div class="pipeline-count">{cnt:,}</div>
+                    <div class="pipeline-sub">leads</div>
+                </div>""", unsafe_allow_html=True)
+
+            st.markdown("<div style='margin-top:1.5rem;'></div>", unsafe_allow_html=True)
+
+            # ── Funnel totals ──
+            total_pl = sum(stage_map.values())
+            if total_pl > 0:
+                prog_cols = st.columns(len(PIPELINE_STAGES))
+                for i, s in enumerate(PIPELINE_STAGES):
+                    cnt = stage_map.get(s, 0)
+                    pct = (cnt / total_pl * 100) if total_pl else 0
+                    prog_cols[i].progress(int(pct), text=f"{pct:.0f}%")
+
+            st.divider()
+
+            # ── Move leads ──
+            st.markdown('<div class="section-title">Move Leads</div>', unsafe_allow_html=True)
+            mc1, mc2, mc3 = st.columns([2, 2, 1])
+            with mc1:
+                stage_filter = st.selectbox("Show stage", ["All"] + [s for s in PIPELINE_STAGES if stage_map.get(s, 0) > 0 or s == "Unset"])
+            with mc2:
+                new_stage = st.selectbox("Move selected to", ["New","Contacted","Negotiating","Closed","Lost"])
+            with mc3:
+                st.markdown("<div style='margin-top:1.6rem;'></div>", unsafe_allow_html=True)
+                move_btn = st.button("Apply ▶", type="primary", use_container_width=True)
+
+            leads_raw = get_leads_by_stage(stage_filter, PIPELINE_COLUMNS)
+            if not leads_raw:
+                st.info("No leads in this stage.")
+            else:
+                df_pl = pd.DataFrame(leads_raw)
+                st.caption(f"{len(df_pl):,} leads — check rows then click Apply to move them.")
+
+                df_pl_sel = df_pl.copy()
+                if "selected" not in df_pl_sel.columns:
+                    df_pl_sel.insert(0, "selected", False)
+
+                # Show only useful columns
+                show_cols = ["selected"] + [c for c in ["id","street_address","city","state","owner_name","stage","motivation_score","tags"] if c in df_pl_sel.columns]
+                edited_pl = st.data_editor(
+                    df_pl_sel[show_cols], use_container_width=True, hide_index=True,
+                    column_config={"selected": st.column_config.CheckboxColumn("✓", default=False)},
+                    disabled=[c for c in show_cols if c != "selected"],
+                    key="pipeline_editor",
+                )
+                if move_btn:
+                    sel = edited_pl[edited_pl["selected"] == True]
+                    if len(sel) == 0:
+                        st.warning("Select at least one lead.")
+                    else:
+                        update_stage(list(sel["id"]), new_stage)
+                        st.success(f"Moved {len(sel)} lead(s) → **{new_stage}**.")
+                        st.rerun()
+
+            st.divider()
+
+            # ── Notes ──
+            st.markdown('<div class="section-title">Notes & Activity</div>', unsafe_allow_html=True)
+            _notes_panel()
+        except Exception as e:
+            st.error(str(e)); st.exception(e)
@@ -0,0 +1,71 @@
+"""Tags page."""
+import streamlit as st
+import pandas as pd
+from core import (
+    get_all_tags_with_counts,
+    get_leads_by_tag,
+    rename_tag,
+    remove_tag_from_all,
+    TAG_VIEW_COLUMNS,
+)
+
+
+def render(ctx):
+    cols = ctx["cols"]
+
+    st.markdown('<div class="page-title">Tag Manager</div>', unsafe_allow_html=True)
+    st.markdown('<div class="page-sub">View, rename, and remove tags across your lead database.</div>', unsafe_allow_html=True)
+
+    if "tags" not in cols:
+        st.warning("No `tags` column found. Run: `ALTER TABLE properties ADD COLUMN tags TEXT;`")
+    else:
+        try:
+            tag_list = get_all_tags_with_counts()
+            if not tag_list:
+                st.info("No tags yet. Add tags from Lead Engine → batch Tag action.")
+            else:
+                # Summary
+                t_total = sum(t["cnt"] for t in tag_list)
+                tm1,tm2 = st.columns(2)
+                tm1.markdown(f'<div class="metric-tile"><div class="label">Unique Tags</div><div class="value">{len(tag_list)}</div></div>', unsafe_allow_html=True)
+                tm2.markdown(f'<div class="metric-tile"><div class="label">Total Tag Assignments</div><div class="value">{t_total:,}</div></div>', unsafe_allow_html=True)
+
+                st.markdown("<div style='margin-top:1rem;'></div>", unsafe_allow_html=True)
+                st.markdown('<div class="section-title">All Tags</div>', unsafe_allow_html=True)
+                tag_df = pd.DataFrame(tag_list)
+                st.dataframe(tag_df.rename(columns={"tag_name":"Tag","cnt":"Leads"}),
+                             use_container_width=True, hide_index=True)
+
+                st.divider()
+                chosen = st.selectbox("Select a tag to manage", [t["tag_name"] for t in tag_list])
+                chosen_cnt = next((t["cnt"] for t in tag_list if t["tag_name"] == chosen), 0)
+
+                # View leads
+                st.markdown(f'<div class="section-title">Leads with tag «{chosen}» ({chosen_cnt:,})</div>', unsafe_allow_html=True)
+                if st.button("View leads", type="primary"):
+                    st.session_state["tag_show"] = chosen
+                    st.rerun()
+                if st.session_state.get("tag_show") == chosen:
+                    leads = get_leads_by_tag(chosen, TAG_VIEW_COLUMNS)
+                    if leads:
+                        st.dataframe(pd.DataFrame(leads), use_container_width=True, hide_index=True)
+                    else:
+                        st.info("No leads found.")
+
+                st.divider()
+                st.markdown('<div class="section-title">Rename or Remove</div>', unsafe_allow_html=True)
+                rc1, rc2 = st.columns(2)
+                with rc1:
+                    new_name = st.text_input("Rename to", placeholder="New tag name", key="tag_new_name")
+                    if st.button("Rename", type="primary") and new_name.strip():
+                        n = rename_tag(chosen, new_name.strip())
+                        st.success(f"Renamed in {n} lead(s).")
+                        st.rerun()
+                with rc2:
+                    st.markdown("<div style='margin-top:1.9rem;'></div>", unsafe_allow_html=True)
+                    if st.button("🗑 Remove from all leads", type="secondary"):
+                        n = remove_tag_from_all(chosen)
+                        st.success(f"Removed from {n} lead(s).")
+                        st.rerun()
+        except Exception as e:
+            st.error(str(e)); st.exception(e)
@@ -0,0 +1,220 @@
+"""Global CSS, the sidebar script and the nav bar markup injected on every run."""
+
+# Layout & custom components only (theme colors handled by .streamlit/config.toml)
+GLOBAL_CSS = """
+<style>
+@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
+
+html, body {
+    font-family: 'Inter', sans-serif !important;
+}
+/* Apply Inter only to actual text — never to icon/material font elements */
+p, span:not([data-testid*="Icon"]):not(.material-icons):not([class*="icon"]),
+div:not([class*="Icon"]):not([class*="icon"]):not([data-testid*="Icon"]),
+label, input, textarea, select, button, h1, h2, h3, h4, h5, h6,
+.stMarkdown, .stText, .stCaption,
+[data-testid="stMarkdownContainer"],
+[data-testid="stWidgetLabel"] {
+    font-family: 'Inter', sans-serif !important;
+}
+/* Explicitly protect Streamlit's icon font */
+[data-testid="stExpanderToggleIcon"],
+[class*="Icon"], [class*="icon"],
+.material-icons,
+[data-baseweb="icon"] {
+    font-family: inherit !important;
+}
+
+/* ── Layout ── */
+.main .block-container {
+    padding: 0.5rem 2rem 3rem 2rem !important;
+    max-width: 100% !important;
+    overflow-x: hidden !important;
+}
+
+/* Box sizing fix */
+.stApp * {
+    box-sizing: border-box !important;
+}
+
+/* Columns: no overflow clipping */
+[data-testid="stHorizontalBlock"] {
+    overflow: visible !important;
+    flex-wrap: wrap !important;
+    gap: 0.5rem !important;
+}
+[data-testid="stColumn"] {
+    overflow: visible !important;
+    min-width: 0 !important;
+}
+
+/* ── Hide sidebar entirely — using top nav ── */
+[data-testid="stSidebar"],
+[data-testid="stSidebarCollapseButton"],
+[data-testid="stSidebarNav"],
+button[kind="header"] { display: none !important; }
+
+/* ── Horizontal radio nav styling ── */
+div[data-testid="stRadio"] > div[role="radiogroup"] {
+    display: flex !important;
+    flex-direction: row !important;
+    flex-wrap: wrap !important;
+    gap: 6px !important;
+    align-items: center !important;
+}
+div[data-testid="stRadio"] > div[role="radiogroup"] > label {
+    border: 1px solid #30363d !important;
+    border-radius: 6px !important;
+    padding: 0.3rem 0.9rem !important;
+    font-size: 0.83rem !important;
+    font-weight: 500 !important;
+    cursor: pointer !important;
+    white-space: nowrap !important;
+    background: #161b22 !important;
+    color: #8b949e !important;
+    transition: all 0.15s !important;
+    min-width: fit-content !important;
+    display: inline-flex !important;
+    align-items: center !important;
+}
+div[data-testid="stRadio"] > div[role="radiogroup"] > label:has(input:checked) {
+    background: #2f81f7 !important;
+    border-color: #2f81f7 !important;
+    color: #fff !important;
+    font-weight: 600 !important;
+}
+div[data-testid="stRadio"] > div[role="radiogroup"] > label > div:first-child {
+    display: none !important;
+}
+
+
+
+/* ── Custom metric tiles ── */
+.metric-tile {
+    background: rgba(255,255,255,0.04);
+    border: 1px solid rgba(255,255,255,0.08);
+    border-radius: 8px;
+    padding: 1.1rem 1.4rem;
+}
+.metric-tile .label {
+    font-size: 0.72rem; font-weight: 600; letter-spacing: 0.06em;
+    text-transform: uppercase; opacity: 0.55; margin-bottom: 0.3rem;
+}
+.metric-tile .value { font-size: 1.85rem; font-weight: 700; line-height: 1.1; }
+.metric-tile .delta { font-size: 0.78rem; color: #3fb950; margin-top: 0.25rem; }
+.metric-tile .delta.down { color: #f85149; }
+
+/* ── Pipeline board ── */
+.pipeline-col {
+    background: rgba(255,255,255,0.04);
+    border: 1px solid rgba(255,255,255,0.08);
+    border-radius: 8px;
+    padding: 0.85rem 1rem;
+    min-height: 80px;
+}
+.pipeline-header {
+    font-size: 0.72rem; font-weight: 700; letter-spacing: 0.07em;
+    text-transform: uppercase; margin-bottom: 0.5rem;
+    padding-bottom: 0.5rem; border-bottom: 2px solid;
+}
+.pipeline-count { font-size: 1.6rem; font-weight: 700; }
+.pipeline-sub   { font-size: 0.75rem; opacity: 0.5; }
+
+.stage-new         { color: #58a6ff !important; border-color: #58a6ff !important; }
+.stage-contacted   { color: #bc8cff !important; border-color: #bc8cff !important; }
+.stage-negotiating { color: #e3b341 !important; border-color: #e3b341 !important; }
+.stage-closed      { color: #3fb950 !important; border-color: #3fb950 !important; }
+.stage-lost        { color: #f85149 !important; border-color: #f85149 !important; }
+.stage-unset       { color: #484f58 !important; border-color: #484f58 !important; }
+
+/* ── Cards ── */
+.re-card {
+    background: rgba(255,255,255,0.04);
+    border: 1px solid rgba(255,255,255,0.08);
+    border-radius: 8px;
+    padding: 1.25rem 1.5rem;
+    margin-bottom: 1rem;
+}
+
+/* ── Section / page titles ── */
+.section-title {
+    font-size: 1rem; font-weight: 700;
+    margin: 0 0 1rem 0; padding-bottom: 0.5rem;
+    border-bottom: 1px solid rgba(255,255,255,0.08);
+}
+.page-title  { font-size: 1.5rem; font-weight: 700; margin-bottom: 0.15rem; }
+.page-sub    { font-size: 0.85rem; opacity: 0.55; margin-bottom: 1.25rem; }
+
+/* ── Filter labels ── */
+.filter-section {
+    font-size: 0.7rem; font-weight: 700; letter-spacing: 0.07em;
+    text-transform: uppercase; opacity: 0.5; margin: 1rem 0 0.4rem 0;
+}
+
+/* ── Import step badges ── */
+.step-badge {
+    display: inline-flex; align-items: center; justify-content: center;
+    width: 26px; height: 26px; background: #2f81f7; color: #fff;
+    border-radius: 50%; font-size: 0.75rem; font-weight: 700;
+    margin-right: 0.5rem; flex-shrink: 0;
+}
+.step-row {
+    display: flex; align-items: center; margin-bottom: 0.5rem;
+    font-size: 0.875rem; font-weight: 500;
+}
+
+/* ── Scrollbar ── */
+::-webkit-scrollbar { width: 6px; height: 6px; }
+::-webkit-scrollbar-thumb { background: rgba(255,255,255,0.12); border-radius: 3px; }
+::-webkit-scrollbar-thumb:hover { background: rgba(255,255,255,0.2); }
+
+/* ── Expanders — NO custom styling, let Streamlit render natively ── */
+
+/* Hide Streamlit chrome */
+#MainMenu, footer, header { visibility: hidden; }
+</style>
+"""
+
+# Force sidebar always open via JS
+SIDEBAR_JS = '''
+<script>
+// Force sidebar expanded on load
+const forceOpenSidebar = () => {
+    const btn = window.parent.document.querySelector('[data-testid="stSidebarCollapseButton"]');
+    const sidebar = window.parent.document.querySelector('[data-testid="stSidebar"]');
+    if (sidebar) {
+        sidebar.style.display = "block";
+        sidebar.style.visibility = "visible";
+        sidebar.style.width = "240px";
+        sidebar.style.minWidth = "240px";
+    }
+};
+document.addEventListener("DOMContentLoaded", forceOpenSidebar);
+setTimeout(forceOpenSidebar, 100);
+setTimeout(forceOpenSidebar, 500);
+</script>
+'''
+
+NAV_HTML = """
+<style>
+.topnav {
+    display: flex;
+    align-items: center;
+    gap: 4px;
+    padding: 8px 12px;
+    background: #161b22;
+    border-bottom: 1px solid #30363d;
+    margin: -1rem -2rem 0 -2rem;
+}
+.topnav-brand {
+    font-size: 0.95rem;
+    font-weight: 700;
+    color: #e6edf3;
+    margin-right: 16px;
+    white-space: nowrap;
+}
+</style>
+<div class="topnav">
+  <span class="topnav-brand">🏠 RE Engine Pro</span>
+</div>
+"""